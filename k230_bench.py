@@ -0,0 +1,123 @@
+# K230 主机端基准测试
+# 使用 k230_host 中的硬件替身，在Linux上运行未修改的检测主循环，输出FPS和帧间延迟
+#
+# 用法:
+#   python k230_bench.py --synthetic 120                 # 生成合成序列并测试
+#   python k230_bench.py --frames recorded/ --loop --max-frames 500
+#   python k230_bench.py --frames recorded/ --detector optimized --uart pty
+
+import os, sys, json, argparse, importlib, tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "k230_host"))
+
+import host_backend
+
+DETECTORS = {
+    "config": "k230_rectangle_detector_with_config",
+    "optimized": "optimized_k230_rectangle_detector",
+}
+
+def percentile(values, p):
+    """最近秩百分位"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def run_detector(name):
+    """导入检测模块并运行其 main()，直到回放帧耗尽"""
+    module_name = DETECTORS[name]
+    if module_name in sys.modules:
+        module = importlib.reload(sys.modules[module_name])
+    else:
+        module = importlib.import_module(module_name)
+    module.main()
+    return module
+
+def summarize():
+    """根据 snapshot 时间戳计算吞吐量和帧间隔统计"""
+    ticks = host_backend.snapshot_ticks
+    intervals = [(ticks[i] - ticks[i - 1]) / 1000.0 for i in range(1, len(ticks))]
+    elapsed = (ticks[-1] - ticks[0]) / 1000000.0 if len(ticks) > 1 else 0.0
+    return {
+        "frames": len(ticks),
+        "elapsed_s": round(elapsed, 4),
+        "fps": round((len(ticks) - 1) / elapsed, 2) if elapsed > 0 else 0.0,
+        "frame_ms_p50": round(percentile(intervals, 50), 3),
+        "frame_ms_p95": round(percentile(intervals, 95), 3),
+        "frame_ms_max": round(max(intervals), 3) if intervals else 0.0,
+        "uart_bytes": len(host_backend.uart_buffer),
+        "display_frames": host_backend.display_count,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="K230 矩形检测主机端基准测试")
+    parser.add_argument("--frames", help="录制帧目录（.pgm/.ppm，可选 .rects.json 录制检测结果）")
+    parser.add_argument("--synthetic", type=int, default=0, help="生成N帧合成序列用于测试")
+    parser.add_argument("--detector", choices=sorted(DETECTORS), default="config")
+    parser.add_argument("--max-frames", type=int, default=0)
+    parser.add_argument("--loop", action="store_true", help="目录回放完后循环")
+    parser.add_argument("--uart", default=None, help="'pty' 或输出文件路径，默认写入内存缓冲区")
+    parser.add_argument("--save-display", default=None, help="保存Display输出的目录")
+    parser.add_argument("--save-every", type=int, default=1)
+    parser.add_argument("--sensor-fps", type=float, default=0, help="模拟传感器帧率，0表示不限速")
+    parser.add_argument("--cv-lite", choices=["auto", "recorded", "numpy", "approx"], default="auto")
+    parser.add_argument("--telemetry", action="store_true", help="启用分阶段耗时统计并写入结果")
+    parser.add_argument("--json", default=None, help="把结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    frames_dir = args.frames
+    if args.synthetic:
+        frames_dir = frames_dir or tempfile.mkdtemp(prefix="k230_frames_")
+        host_backend.make_synthetic_frames(frames_dir, count=args.synthetic)
+    if not frames_dir:
+        parser.error("需要 --frames 或 --synthetic")
+
+    host_backend.install()
+    host_backend.configure(frames_dir=frames_dir, max_frames=args.max_frames, loop=args.loop,
+                           display_save_dir=args.save_display, display_save_every=args.save_every,
+                           uart_path=args.uart, cv_lite_mode=args.cv_lite,
+                           sensor_fps=args.sensor_fps)
+    if args.telemetry:
+        from k230_config import DetectionConfig
+        DetectionConfig.ENABLE_TELEMETRY = True
+        DetectionConfig.TELEMETRY_REPORT_EVERY = 0
+    module = run_detector(args.detector)
+
+    result = summarize()
+    result["detector"] = args.detector
+    telemetry = getattr(module, "telemetry", None)
+    if telemetry is not None:
+        stages = telemetry.as_dict()
+        if stages:
+            result["stages"] = stages
+    runner = getattr(module, "runner", None)
+    if runner is not None:
+        result["pipelined"] = runner.stats()
+    gc_scheduler = getattr(module, "gc_scheduler", None)
+    if gc_scheduler is not None:
+        result["gc"] = gc_scheduler.stats()
+    governor = getattr(module, "governor", None)
+    if governor is not None and governor.evaluations:
+        result["governor"] = governor.stats()
+    motion_gate = getattr(module, "motion_gate", None)
+    if motion_gate is not None:
+        result["motion"] = motion_gate.stats()
+    boot_timer = getattr(module, "boot_timer", None)
+    if boot_timer is not None:
+        result["boot"] = boot_timer.as_dict()
+    uart_tx = getattr(module, "uart_tx", None)
+    if uart_tx is not None:
+        result["uart_tx"] = uart_tx.stats()
+    if host_backend.uart_pty_name:
+        result["uart_pty"] = host_backend.uart_pty_name
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    return result
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# K230 启动计时
+# 记录从检测脚本开始导入到首个有效UART帧发出之间每个初始化步骤的耗时，
+# 产线上故障重启的停机时间主要就是这段启动时间
+
+import time
+
+class BootTimer:
+    """启动步骤计时
+
+    t0: 计时起点（time.ticks_us()，检测脚本开始导入时记录）
+    """
+
+    def __init__(self, t0):
+        self.t0 = t0
+        self.names = []
+        self.ticks = []
+        self.complete = False  # 首个有效UART帧已发出
+
+    def mark(self, name):
+        """记录步骤 name 在此刻结束"""
+        self.names.append(name)
+        self.ticks.append(time.ticks_us())
+
+    def output(self):
+        """首个有效UART帧发出时调用，只记录一次"""
+        if not self.complete:
+            self.mark("first_uart")
+            self.complete = True
+
+    def elapsed_ms(self):
+        """从起点到现在的毫秒数"""
+        return time.ticks_diff(time.ticks_us(), self.t0) // 1000
+
+    def steps(self):
+        """[(步骤名, 本步耗时us, 累计us)]"""
+        out = []
+        prev = self.t0
+        for k in range(len(self.names)):
+            t = self.ticks[k]
+            out.append((self.names[k], time.ticks_diff(t, prev), time.ticks_diff(t, self.t0)))
+            prev = t
+        return out
+
+    def as_dict(self):
+        """步骤耗时和首个有效UART帧的时间（未发出时为 None）"""
+        steps = self.steps()
+        first = None
+        for name, _, at in steps:
+            if name == "first_uart":
+                first = at // 1000
+        return {
+            'first_uart_ms': first,
+            'steps': [{'name': name, 'us': us, 'at_ms': at // 1000} for name, us, at in steps],
+        }
+
+    def print_report(self):
+        """打印启动报告"""
+        print("启动耗时:")
+        for name, us, at in self.steps():
+            print(f"  {name:<14} {us / 1000:8.1f}ms  (累计 {at / 1000:.1f}ms)")
@@ -0,0 +1,205 @@
+# K230 部署构建
+# 把选定的 PresetConfigs 预设（及 --set 覆盖）解析为编译期常量，生成常量化的检测脚本，
+# 连同依赖模块一起用 mpy-cross 预编译为 .mpy，输出目录可直接拷贝到设备
+#
+# MicroPython 只在同一模块内内联 const()（下划线开头的常量也不占模块全局字典），
+# 所以常量块直接插入生成的检测脚本，热路径上的 DetectionConfig.X / AdvancedConfig.X
+# 和 detection_params['x'] 替换为 _X。运行时可能被修改的参数保留为类属性：
+#   - ENABLE_UART_COMMANDS 时 RUNTIME_PARAMS 中的参数（UART SET）
+#   - ENABLE_UART_COMMANDS 或 ENABLE_GOVERNOR 时预设会修改的参数（PRESET 命令/自动调节）
+#   - 检测脚本自身会赋值的参数
+# const() 只接受整数，布尔值写成 0/1，浮点数和字符串生成普通模块变量（仍省去类属性查找）
+#
+# 用法:
+#   python k230_build.py --preset balanced                        # 输出到 build/
+#   python k230_build.py --preset high_speed --set MIN_AREA=1200 --out sd/
+#   python k230_build.py --preset balanced --mpy-cross ~/micropython/mpy-cross/build/mpy-cross
+#   python k230_build.py --preset balanced --no-mpy                # 只生成 .py
+#
+# 开发时仍直接运行 k230_rectangle_detector_with_config.py（每次启动读取 k230_config）
+
+import os, sys, re, argparse, shutil, subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+DETECTOR = "k230_rectangle_detector_with_config"
+HOST_ONLY = ("k230_cv_ref",)  # 设备上有 cv_lite，主机参考实现不需要部署
+PRESETS = ("none", "high_accuracy", "high_speed", "balanced")
+
+CONFIG_REF = re.compile(r"\b(DetectionConfig|AdvancedConfig)\.([A-Z][A-Z0-9_]*)\b")
+CONFIG_ASSIGN = re.compile(r"\b(?:DetectionConfig|AdvancedConfig)\.([A-Z][A-Z0-9_]*)\s*=(?!=)")
+PARAM_REF = re.compile(r"\bdetection_params\['([a-z0-9_]+)'\](?!\s*=[^=])")
+MODULE_IMPORT = re.compile(r"^\s*(?:from|import)\s+(k230_\w+)", re.M)  # 含函数内的延迟导入
+CONFIG_IMPORT = re.compile(r"^from k230_config import .*\n", re.M)
+CONFIG_SOURCE = re.compile(r'^CONFIG_SOURCE = .*\n', re.M)
+
+class _Recorder:
+    """代替配置类，记录预设函数写入的参数名"""
+
+    def __init__(self, names):
+        object.__setattr__(self, "names", names)
+
+    def __setattr__(self, name, value):
+        self.names.add(name)
+
+def config_values(config):
+    """类上所有可常量化的参数"""
+    return {name: value for name, value in vars(config).items()
+            if name.isupper() and isinstance(value, (bool, int, float, str))}
+
+def preset_params():
+    """任一预设会修改的参数名"""
+    import k230_config
+    names = set()
+    saved = k230_config.DetectionConfig, k230_config.AdvancedConfig
+    k230_config.DetectionConfig = k230_config.AdvancedConfig = _Recorder(names)
+    try:
+        for preset in PRESETS[1:]:
+            getattr(k230_config.PresetConfigs, preset)()
+    finally:
+        k230_config.DetectionConfig, k230_config.AdvancedConfig = saved
+    return names
+
+def dynamic_params(source):
+    """运行时可能被修改、必须保留为类属性的参数名"""
+    from k230_config import DetectionConfig
+    from k230_commands import RUNTIME_PARAMS
+    names = set(CONFIG_ASSIGN.findall(source))
+    if DetectionConfig.ENABLE_UART_COMMANDS:
+        names.update(RUNTIME_PARAMS)
+    if DetectionConfig.ENABLE_UART_COMMANDS or DetectionConfig.ENABLE_GOVERNOR:
+        names.update(preset_params())
+    return names
+
+def resolve(preset, overrides):
+    """应用预设和覆盖，返回 (常量表, 相对 k230_config 默认值的改动)"""
+    from k230_config import DetectionConfig, AdvancedConfig, PresetConfigs
+    from k230_overrides import apply_overrides
+    defaults = {}
+    for config in (DetectionConfig, AdvancedConfig):
+        defaults.update(config_values(config))
+    if preset != "none":
+        getattr(PresetConfigs, preset)()
+    apply_overrides(overrides)
+    values = {}
+    changes = []
+    for config in (DetectionConfig, AdvancedConfig):
+        for name, value in config_values(config).items():
+            if name in values:
+                raise SystemExit(f"参数同时出现在两个配置类中: {name}")
+            values[name] = value
+            if defaults.get(name) != value:
+                changes.append((config.__name__, name, value))
+    return values, changes
+
+def const_line(name, value):
+    if isinstance(value, bool):
+        return f"_{name} = const({int(value)})  # {value}\n"
+    if isinstance(value, int):
+        return f"_{name} = const({value})\n"
+    return f"_{name} = {value!r}\n"
+
+def generate(source, preset, values, changes, dynamic):
+    """生成常量化的检测脚本源码，返回 (源码, 常量化参数数, 保留参数集合)"""
+    frozen = set(values) - dynamic
+    used = set()
+    kept = set()
+
+    def freeze_ref(m):
+        name = m.group(2)
+        if name in frozen:
+            used.add(name)
+            return "_" + name
+        kept.add(name)
+        return m.group(0)
+
+    # 自适应 Canny 会改写 detection_params 中的阈值
+    adaptive = ("canny_thresh1", "canny_thresh2") if values["CANNY_MODE"] != "FIXED" else ()
+
+    def freeze_param(m):
+        name = m.group(1).upper()
+        if name in frozen and m.group(1) not in adaptive:
+            used.add(name)
+            return "_" + name
+        return m.group(0)
+
+    head = CONFIG_IMPORT.search(source)
+    if head is None:
+        raise SystemExit(f"{DETECTOR}.py 中找不到 k230_config 导入")
+    body = CONFIG_REF.sub(freeze_ref, source[head.end():])
+    body = PARAM_REF.sub(freeze_param, body)
+    body = CONFIG_SOURCE.sub(f'CONFIG_SOURCE = "k230_build 常量（预设 {preset}）"\n', body, count=1)
+
+    block = [f"# ---- 由 k230_build.py 生成（预设 {preset}），请勿手动修改 ----\n",
+             "from micropython import const\n"]
+    # 类属性与常量保持一致，供 k230_config 中的辅助函数和 GET 命令读取
+    for config, name, value in changes:
+        block.append(f"{config}.{name} = {value!r}\n")
+    for name in sorted(used):
+        block.append(const_line(name, values[name]))
+    block.append("# ---- 生成结束 ----\n")
+    return source[:head.end()] + "".join(block) + body, len(used), kept
+
+def dependencies(name, found=None):
+    """检测脚本（递归）导入的 k230_* 模块"""
+    found = set() if found is None else found
+    with open(os.path.join(ROOT, name + ".py"), encoding="utf-8") as f:
+        for dep in MODULE_IMPORT.findall(f.read()):
+            if dep not in found and dep not in HOST_ONLY:
+                found.add(dep)
+                dependencies(dep, found)
+    return found
+
+def compile_mpy(mpy_cross, path):
+    """mpy-cross 编译单个文件，返回错误信息（成功为 None）"""
+    result = subprocess.run([mpy_cross, path], capture_output=True, text=True)
+    if result.returncode != 0:
+        return result.stderr.strip() or result.stdout.strip()
+    os.remove(path)
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="K230 矩形检测部署构建")
+    parser.add_argument("--preset", choices=PRESETS, default="balanced")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="在预设之后修改配置参数，可重复")
+    parser.add_argument("--out", default=os.path.join(ROOT, "build"), help="输出目录")
+    parser.add_argument("--mpy-cross", default="mpy-cross",
+                        help="mpy-cross 可执行文件（版本需与固件一致）")
+    parser.add_argument("--no-mpy", action="store_true", help="不预编译，只输出 .py")
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(ROOT, DETECTOR + ".py"), encoding="utf-8") as f:
+        source = f.read()
+    values, changes = resolve(args.preset, args.set)
+    dynamic = dynamic_params(source)
+    generated, frozen, kept = generate(source, args.preset, values, changes, dynamic)
+
+    os.makedirs(args.out, exist_ok=True)
+    outputs = [os.path.join(args.out, DETECTOR + ".py")]
+    with open(outputs[0], "w", encoding="utf-8") as f:
+        f.write(generated)
+    for dep in sorted(dependencies(DETECTOR)):
+        outputs.append(shutil.copy(os.path.join(ROOT, dep + ".py"), args.out))
+    # 设备从 main.py 启动；.mpy 模块被导入时 __name__ 不是 "__main__"，需显式调用 main()
+    with open(os.path.join(args.out, "main.py"), "w", encoding="utf-8") as f:
+        f.write(f"import {DETECTOR}\n{DETECTOR}.main()\n")
+
+    print(f"预设: {args.preset}，参数改动 {len(changes)} 项")
+    print(f"常量化参数: {frozen}，保留为类属性: {len(kept)} ({', '.join(sorted(kept))})")
+    if args.no_mpy:
+        print(f"已生成 {len(outputs)} 个模块（未预编译）: {args.out}")
+        return
+    mpy_cross = shutil.which(args.mpy_cross)
+    if mpy_cross is None:
+        print(f"未找到 mpy-cross（{args.mpy_cross}），输出保留为 .py: {args.out}")
+        return
+    for path in outputs:
+        error = compile_mpy(mpy_cross, path)
+        if error:
+            raise SystemExit(f"mpy-cross 编译失败 {os.path.basename(path)}: {error}")
+    print(f"已预编译 {len(outputs)} 个模块为 .mpy: {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# K230 自适应 Canny 阈值
+# 由灰度直方图估计 Canny 高低阈值（中值法或 OTSU 法），跨帧指数平滑，
+# 只有平滑值偏离当前生效阈值超过容差时才更新 cv_lite 参数
+
+class AdaptiveCanny:
+    """直方图驱动的 Canny 阈值
+
+    mode: "MEDIAN" 中值 v 的 (1-sigma)v / (1+sigma)v，"OTSU" OTSU 阈值 t 的 low_ratio*t / t
+    sigma: 中值法的阈值带宽
+    low_ratio: OTSU 法低阈值与高阈值之比
+    alpha: 指数平滑系数
+    drift: 平滑值偏离生效阈值超过该值（灰度级）才更新
+    every: 每隔多少帧计算一次直方图
+    low, high: 初始阈值
+    """
+
+    def __init__(self, mode="MEDIAN", sigma=0.33, low_ratio=0.5, alpha=0.2, drift=5, every=4,
+                 low=50, high=150):
+        self.mode = mode
+        self.sigma = sigma
+        self.low_ratio = low_ratio
+        self.alpha = alpha
+        self.drift = drift
+        self.every = max(1, every)
+        self.smooth_low = float(low)
+        self.smooth_high = float(high)
+        self.low = low  # 当前生效的阈值
+        self.high = high
+        self.frame = 0
+        self.primed = False
+        self.updates = 0  # 统计：阈值更新次数
+
+    def _estimate(self, img_gray):
+        hist = img_gray.get_histogram()
+        if self.mode == "OTSU":
+            high = hist.get_threshold().value()
+            low = high * self.low_ratio
+        else:
+            v = hist.get_percentile(0.5).value()
+            low = (1.0 - self.sigma) * v
+            high = (1.0 + self.sigma) * v
+        return (max(1.0, low), min(255.0, max(low + 1.0, high)))
+
+    def update(self, img_gray):
+        """按间隔估计并平滑阈值；生效阈值发生变化时返回 True"""
+        self.frame += 1
+        if self.primed and self.frame % self.every:
+            return False
+        low, high = self._estimate(img_gray)
+        if not self.primed:
+            self.smooth_low = low
+            self.smooth_high = high
+            self.primed = True
+        else:
+            a = self.alpha
+            self.smooth_low += a * (low - self.smooth_low)
+            self.smooth_high += a * (high - self.smooth_high)
+        if abs(self.smooth_low - self.low) < self.drift and abs(self.smooth_high - self.high) < self.drift:
+            return False
+        self.low = int(self.smooth_low)
+        self.high = int(self.smooth_high)
+        self.updates += 1
+        return True
+
+    def apply(self, params):
+        """把生效阈值写入 cv_lite 检测参数字典"""
+        params['canny_thresh1'] = self.low
+        params['canny_thresh2'] = self.high
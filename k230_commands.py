@@ -0,0 +1,115 @@
+# K230 UART 命令通道
+# 在RX线上接收按行分隔的ASCII命令，每帧非阻塞轮询一次；
+# 解析出的命令暂存起来，由主循环在两帧之间统一应用
+#
+# 命令（不区分大小写，以 \n 结尾）:
+#   PRESET <high_accuracy|high_speed|balanced>   切换预设
+#   SET <参数名> <值>                              修改运行时参数（见 RUNTIME_PARAMS）
+#   GET <参数名>                                   读取参数
+# 应答: "OK ..." 或 "ERR ..."，封装为 v2 文本帧（见 k230_protocol.TextEncoderV2），不直接写ASCII
+
+# 允许运行时修改的参数（不改变流水线结构的 cv_lite / 筛选 / 滤波参数）
+RUNTIME_PARAMS = (
+    'CANNY_THRESH1', 'CANNY_THRESH2', 'APPROX_EPSILON', 'AREA_MIN_RATIO', 'MAX_ANGLE_COS',
+    'GAUSSIAN_BLUR_SIZE', 'MIN_AREA', 'MIN_ASPECT_RATIO', 'MAX_ASPECT_RATIO',
+    'FILTER_ALPHA', 'FILTER_BETA', 'MIN_FILTER_FRAMES', 'FILTER_EXTRA_LATENCY_MS',
+    'MAX_ERROR_RANGE', 'ENABLE_GOVERNOR', 'GOVERNOR_TARGET_FPS',
+)
+
+PRESETS = ('high_accuracy', 'high_speed', 'balanced')
+
+class CommandChannel:
+    """按行接收命令的非阻塞读取器
+
+    uart: machine.UART 对象
+    max_line: 单行最大长度，超长的行被丢弃
+    max_pending: 两帧之间最多暂存的命令数
+    """
+
+    def __init__(self, uart, max_line=64, max_pending=8):
+        self.uart = uart
+        self.max_line = max_line
+        self.max_pending = max_pending
+        self.line = bytearray(max_line)
+        self.line_len = 0
+        self.overflow = False
+        self.pending = []
+        self.received = 0  # 统计：收到的命令数
+        self.rejected = 0  # 统计：被丢弃的行（超长或暂存已满）
+
+    def poll(self):
+        """读取当前已到达的字节，不等待；返回暂存的命令数"""
+        n = self.uart.any()
+        if not n:
+            return len(self.pending)
+        data = self.uart.read(n)
+        if not data:
+            return len(self.pending)
+        for b in data:
+            if b == 0x0A or b == 0x0D:
+                if self.line_len and not self.overflow:
+                    self._push(bytes(self.line[:self.line_len]))
+                elif self.overflow:
+                    self.rejected += 1
+                self.line_len = 0
+                self.overflow = False
+            elif self.line_len < self.max_line:
+                self.line[self.line_len] = b
+                self.line_len += 1
+            else:
+                self.overflow = True
+        return len(self.pending)
+
+    def _push(self, raw):
+        if len(self.pending) >= self.max_pending:
+            self.rejected += 1
+            return
+        try:
+            parts = raw.decode().split()
+        except Exception:
+            self.rejected += 1
+            return
+        if parts:
+            self.pending.append(parts)
+            self.received += 1
+
+    def take(self):
+        """取出所有暂存的命令（每条为 [命令, 参数...]）"""
+        commands = self.pending
+        if commands:
+            self.pending = []
+        return commands
+
+def parse_value(current, text):
+    """按参数当前值的类型解析字符串"""
+    if isinstance(current, bool):
+        return text.lower() in ('1', 'true', 'on')
+    if isinstance(current, int):
+        return int(text)
+    return float(text)
+
+def apply_command(parts, config, presets=None):
+    """对配置类应用一条命令；返回 (是否修改了配置, 应答文本)"""
+    cmd = parts[0].upper()
+    if cmd == 'PRESET' and len(parts) == 2:
+        name = parts[1].lower()
+        if presets is None or name not in PRESETS:
+            return (False, "ERR preset " + parts[1])
+        getattr(presets, name)()
+        return (True, "OK preset " + name)
+    if cmd == 'SET' and len(parts) == 3:
+        name = parts[1].upper()
+        if name not in RUNTIME_PARAMS or not hasattr(config, name):
+            return (False, "ERR param " + parts[1])
+        try:
+            value = parse_value(getattr(config, name), parts[2])
+        except ValueError:
+            return (False, "ERR value " + parts[2])
+        setattr(config, name, value)
+        return (True, "OK " + name + " " + str(value))
+    if cmd == 'GET' and len(parts) == 2:
+        name = parts[1].upper()
+        if not hasattr(config, name):
+            return (False, "ERR param " + parts[1])
+        return (False, "OK " + name + " " + str(getattr(config, name)))
+    return (False, "ERR command " + parts[0])
@@ -9,7 +9,21 @@ class DetectionConfig:
     DETECT_HEIGHT = 240
     
     # 显示配置
-    DISPLAY_MODE = "LCD"  # "VIRT" 或 "LCD"
+    DISPLAY_MODE = "LCD"  # "VIRT"、"LCD" 或 "NONE"（无显示，部署机使用）
+    DISPLAY_EVERY_N = 1  # 每N帧显示一帧（其余帧跳过叠加绘制和显示）
+    DISPLAY_MAX_FPS = 0  # 显示帧率上限，0表示不限制
+    # 双通道采集：检测用灰度通道（DETECT_WIDTH x DETECT_HEIGHT），显示用独立的 RGB565 通道，
+    # 省去每帧 to_grayscale()；显示通道分辨率为 0 时与检测分辨率相同
+    ENABLE_DUAL_CHANNEL = False
+    DISPLAY_CHANNEL_WIDTH = 0
+    DISPLAY_CHANNEL_HEIGHT = 0
+    # 显示路径："COPY" 叠加绘制到摄像头帧后整帧 show_image；
+    # "BIND" 显示通道直接绑定到视频层（自动启用双通道），叠加信息画在 OSD 层上，只在内容变化时重绘：
+    # 文字画在帧顶部的窄条层上，标记层只覆盖ROI/目标/轨迹所在区域
+    DISPLAY_PATH = "COPY"
+    OSD_FPS_REFRESH_MS = 1000  # BIND 模式下 OSD 帧率文字的刷新间隔
+    OSD_QUANT_PX = 2  # BIND 模式下标记位置的量化步长（检测图像像素），变化不足一步时不重绘
+    OSD_TEXT_HEIGHT = 48  # BIND 模式下文字层的高度（像素）
     
     # 矩形筛选参数
     MIN_AREA = 1500  # 最小矩形面积
@@ -24,27 +38,107 @@ class DetectionConfig:
     MAX_ANGLE_COS = 0.3  # 最大角度余弦值
     GAUSSIAN_BLUR_SIZE = 5  # 高斯模糊核大小
     
+    # 自适应 Canny 阈值（由灰度直方图估计，替代固定的 CANNY_THRESH1/2）
+    CANNY_MODE = "FIXED"  # "FIXED" 固定阈值，"MEDIAN" 中值法，"OTSU" OTSU法
+    CANNY_SIGMA = 0.33  # 中值法阈值带宽: (1-sigma)*中值 ~ (1+sigma)*中值
+    CANNY_LOW_RATIO = 0.5  # OTSU法低阈值 = OTSU阈值 * 该比例
+    CANNY_ADAPT_ALPHA = 0.2  # 跨帧平滑系数
+    CANNY_ADAPT_DRIFT = 5  # 平滑值偏离生效阈值超过该值才更新
+    CANNY_ADAPT_EVERY = 4  # 每N帧计算一次直方图
+    
+    # 候选数达到该值且 ulab/numpy 可用时，使用向量化筛选
+    VECTORIZE_MIN_CANDIDATES = 24
+    
+    # 金字塔检测（先在缩小图上找候选，再在全分辨率的候选窗口内精检）
+    ENABLE_PYRAMID = False  # 启用由粗到精检测
+    PYRAMID_SCALE = 2  # 粗检测缩小倍数（2 或 4）
+    PYRAMID_COARSE_BLUR_SIZE = 3  # 粗检测高斯模糊核大小
+    PYRAMID_REFINE = True  # 在全分辨率下精检（False 时直接使用放大后的粗检测结果）
+    PYRAMID_REFINE_MARGIN = 0.2  # 精检窗口外扩边距（占候选宽高的比例）
+    
+    # 四边形角点（cv_lite 提供 grayscale_find_rectangles_with_corners 时输出真实顶点而不是外接框角点）
+    ENABLE_QUAD_CORNERS = True
+    CORNER_REFINE = True  # 在每个顶点周围的小窗口内做亚像素细化（需要 ulab；多目标模式下不细化）
+    CORNER_REFINE_WINDOW = 9  # 细化窗口边长（奇数）
+    CORNER_REFINE_ITERS = 3  # 最大迭代次数
+    
+    # 运动门控（缩小图帧差低于阈值时跳过 cv_lite 检测，沿用上次结果和跟踪状态）
+    ENABLE_MOTION_GATE = False
+    MOTION_THRESHOLD = 3  # 平均绝对差（灰度级，全帧和目标窗口取较大者）达到该值视为有变化
+    MOTION_MAX_SKIP = 5  # 最多连续跳过的帧数，之后强制检测一次
+    MOTION_SCALE = 8  # 帧差计算的缩小倍数
+    
     # 滤波器参数
-    FILTER_ALPHA = 0.3  # 指数移动平均滤波系数 (0-1)
+    FILTER_TYPE = "EMA_FIXED"  # "EMA_FIXED" 定点指数移动平均，"EMA" 浮点指数移动平均，"ALPHA_BETA" 匀速模型预测滤波
+    FILTER_ALPHA = 0.3  # 指数移动平均滤波系数 / alpha-beta 位置增益 (0-1)
+    FILTER_BETA = 0.05  # alpha-beta 速度增益 (0-1)
+    FILTER_LATENCY_COMPENSATION = True  # alpha-beta: 按测得的采集到发送延迟外推输出
+    FILTER_EXTRA_LATENCY_MS = 0  # alpha-beta: 额外外推时长（曝光、舵机响应等）
     MIN_FILTER_FRAMES = 2  # 开始输出滤波结果的最小帧数
     
     # UART配置
     UART_BAUDRATE = 115200
     UART_TX_PIN = 3
     UART_RX_PIN = 4
+    ENABLE_UART_TX_QUEUE = True  # 非阻塞发送：只保留最新一帧，链路忙时合并旧帧
+    UART_PROTOCOL = "LEGACY"  # "LEGACY" 旧版单轴误差帧，"V2" 带角点/尺寸/ID/序号/时间戳/CRC的目标帧
+    UART_BATCH_TARGETS = True  # V2: 多目标模式下一帧发送所有已确认目标
+    UART_CONFIDENCE_FRAMES = 10  # V2: 连续命中多少帧置信度达到满值 255
+    ENABLE_UART_COMMANDS = False  # 在RX线上接收命令（切换预设、修改参数），见 k230_commands.py
+    COMMAND_REPLY = False  # 以 v2 文本帧回复 "OK ..."/"ERR ..." 应答（旧版协议线路上同样使用文本帧）
     
     # 误差限制
     MAX_ERROR_RANGE = 100  # 最大误差范围 (+/-)
     
     # 性能优化选项
-    ENABLE_GC_PER_FRAME = True  # 每帧启用垃圾回收
     ENABLE_UART_ERROR_PRINT = True  # 启用UART错误打印
+    
+    # 垃圾回收调度（替代每帧 gc.collect()）
+    GC_POLICY = "BUDGET"  # "BUDGET" 按堆水位和帧预算余量回收，"PER_FRAME" 每帧回收，"NONE" 不主动回收
+    GC_HIGH_WATER = 0.75  # 堆占用比例超过该值立即回收
+    GC_LOW_WATER = 0.3  # 堆占用比例低于该值时不利用余量回收
+    GC_FRAME_BUDGET_MS = 33  # 帧时间预算（毫秒），本帧剩余时间足够时才回收
+    GC_MAX_INTERVAL = 60  # 最多间隔多少帧必须回收一次，0表示不限制
+    
+    # 处理流水线（未被下游消费的阶段不会执行）
+    # 矩形检测输入: "GRAY" 灰度图，"BINARY" 二值图（启用阈值/形态学阶段）。
+    # 注意：引入流水线之前的版本实际是在原地 OTSU 二值化后的图像上检测，默认改为 GRAY 后检测结果会不同；
+    # 要恢复旧行为需要同时设置 DETECT_SOURCE = "BINARY" 和 AdvancedConfig.ADAPTIVE_THRESHOLD = False
+    DETECT_SOURCE = "GRAY"
+    ENABLE_FILTER = True  # 启用坐标滤波（仅用于叠加显示）
+    ENABLE_OVERLAY = True  # 在显示图像上绘制检测信息
+    ENABLE_UART_OUTPUT = True  # 通过UART发送误差
+    
+    # 预设自动调节（按实测帧率、命中率和抖动在 high_accuracy / balanced / high_speed 之间切换）
+    ENABLE_GOVERNOR = False  # 启用自动调节（启动时为 True 才创建调节器并先套用 balanced 预设，SET 只能暂停/恢复；收到手动 PRESET/SET 命令后自动停用）
+    GOVERNOR_TARGET_FPS = 25  # 目标帧率
+    GOVERNOR_WINDOW = 30  # 统计窗口（帧）
+    GOVERNOR_HYSTERESIS = 0.15  # 帧率回差带（占目标帧率的比例）
+    GOVERNOR_MIN_HIT_RATE = 0.8  # 命中率低于该值视为检测不稳定
+    GOVERNOR_MAX_JITTER = 2.0  # 中心抖动（像素）高于该值视为检测不稳定
+    GOVERNOR_CONFIRM = 2  # 连续多少个窗口结论一致才切换
+    
+    # 流水线并行（采集、检测、显示分别在不同线程中重叠执行）
+    ENABLE_PIPELINING = False  # 启用多线程流水线
+    PIPELINE_QUEUE_SIZE = 2  # 采集队列容量
+    PIPELINE_DROP_POLICY = "DROP_OLDEST"  # 队列满时: "DROP_OLDEST" / "DROP_NEWEST" / "BLOCK"
+    
+    # 性能遥测
+    ENABLE_TELEMETRY = False  # 启用分阶段耗时统计
+    TELEMETRY_WINDOW = 64  # 滚动统计窗口（帧）
+    TELEMETRY_REPORT_EVERY = 100  # 每N帧输出一次报告，0表示不输出
+    TELEMETRY_OUTPUT = "PRINT"  # "PRINT" 打印到终端，"UART" 以 v2 文本帧在控制帧的间隙发送（经发送队列）
+    
+    # 启动
+    BOOT_REPORT = True  # 首个有效UART帧发出后打印各初始化步骤耗时
+    FAST_BOOT = False  # 快速启动：跳过可选打印，首个有效UART帧发出后才开始绘制和显示（之前不显示画面）
+    FAST_BOOT_DISPLAY_TIMEOUT_MS = 3000  # 快速启动时一直没有检测到目标，超过该时间也开始显示
 
 class AdvancedConfig:
     """高级配置参数"""
     
-    # 自适应阈值参数
-    ADAPTIVE_THRESHOLD = True  # 启用自适应阈值
+    # 二值化参数（仅 DetectionConfig.DETECT_SOURCE = "BINARY" 时生效）
+    ADAPTIVE_THRESHOLD = True  # True: 局部自适应阈值，False: 全局OTSU阈值（旧版主循环的行为）
     THRESHOLD_BLOCK_SIZE = 11  # 自适应阈值块大小
     THRESHOLD_C = 2  # 自适应阈值常数
     
@@ -54,6 +148,9 @@ class AdvancedConfig:
     
     # ROI设置（感兴趣区域）
     ENABLE_ROI = False  # 启用ROI
+    ROI_MODE = "TRACK"  # "TRACK": 在上一次检测结果附近搜索，"STATIC": 固定窗口 ROI_X/Y/WIDTH/HEIGHT
+    ROI_MARGIN = 0.5  # 跟踪窗口外扩边距（占目标宽高的比例）
+    ROI_LOST_FRAMES = 3  # 连续丢失多少帧后回退到全帧搜索
     ROI_X = 50
     ROI_Y = 50
     ROI_WIDTH = 220
@@ -62,6 +159,10 @@ class AdvancedConfig:
     # 多目标跟踪
     ENABLE_MULTI_TARGET = False  # 启用多目标跟踪
     MAX_TARGETS = 3  # 最大跟踪目标数
+    TRACK_MATCH_IOU = 0.3  # 轨迹关联最小IoU
+    TRACK_MAX_AGE = 5  # 轨迹连续丢失多少帧后删除
+    TRACK_MIN_HITS = 2  # 轨迹命中多少帧后确认输出
+    TRACK_MAX_CANDIDATES = 32  # 每帧最多考虑的候选矩形数
 
 def get_detection_params():
     """获取cv_lite检测参数字典"""
@@ -77,8 +178,12 @@ def get_detection_params():
 def get_filter_params():
     """获取滤波器参数字典"""
     return {
+        'type': DetectionConfig.FILTER_TYPE,
         'alpha': DetectionConfig.FILTER_ALPHA,
-        'min_frames': DetectionConfig.MIN_FILTER_FRAMES
+        'beta': DetectionConfig.FILTER_BETA,
+        'min_frames': DetectionConfig.MIN_FILTER_FRAMES,
+        'latency_compensation': DetectionConfig.FILTER_LATENCY_COMPENSATION,
+        'extra_latency_ms': DetectionConfig.FILTER_EXTRA_LATENCY_MS
     }
 
 def get_rectangle_filter_params():
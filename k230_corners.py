@@ -0,0 +1,177 @@
+# K230 四边形角点：排序与亚像素细化
+# cv_lite 给出的是多边形顶点（整数像素）。细化只读取每个顶点周围的小窗口：
+# 窗口内每个像素的梯度 g 与 (q - p) 正交（q 为像素位置，p 为角点），
+# 对窗口求 sum(g g^T) p = sum(g g^T q) 的最小二乘解并迭代几次。
+# 4 个 9x9 窗口（默认 CORNER_REFINE_WINDOW）约 320 个像素，远小于提高分辨率带来的整帧开销。
+# cv_lite 的多边形顶点偶尔偏离真实角点数个像素（落在边上），该顶点细化失败、或四个细化结果
+# 偏离平行四边形超过 max_residual 时，用其余三个顶点按平行四边形补出初值重新细化
+# 失败的（或角点响应最弱的）顶点，避免单帧离群点造成中心抖动。
+#
+# 坐标约定与 cv_lite 矩形一致：像素 i 覆盖 [i, i+1)，即像素中心坐标 + 0.5
+
+import math
+
+try:
+    from ulab import numpy as np
+except ImportError:
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+NP_FLOAT = getattr(np, 'float32', None) or getattr(np, 'float', None)
+
+def order_corners(quad, out):
+    """把 8 个坐标（4 个顶点）按 左上、右上、右下、左下 写入 out（长度 8 的 array）"""
+    tl = tr = br = bl = 0
+    for k in range(1, 4):
+        x = quad[2 * k]
+        y = quad[2 * k + 1]
+        if x + y < quad[2 * tl] + quad[2 * tl + 1]:
+            tl = k
+        if x + y > quad[2 * br] + quad[2 * br + 1]:
+            br = k
+        if y - x < quad[2 * tr + 1] - quad[2 * tr]:
+            tr = k
+        if y - x > quad[2 * bl + 1] - quad[2 * bl]:
+            bl = k
+    # 严重倾斜（接近 45 度）时两种判据可能选中同一顶点，此时按原顺序输出
+    if tl == tr or tl == br or tl == bl or tr == br or tr == bl or br == bl:
+        for k in range(8):
+            out[k] = quad[k]
+        return out
+    out[0] = quad[2 * tl]
+    out[1] = quad[2 * tl + 1]
+    out[2] = quad[2 * tr]
+    out[3] = quad[2 * tr + 1]
+    out[4] = quad[2 * br]
+    out[5] = quad[2 * br + 1]
+    out[6] = quad[2 * bl]
+    out[7] = quad[2 * bl + 1]
+    return out
+
+def parallelogram_residual(coords):
+    """四个顶点（左上/右上/右下/左下）偏离平行四边形的距离：对角线中点之差的两倍"""
+    rx = coords[0] - coords[2] + coords[4] - coords[6]
+    ry = coords[1] - coords[3] + coords[5] - coords[7]
+    return math.sqrt(rx * rx + ry * ry)
+
+class CornerRefiner:
+    """梯度正交法的角点亚像素细化（需要 ulab/numpy）
+
+    half: 窗口半径（窗口边长 2*half+1）
+    iters: 最大迭代次数
+    eps: 位移小于该值（像素）时停止迭代
+    max_residual: 四个顶点偏离平行四边形的容许值（像素），超出时重新细化最弱的顶点
+    """
+
+    def __init__(self, half=3, iters=3, eps=0.05, max_residual=1.0):
+        self.half = half
+        self.iters = iters
+        self.eps = eps
+        self.max_residual = max_residual
+        self.score = [0.0] * 4  # 各顶点最后一次细化的角点响应 det/trace^2（0 为直边，0.25 为理想角点）
+        n = 2 * half + 1
+        # 窗口内相对坐标和高斯权重只计算一次
+        sigma2 = 2.0 * (half * 0.5 + 0.5) ** 2
+        qx = [[float(j - half) for j in range(n)] for _ in range(n)]
+        qy = [[float(i - half) for _ in range(n)] for i in range(n)]
+        wt = [[math.exp(-((i - half) ** 2 + (j - half) ** 2) / sigma2) for j in range(n)]
+              for i in range(n)]
+        self.qx = np.array(qx)
+        self.qy = np.array(qy)
+        self.weight = np.array(wt)
+        self.refined = 0  # 统计：细化成功的顶点数
+        self.rejected = 0  # 统计：梯度不足或位移过大而保留原值的顶点数
+        self.recovered = 0  # 统计：按平行四边形补出初值后重新细化成功的顶点数
+
+    def refine(self, pix, coords):
+        """原地细化 coords（8 个坐标，左上/右上/右下/左下）；pix 为灰度图二维数组"""
+        failed = -1
+        for k in range(4):
+            if not self._refine_one(pix, coords, 2 * k):
+                failed = k if failed < 0 else 4
+        if failed < 0:
+            residual = parallelogram_residual(coords)
+            if residual > self.max_residual:
+                # 四个都成功但互相矛盾：角点响应最弱的顶点最可能收敛到了边上
+                weakest = 0
+                for k in range(1, 4):
+                    if self.score[k] < self.score[weakest]:
+                        weakest = k
+                self._recover(pix, coords, weakest, residual)
+        elif failed < 4:
+            self._recover(pix, coords, failed, None)
+        return coords
+
+    def _recover(self, pix, coords, k, residual):
+        """用相邻两个顶点减去对角顶点作为初值重新细化第 k 个顶点
+
+        重新细化失败、或（给定 residual 时）没有让四边形更接近平行四边形时保留原值
+        """
+        a = 2 * ((k + 1) & 3)
+        b = 2 * ((k + 3) & 3)
+        o = 2 * ((k + 2) & 3)
+        k = 2 * k
+        x = coords[k]
+        y = coords[k + 1]
+        coords[k] = coords[a] + coords[b] - coords[o]
+        coords[k + 1] = coords[a + 1] + coords[b + 1] - coords[o + 1]
+        if self._refine_one(pix, coords, k) and (residual is None
+                                                 or parallelogram_residual(coords) < 0.5 * residual):
+            self.recovered += 1
+        else:
+            coords[k] = x
+            coords[k + 1] = y
+
+    def _refine_one(self, pix, coords, k):
+        """细化单个顶点（coords[k], coords[k + 1]），返回是否成功"""
+        half = self.half
+        height = pix.shape[0]
+        width = pix.shape[1]
+        # 转为像素中心坐标
+        x0 = coords[k] - 0.5
+        y0 = coords[k + 1] - 0.5
+        px = x0
+        py = y0
+        for _ in range(self.iters):
+            cx = int(px + 0.5)
+            cy = int(py + 0.5)
+            # 梯度用中心差分，需要窗口外再多一圈像素
+            if cx - half - 1 < 0 or cy - half - 1 < 0 or cx + half + 2 > width or cy + half + 2 > height:
+                self.rejected += 1
+                return False
+            win = np.array(pix[cy - half - 1:cy + half + 2, cx - half - 1:cx + half + 2], dtype=NP_FLOAT)
+            gx = win[1:-1, 2:] - win[1:-1, :-2]
+            gy = win[2:, 1:-1] - win[:-2, 1:-1]
+            wt = self.weight
+            gxx = gx * gx * wt
+            gxy = gx * gy * wt
+            gyy = gy * gy * wt
+            a = np.sum(gxx)
+            b = np.sum(gxy)
+            c = np.sum(gyy)
+            det = a * c - b * b
+            # 窗口内只有一条直边或没有边时矩阵奇异，角点位置不可观测
+            if a + c <= 0 or det <= 0.02 * (a + c) * (a + c):
+                self.rejected += 1
+                return False
+            qx = self.qx
+            qy = self.qy
+            bx = np.sum(gxx * qx + gxy * qy)
+            by = np.sum(gxy * qx + gyy * qy)
+            self.score[k >> 1] = det / ((a + c) * (a + c))
+            nx = cx + (c * bx - b * by) / det
+            ny = cy + (a * by - b * bx) / det
+            moved = abs(nx - px) + abs(ny - py)
+            px = nx
+            py = ny
+            if moved < self.eps:
+                break
+        # 细化结果应留在初始窗口内，否则视为被附近的其他边缘吸走
+        if abs(px - x0) > half or abs(py - y0) > half:
+            self.rejected += 1
+            return False
+        coords[k] = px + 0.5
+        coords[k + 1] = py + 0.5
+        self.refined += 1
+        return True
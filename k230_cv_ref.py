@@ -0,0 +1,302 @@
+# cv_lite 矩形检测的 NumPy 参考实现
+# 与 cv_lite.grayscale_find_rectangles 签名和输出格式相同（扁平 [x, y, w, h, ...]），
+# 用作主机端替身和缺少 cv_lite 时的后备。
+#
+# 处理步骤（全部按整幅数组向量化）:
+#   高斯模糊（可分离核）-> Sobel 梯度（L1 幅值）-> 4 方向非极大值抑制
+#   -> 弱边缘 8 连通标记，保留含强边缘的连通域（滞后阈值）
+#   -> 每个连通域作为一条轮廓：凸包 + Douglas-Peucker 多边形拟合
+#   -> 四边形、面积、最大角余弦和轮廓贴合度检查
+# 轮廓跟踪用连通域标记（并行挂接 + 指针跳跃）代替逐像素跟踪，
+# 对凸的矩形轮廓与外轮廓拟合结果一致
+
+import numpy as np
+
+TAN_22_5 = 0.41421356
+TAN_67_5 = 2.41421356
+NEIGHBORS = ((0, 1), (1, 0), (1, 1), (1, -1))  # 8 连通的一半方向（另一半由对称性覆盖）
+MIN_COVERAGE = 0.85  # 凸包边界上有边缘像素的比例下限（排除凹形轮廓）
+
+def gaussian_kernel(size):
+    """与 OpenCV getGaussianKernel(size, 0) 相同的一维核"""
+    sigma = 0.3 * ((size - 1) * 0.5 - 1) + 0.8
+    x = np.arange(size, dtype=np.float32) - (size - 1) / 2.0
+    k = np.exp(-(x * x) / (2 * sigma * sigma))
+    return k / k.sum()
+
+def gaussian_blur(gray, size):
+    """可分离高斯模糊（边界镜像），返回 uint8"""
+    if size < 3:
+        return gray
+    size |= 1
+    r = size // 2
+    k = gaussian_kernel(size)
+    h, w = gray.shape
+    p = np.pad(gray.astype(np.float32), r, mode="reflect")
+    tmp = k[0] * p[:, 0:w]
+    for i in range(1, size):
+        tmp += k[i] * p[:, i:i + w]
+    out = k[0] * tmp[0:h]
+    for i in range(1, size):
+        out += k[i] * tmp[i:i + h]
+    return np.rint(out).astype(np.uint8)
+
+def sobel(img):
+    """3x3 Sobel 梯度，返回 (gx, gy) int32"""
+    h, w = img.shape
+    p = np.pad(img.astype(np.int32), 1, mode="reflect")
+    # 先做平滑方向 [1, 2, 1]，再做差分方向 [-1, 0, 1]
+    sy = p[0:h, :] + 2 * p[1:h + 1, :] + p[2:h + 2, :]
+    sx = p[:, 0:w] + 2 * p[:, 1:w + 1] + p[:, 2:w + 2]
+    gx = sy[:, 2:w + 2] - sy[:, 0:w]
+    gy = sx[2:h + 2, :] - sx[0:h, :]
+    return gx, gy
+
+def non_max_suppression(gx, gy, mag):
+    """沿梯度方向（量化为 4 个方向）保留局部极大值"""
+    h, w = mag.shape
+    p = np.pad(mag, 1)
+    c = p[1:h + 1, 1:w + 1]
+    ax = np.abs(gx)
+    ay = np.abs(gy)
+    horiz = ay <= ax * TAN_22_5
+    vert = ay > ax * TAN_67_5
+    diag = ~(horiz | vert)
+    same_sign = (gx ^ gy) >= 0
+    keep = np.zeros(mag.shape, dtype=bool)
+    keep |= horiz & (c > p[1:h + 1, 0:w]) & (c >= p[1:h + 1, 2:w + 2])
+    keep |= vert & (c > p[0:h, 1:w + 1]) & (c >= p[2:h + 2, 1:w + 1])
+    d1 = diag & same_sign
+    keep |= d1 & (c > p[0:h, 0:w]) & (c >= p[2:h + 2, 2:w + 2])
+    d2 = diag & ~same_sign
+    keep |= d2 & (c > p[0:h, 2:w + 2]) & (c >= p[2:h + 2, 0:w])
+    return keep
+
+def label_pixels(mask):
+    """8 连通标记：返回 (像素平铺下标, 每个像素的连通域标签)，标签为域内最小像素序号"""
+    h, w = mask.shape
+    idx = np.flatnonzero(mask)
+    n = idx.size
+    labels = np.arange(n)
+    if n == 0:
+        return idx, labels
+    pos = np.full(h * w, -1, dtype=np.int64)
+    pos[idx] = labels
+    ys = idx // w
+    xs = idx - ys * w
+    a_list = []
+    b_list = []
+    for dy, dx in NEIGHBORS:
+        ok = (ys + dy < h) & (xs + dx >= 0) & (xs + dx < w)
+        nb = pos[idx[ok] + dy * w + dx]
+        linked = nb >= 0
+        a_list.append(labels[ok][linked])
+        b_list.append(nb[linked])
+    a = np.concatenate(a_list)
+    b = np.concatenate(b_list)
+    # 并行挂接到较小的根，再指针跳跃压缩，直到所有相邻像素标签一致
+    while a.size:
+        la = labels[a]
+        lb = labels[b]
+        diff = la != lb
+        if not diff.any():
+            break
+        la = la[diff]
+        lb = lb[diff]
+        lo = np.minimum(la, lb)
+        np.minimum.at(labels, np.maximum(la, lb), lo)
+        while True:
+            nxt = labels[labels]
+            if np.array_equal(nxt, labels):
+                break
+            labels = nxt
+    return idx, labels
+
+def canny(gray, low, high):
+    """Canny 边缘：返回边缘像素平铺下标及其连通域标签"""
+    if low > high:
+        low, high = high, low
+    gx, gy = sobel(gray)
+    mag = np.abs(gx) + np.abs(gy)
+    weak = non_max_suppression(gx, gy, mag) & (mag > low)
+    idx, labels = label_pixels(weak)
+    strong = mag.ravel()[idx] > high
+    keep = np.isin(labels, np.unique(labels[strong]))
+    return idx[keep], labels[keep]
+
+def convex_hull(xs, ys):
+    """单调链凸包（逆时针），先把每列压缩为最上/最下两点"""
+    order = np.lexsort((ys, xs))
+    xs = xs[order]
+    ys = ys[order]
+    first = np.ones(xs.size, dtype=bool)
+    first[1:] = xs[1:] != xs[:-1]
+    last = np.ones(xs.size, dtype=bool)
+    last[:-1] = xs[1:] != xs[:-1]
+    sel = first | last
+    pts = list(zip(xs[sel].tolist(), ys[sel].tolist()))
+    if len(pts) < 3:
+        return pts
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower = []
+    for p in pts:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(pts):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return lower[:-1] + upper[:-1]
+
+def _dp(points, first, last, eps, keep):
+    ax, ay = points[first]
+    bx, by = points[last]
+    dx = bx - ax
+    dy = by - ay
+    norm = (dx * dx + dy * dy) ** 0.5 or 1.0
+    best = -1.0
+    best_i = -1
+    for i in range(first + 1, last):
+        d = abs((points[i][0] - ax) * dy - (points[i][1] - ay) * dx) / norm
+        if d > best:
+            best = d
+            best_i = i
+    if best > eps:
+        _dp(points, first, best_i, eps, keep)
+        keep.append(best_i)
+        _dp(points, best_i, last, eps, keep)
+
+def approx_poly(points, epsilon_ratio):
+    """闭合曲线的 Douglas-Peucker 拟合，eps = epsilon_ratio * 周长"""
+    n = len(points)
+    perimeter = 0.0
+    for i in range(n):
+        x0, y0 = points[i - 1]
+        x1, y1 = points[i]
+        perimeter += ((x1 - x0) ** 2 + (y1 - y0) ** 2) ** 0.5
+    eps = epsilon_ratio * perimeter
+    # 以离起点最远的点把闭合曲线分成两段
+    x0, y0 = points[0]
+    far = max(range(n), key=lambda i: (points[i][0] - x0) ** 2 + (points[i][1] - y0) ** 2)
+    closed = points + [points[0]]
+    keep = [0]
+    _dp(closed, 0, far, eps, keep)
+    keep.append(far)
+    _dp(closed, far, n, eps, keep)
+    return [points[i] for i in keep]
+
+def max_cosine(quad):
+    """四边形各顶点处两邻边夹角余弦绝对值的最大值"""
+    worst = 0.0
+    for i in range(4):
+        x0, y0 = quad[i]
+        x1, y1 = quad[i - 1]
+        x2, y2 = quad[(i + 1) % 4]
+        dx1, dy1 = x1 - x0, y1 - y0
+        dx2, dy2 = x2 - x0, y2 - y0
+        denom = ((dx1 * dx1 + dy1 * dy1) * (dx2 * dx2 + dy2 * dy2)) ** 0.5 + 1e-10
+        worst = max(worst, abs((dx1 * dx2 + dy1 * dy2) / denom))
+    return worst
+
+def polygon_area(poly):
+    area = 0.0
+    for i in range(len(poly)):
+        x0, y0 = poly[i - 1]
+        x1, y1 = poly[i]
+        area += x0 * y1 - x1 * y0
+    return abs(area) / 2.0
+
+def hull_coverage(hull, edge_near, w, h):
+    """沿凸包边界每像素采样，统计邻近有边缘像素的比例"""
+    xs = []
+    ys = []
+    for i in range(len(hull)):
+        x0, y0 = hull[i - 1]
+        x1, y1 = hull[i]
+        steps = max(abs(x1 - x0), abs(y1 - y0), 1)
+        t = np.arange(steps) / steps
+        xs.append(np.rint(x0 + (x1 - x0) * t).astype(np.int64))
+        ys.append(np.rint(y0 + (y1 - y0) * t).astype(np.int64))
+    xs = np.clip(np.concatenate(xs), 0, w - 1)
+    ys = np.clip(np.concatenate(ys), 0, h - 1)
+    return edge_near[ys, xs].mean()
+
+def find_quads(gray, canny_thresh1, canny_thresh2, approx_epsilon, area_min_ratio, max_angle_cos,
+               blur_size):
+    """返回满足条件的四边形顶点列表 [[(x, y) * 4], ...]"""
+    gray = np.asarray(gray, dtype=np.uint8)
+    h, w = gray.shape
+    idx, labels = canny(gaussian_blur(gray, blur_size), canny_thresh1, canny_thresh2)
+    if idx.size == 0:
+        return []
+    edge = np.zeros(h * w, dtype=bool)
+    edge[idx] = True
+    edge = edge.reshape(h, w)
+    near = edge.copy()
+    near[1:, :] |= edge[:-1, :]
+    near[:-1, :] |= edge[1:, :]
+    near[:, 1:] |= near[:, :-1].copy()
+    near[:, :-1] |= near[:, 1:].copy()
+
+    # 按连通域分组，先用包围盒面积筛掉小轮廓
+    order = np.argsort(labels, kind="stable")
+    labels = labels[order]
+    ys = idx[order] // w
+    xs = idx[order] - ys * w
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], labels.size]
+    bw = np.maximum.reduceat(xs, starts) - np.minimum.reduceat(xs, starts) + 1
+    bh = np.maximum.reduceat(ys, starts) - np.minimum.reduceat(ys, starts) + 1
+    min_area = area_min_ratio * w * h
+    quads = []
+    for k in np.flatnonzero(bw * bh >= min_area):
+        s, e = starts[k], ends[k]
+        hull = convex_hull(xs[s:e], ys[s:e])
+        if len(hull) < 4 or polygon_area(hull) < min_area:
+            continue
+        quad = approx_poly(hull, approx_epsilon)
+        if len(quad) != 4 or polygon_area(quad) < min_area:
+            continue
+        if max_cosine(quad) >= max_angle_cos:
+            continue
+        if hull_coverage(hull, near, w, h) < MIN_COVERAGE:
+            continue
+        quads.append(quad)
+    return quads
+
+def bounding_rect(quad):
+    xs = [p[0] for p in quad]
+    ys = [p[1] for p in quad]
+    x = min(xs)
+    y = min(ys)
+    return (x, y, max(xs) - x + 1, max(ys) - y + 1)
+
+def grayscale_find_rectangles(image_shape, img, canny_thresh1, canny_thresh2, approx_epsilon,
+                              area_min_ratio, max_angle_cos, gaussian_blur_size):
+    """与 cv_lite 相同：返回扁平列表 [x, y, w, h, ...]"""
+    gray = np.asarray(img, dtype=np.uint8).reshape(image_shape[0], image_shape[1])
+    rects = []
+    for quad in find_quads(gray, canny_thresh1, canny_thresh2, approx_epsilon, area_min_ratio,
+                           max_angle_cos, gaussian_blur_size):
+        rects.extend(bounding_rect(quad))
+    return rects
+
+def grayscale_find_rectangles_with_corners(image_shape, img, canny_thresh1, canny_thresh2,
+                                           approx_epsilon, area_min_ratio, max_angle_cos,
+                                           gaussian_blur_size):
+    """返回扁平列表 [x, y, w, h, x0, y0, x1, y1, x2, y2, x3, y3, ...]（顶点顺时针，从左上开始）"""
+    gray = np.asarray(img, dtype=np.uint8).reshape(image_shape[0], image_shape[1])
+    rects = []
+    for quad in find_quads(gray, canny_thresh1, canny_thresh2, approx_epsilon, area_min_ratio,
+                           max_angle_cos, gaussian_blur_size):
+        rects.extend(bounding_rect(quad))
+        # 凸包为逆时针（y 轴向下时在画面上为顺时针），从 x+y 最小的顶点开始
+        start = min(range(4), key=lambda i: quad[i][0] + quad[i][1])
+        for i in range(4):
+            rects.extend(quad[(start + i) % 4])
+    return rects
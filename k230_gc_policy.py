@@ -0,0 +1,99 @@
+# K230 垃圾回收调度
+# 每帧跟踪 gc.mem_alloc()/gc.mem_free()，只在堆占用越过高水位，
+# 或本帧在帧预算内还有足够余量时才执行 gc.collect()，并把每次回收的停顿记录到遥测
+
+import gc, time
+from k230_telemetry import STAGE_GC
+
+POLICY_BUDGET = "BUDGET"  # 按水位和帧预算余量回收
+POLICY_PER_FRAME = "PER_FRAME"  # 每帧回收
+POLICY_NONE = "NONE"  # 不主动回收（仅依赖运行时自动回收）
+
+class GCScheduler:
+    """预算驱动的垃圾回收调度器
+
+    policy: POLICY_BUDGET / POLICY_PER_FRAME / POLICY_NONE
+    high_water: 堆占用比例超过该值时立即回收
+    low_water: 堆占用比例低于该值时不利用余量回收（回收收益太小）
+    frame_budget_ms: 帧时间预算（目标帧率对应的毫秒数）
+    max_interval: 最多间隔多少帧必须回收一次，0表示不限制
+    """
+
+    def __init__(self, policy=POLICY_BUDGET, high_water=0.75, low_water=0.3, frame_budget_ms=33,
+                 max_interval=60):
+        self.policy = policy
+        self.high_water = high_water
+        self.low_water = low_water
+        self.frame_budget_us = frame_budget_ms * 1000
+        self.max_interval = max_interval
+        self.frame_t0 = time.ticks_us()
+        self.frames_since = 0
+        self.pause_us = 2000  # 回收停顿估计（指数平滑），首次回收前使用保守值
+        self.last_alloc = gc.mem_alloc()
+        self.alloc_per_frame = 0  # 每帧新分配字节估计（指数平滑）
+        self.peak_alloc = self.last_alloc
+        self.collections = 0
+        self.forced = 0  # 因高水位或间隔上限触发的回收次数
+
+    def frame_start(self):
+        """记录帧开始时间"""
+        self.frame_t0 = time.ticks_us()
+
+    def end_of_frame(self, tm):
+        """帧尾调用：决定是否回收；返回是否执行了回收"""
+        if self.policy == POLICY_NONE:
+            return False
+        if self.policy == POLICY_PER_FRAME:
+            self.collect(tm)
+            return True
+
+        alloc = gc.mem_alloc()
+        free = gc.mem_free()
+        delta = alloc - self.last_alloc
+        if delta > 0:
+            self.alloc_per_frame = (3 * self.alloc_per_frame + delta) // 4
+        self.last_alloc = alloc
+        if alloc > self.peak_alloc:
+            self.peak_alloc = alloc
+        self.frames_since += 1
+
+        total = alloc + free
+        usage = alloc / total if total else 0.0
+        # 预计下一帧分配后会越过高水位，也提前回收
+        projected = (alloc + self.alloc_per_frame) / total if total else 0.0
+        if usage >= self.high_water or projected >= self.high_water \
+                or (self.max_interval and self.frames_since >= self.max_interval):
+            self.forced += 1
+            self.collect(tm)
+            return True
+
+        elapsed = time.ticks_diff(time.ticks_us(), self.frame_t0)
+        slack = self.frame_budget_us - elapsed
+        if usage >= self.low_water and slack >= self.pause_us:
+            self.collect(tm)
+            return True
+        return False
+
+    def collect(self, tm):
+        """执行一次回收并记录停顿"""
+        tm.skip()
+        t0 = time.ticks_us()
+        gc.collect()
+        pause = time.ticks_diff(time.ticks_us(), t0)
+        tm.mark(STAGE_GC)
+        self.pause_us = (3 * self.pause_us + pause) // 4
+        self.collections += 1
+        self.frames_since = 0
+        self.last_alloc = gc.mem_alloc()
+
+    def stats(self):
+        """回收统计"""
+        return {
+            'policy': self.policy,
+            'collections': self.collections,
+            'forced': self.forced,
+            'pause_us_avg': self.pause_us,
+            'alloc_per_frame': self.alloc_per_frame,
+            'peak_alloc': self.peak_alloc,
+            'mem_free': gc.mem_free(),
+        }
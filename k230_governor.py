@@ -0,0 +1,157 @@
+# K230 预设自动调节
+# 按统计窗口观察帧时间、检测命中率和中心抖动，在 高精度 / 平衡 / 高速度 预设之间切换：
+# 帧率低于目标时切向更快的预设；帧率有富余（或检测不稳定）且上一级预设已知不会掉帧时切向更精确的预设。
+# 帧率判断带回差带，且需要连续多个窗口给出相同结论才切换，避免来回振荡
+
+import time
+from array import array
+
+LEVELS = ("high_accuracy", "balanced", "high_speed")  # 由精到快
+
+class PresetGovernor:
+    """帧率/检测质量闭环的预设调节器
+
+    target_fps: 目标帧率
+    window: 统计窗口（帧）
+    hysteresis: 帧率回差带，占目标帧率的比例
+    min_hit_rate: 命中率低于该值视为检测不稳定
+    max_jitter: 中心抖动（二阶差分均值，像素）高于该值视为检测不稳定
+    confirm: 连续多少个窗口结论一致才切换
+    memory: 各级预设实测帧率的有效期（窗口数），过期后允许重新尝试
+    level: 初始级别（LEVELS 下标）
+    """
+
+    def __init__(self, target_fps, window=30, hysteresis=0.15, min_hit_rate=0.8, max_jitter=2.0,
+                 confirm=2, memory=20, level=1):
+        self.target_fps = target_fps
+        self.window = window
+        self.hysteresis = hysteresis
+        self.min_hit_rate = min_hit_rate
+        self.max_jitter = max_jitter
+        self.confirm = confirm
+        self.memory = memory
+        self.level = level
+        self.level_fps = array('f', [0.0] * len(LEVELS))  # 各级最近一次实测帧率，0 表示未知
+        self.level_eval = array('L', [0] * len(LEVELS))  # 实测时的窗口序号
+        self.evaluations = 0
+        self.switches = 0
+        self.want = 0
+        self.streak = 0
+        self.last_us = None
+        self.last_fps = 0.0
+        self.last_hit_rate = 0.0
+        self.last_jitter = 0.0
+        self.hit = False
+        self._clear()
+
+    def _clear(self):
+        self.frames = 0
+        self.frame_us = 0
+        self.hits = 0
+        self.jitter_sum = 0.0
+        self.jitter_n = 0
+        self.prev_n = 0  # 连续命中的历史中心数（0-2）
+        self.px1 = self.py1 = 0.0
+        self.px2 = self.py2 = 0.0
+
+    def observe(self, center):
+        """记录本帧检测结果：center 为目标中心 (x, y)，None 表示未检测到"""
+        if center is None:
+            self.hit = False
+            self.prev_n = 0
+            return
+        self.hit = True
+        x = center[0]
+        y = center[1]
+        if self.prev_n >= 2:
+            # 二阶差分：匀速运动时为 0，只反映抖动
+            self.jitter_sum += abs(x - 2 * self.px1 + self.px2) + abs(y - 2 * self.py1 + self.py2)
+            self.jitter_n += 1
+        self.px2, self.py2 = self.px1, self.py1
+        self.px1, self.py1 = x, y
+        if self.prev_n < 2:
+            self.prev_n += 1
+
+    def frame_end(self):
+        """帧尾调用；需要切换预设时返回预设名，否则返回 None"""
+        now = time.ticks_us()
+        hit = self.hit
+        self.hit = False
+        if self.last_us is None:
+            self.last_us = now
+            return None
+        self.frame_us += time.ticks_diff(now, self.last_us)
+        self.last_us = now
+        self.frames += 1
+        if hit:
+            self.hits += 1
+        if self.frames < self.window:
+            return None
+        return self._evaluate()
+
+    def _known_ok(self, level):
+        """该级预设的实测帧率是否未知、过期或不低于回差带下沿"""
+        fps = self.level_fps[level]
+        if fps <= 0 or self.evaluations - self.level_eval[level] > self.memory:
+            return True
+        return fps >= self.target_fps * (1 - self.hysteresis)
+
+    def _evaluate(self):
+        self.evaluations += 1
+        fps = self.frames * 1000000 / self.frame_us if self.frame_us else 0.0
+        hit_rate = self.hits / self.frames
+        jitter = self.jitter_sum / self.jitter_n if self.jitter_n else 0.0
+        self.last_fps = fps
+        self.last_hit_rate = hit_rate
+        self.last_jitter = jitter
+        self.level_fps[self.level] = fps
+        self.level_eval[self.level] = self.evaluations
+        self._clear()
+
+        low = self.target_fps * (1 - self.hysteresis)
+        high = self.target_fps * (1 + self.hysteresis)
+        unstable = hit_rate < self.min_hit_rate or jitter > self.max_jitter
+        want = 0
+        if fps < low:
+            if self.level < len(LEVELS) - 1:
+                want = 1
+        elif (fps > high or unstable) and self.level > 0 and self._known_ok(self.level - 1):
+            want = -1
+
+        if want == 0 or want != self.want:
+            self.want = want
+            self.streak = 1 if want else 0
+            if want == 0 or self.confirm > 1:
+                return None
+        else:
+            self.streak += 1
+            if self.streak < self.confirm:
+                return None
+        self.level += want
+        self.want = 0
+        self.streak = 0
+        self.switches += 1
+        return LEVELS[self.level]
+
+    def suspend(self):
+        """停用期间每帧调用：丢弃统计，重新启用时从新窗口开始"""
+        if self.last_us is not None:
+            self.last_us = None
+            self.want = 0
+            self.streak = 0
+            self._clear()
+
+    def set_preset(self, name):
+        """预设被手动切换时同步当前级别"""
+        if name in LEVELS:
+            self.level = LEVELS.index(name)
+
+    def stats(self):
+        """最近一个窗口的统计和当前预设"""
+        return {
+            'preset': LEVELS[self.level],
+            'fps': self.last_fps,
+            'hit_rate': self.last_hit_rate,
+            'jitter': self.last_jitter,
+            'switches': self.switches,
+        }
@@ -0,0 +1,175 @@
+# cv_lite 模块主机端替身
+# grayscale_find_rectangles：回放录制的检测结果，或用 NumPy 参考实现（k230_cv_ref）检测；
+# 没有 numpy 时用游程连通域做近似检测
+
+import os, re, sys
+import host_backend
+
+try:
+    sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import k230_cv_ref as _ref
+except ImportError:
+    _ref = None
+
+_RUN = re.compile(rb"\x01+")
+
+def _gray_bytes(img):
+    """取灰度数据（numpy数组或 image.NdRef）"""
+    data = getattr(img, "data", None)
+    if isinstance(data, (bytes, bytearray)):
+        return data
+    return img.tobytes()
+
+def _otsu(gray):
+    bins = [0] * 256
+    for value in set(gray):
+        bins[value] = gray.count(value)
+    total = len(gray)
+    sum_all = 0
+    for i in range(256):
+        sum_all += i * bins[i]
+    sum_b = w_b = 0
+    best = 0
+    best_var = -1.0
+    for i in range(256):
+        w_b += bins[i]
+        if w_b == 0:
+            continue
+        w_f = total - w_b
+        if w_f == 0:
+            break
+        sum_b += i * bins[i]
+        diff = sum_b / w_b - (sum_all - sum_b) / w_f
+        var = w_b * w_f * diff * diff
+        if var > best_var:
+            best_var = var
+            best = i
+    return best
+
+def _find(parent, a):
+    while parent[a] != a:
+        parent[a] = parent[parent[a]]
+        a = parent[a]
+    return a
+
+def approx_find_rectangles(gray, width, height, area_min_ratio):
+    """暗色连通域中，逐行覆盖左右边界（实心或空心轴对齐矩形）的视为矩形"""
+    lut = bytearray(256)
+    thresh = _otsu(gray)
+    for v in range(thresh + 1):
+        lut[v] = 1
+    mask = gray.translate(lut)
+
+    parent = []
+    runs = []  # (y, start, end, label)
+    prev = []
+    for y in range(height):
+        row = mask[y * width:(y + 1) * width]
+        cur = []
+        j = 0
+        for m in _RUN.finditer(row):
+            s, e = m.start(), m.end()
+            label = len(parent)
+            parent.append(label)
+            while j < len(prev) and prev[j][1] <= s:
+                j += 1
+            k = j
+            while k < len(prev) and prev[k][0] < e:
+                ra = _find(parent, label)
+                rb = _find(parent, prev[k][2])
+                if ra != rb:
+                    parent[ra] = rb
+                k += 1
+            cur.append((s, e, label))
+            runs.append((y, s, e, label))
+        prev = cur
+
+    comps = {}
+    for y, s, e, label in runs:
+        root = _find(parent, label)
+        c = comps.get(root)
+        if c is None:
+            comps[root] = c = [s, e, y, y, {}]
+        if s < c[0]:
+            c[0] = s
+        if e > c[1]:
+            c[1] = e
+        if y > c[3]:
+            c[3] = y
+        ext = c[4].get(y)
+        c[4][y] = (s, e) if ext is None else (min(ext[0], s), max(ext[1], e))
+
+    min_area = area_min_ratio * width * height
+    rects = []
+    for x0, x1, y0, y1, rows in comps.values():
+        w = x1 - x0
+        h = y1 - y0 + 1
+        if w < 4 or h < 4 or w * h < min_area:
+            continue
+        if x0 == 0 or y0 == 0 or x1 == width or y1 == height - 1:
+            continue
+        tol = max(2, w // 20)
+        spanning = 0
+        for s, e in rows.values():
+            if s <= x0 + tol and e >= x1 - tol:
+                spanning += 1
+        if spanning >= 0.9 * h:
+            rects.extend((x0, y0, w, h))
+    return rects
+
+def _recorded(width, height):
+    """当前帧的录制结果（尺寸一致时）；没有时返回 None"""
+    frame = host_backend.current_frame
+    if host_backend.CV_LITE_MODE in ("approx", "numpy") or frame is None or frame[6] is None \
+            or (frame[1], frame[2]) != (width, height):
+        return None
+    return frame[6]
+
+def _use_ref():
+    mode = host_backend.CV_LITE_MODE
+    if mode == "numpy" and _ref is None:
+        raise ImportError("CV_LITE_MODE = 'numpy' 需要 numpy")
+    return _ref is not None and mode in ("auto", "numpy")
+
+def grayscale_find_rectangles(image_shape, img, canny_thresh1, canny_thresh2, approx_epsilon,
+                              area_min_ratio, max_angle_cos, gaussian_blur_size):
+    """返回扁平列表 [x, y, w, h, ...]"""
+    height, width = image_shape[0], image_shape[1]
+    recorded = _recorded(width, height)
+    if recorded is not None:
+        rects = []
+        for r in recorded:
+            rects.extend(r[:4])
+        return rects
+    if host_backend.CV_LITE_MODE == "recorded":
+        return []
+    if _use_ref():
+        return _ref.grayscale_find_rectangles(image_shape, img, canny_thresh1, canny_thresh2,
+                                              approx_epsilon, area_min_ratio, max_angle_cos,
+                                              gaussian_blur_size)
+    return approx_find_rectangles(_gray_bytes(img), width, height, area_min_ratio)
+
+def grayscale_find_rectangles_with_corners(image_shape, img, canny_thresh1, canny_thresh2,
+                                           approx_epsilon, area_min_ratio, max_angle_cos,
+                                           gaussian_blur_size):
+    """返回扁平列表 [x, y, w, h, x0, y0, x1, y1, x2, y2, x3, y3, ...]
+
+    录制结果带 8 个角点坐标时直接回放，否则由矩形推出角点；近似检测同样由矩形推出
+    """
+    height, width = image_shape[0], image_shape[1]
+    recorded = _recorded(width, height)
+    if recorded is None and host_backend.CV_LITE_MODE != "recorded" and _use_ref():
+        return _ref.grayscale_find_rectangles_with_corners(
+            image_shape, img, canny_thresh1, canny_thresh2, approx_epsilon, area_min_ratio,
+            max_angle_cos, gaussian_blur_size)
+    if recorded is None:
+        recorded = []
+        if host_backend.CV_LITE_MODE != "recorded":
+            flat = approx_find_rectangles(_gray_bytes(img), width, height, area_min_ratio)
+            recorded = [flat[i:i + 4] for i in range(0, len(flat), 4)]
+    rects = []
+    for r in recorded:
+        x, y, w, h = r[:4]
+        rects.extend((x, y, w, h))
+        rects.extend(r[4:12] if len(r) >= 12 else (x, y, x + w, y, x + w, y + h, x, y + h))
+    return rects
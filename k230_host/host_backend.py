@@ -0,0 +1,332 @@
+# K230 主机端硬件替身后端
+# 在Linux主机上替代 media.sensor / media.display / machine / image / cv_lite，
+# 让检测主循环无需修改即可在CI中运行并测量FPS和延迟
+
+import os, sys, time, gc, json
+
+# 后端配置（由 configure() 设置，各替身模块在运行时读取）
+FRAMES_DIR = None  # 回放帧目录（.pgm/.ppm）
+MAX_FRAMES = 0  # 回放帧数上限，0表示回放完目录即停止
+LOOP_FRAMES = False  # 目录回放完后是否循环
+DISPLAY_SAVE_DIR = None  # Display输出保存目录，None表示丢弃
+DISPLAY_SAVE_EVERY = 1  # 每N帧保存一次
+UART_PATH = None  # UART输出路径（pty或文件），None表示写入内存缓冲区
+CV_LITE_MODE = "auto"  # "auto": 有录制结果则回放，否则 NumPy 参考实现（无 numpy 时近似检测）；"recorded"；"numpy"；"approx"
+SENSOR_FPS = 0  # 模拟传感器帧率（snapshot 等待到下一帧时刻），0表示不限速
+HEAP_SIZE = 512 * 1024  # 模拟的MicroPython堆大小（供gc.mem_free使用）
+HEAP_ALLOC_PER_FRAME = 16 * 1024  # 模拟每帧在堆上分配的字节数（gc.collect() 时清零）
+
+# 运行时状态
+frames = []  # 预加载的帧 [(path, width, height, fmt, data, gray, rects)]
+frame_index = 0  # 已输出的帧数
+current_frame = None  # 当前帧信息
+snapshot_ticks = []  # 每次snapshot的时间戳（微秒）
+display_count = 0
+uart_buffer = bytearray()
+uart_fd = None
+uart_pty_name = None
+_taken_channels = set()
+_resize_cache = {}
+heap_used = 0  # 模拟堆占用
+
+_T0 = time.perf_counter()
+
+def configure(frames_dir=None, max_frames=0, loop=False, display_save_dir=None,
+              display_save_every=1, uart_path=None, cv_lite_mode="auto", sensor_fps=0):
+    """设置后端参数并预加载帧"""
+    global FRAMES_DIR, MAX_FRAMES, LOOP_FRAMES, DISPLAY_SAVE_DIR, DISPLAY_SAVE_EVERY
+    global UART_PATH, CV_LITE_MODE, SENSOR_FPS
+    FRAMES_DIR = frames_dir
+    MAX_FRAMES = max_frames
+    LOOP_FRAMES = loop
+    DISPLAY_SAVE_DIR = display_save_dir
+    DISPLAY_SAVE_EVERY = max(1, display_save_every)
+    UART_PATH = uart_path
+    CV_LITE_MODE = cv_lite_mode
+    SENSOR_FPS = sensor_fps
+    reset()
+    if frames_dir:
+        load_frames(frames_dir)
+
+def reset():
+    """清空运行时状态"""
+    global frame_index, current_frame, display_count, uart_buffer, heap_used
+    frame_index = 0
+    heap_used = 0
+    current_frame = None
+    display_count = 0
+    uart_buffer = bytearray()
+    del snapshot_ticks[:]
+    _taken_channels.clear()
+    _resize_cache.clear()
+
+# ---------------------------------------------------------------------------
+# PNM 帧读写
+# ---------------------------------------------------------------------------
+
+def _read_token(f):
+    """读取PNM头部的一个字段（跳过注释）"""
+    token = b""
+    while True:
+        c = f.read(1)
+        if not c:
+            return token
+        if c == b"#":
+            f.readline()
+            continue
+        if c.isspace():
+            if token:
+                return token
+            continue
+        token += c
+
+def read_pnm(path):
+    """读取PGM(P5)/PPM(P6)文件，返回 (width, height, channels, data)"""
+    with open(path, "rb") as f:
+        magic = _read_token(f)
+        width = int(_read_token(f))
+        height = int(_read_token(f))
+        maxval = int(_read_token(f))
+        if maxval != 255:
+            raise ValueError(f"仅支持8位PNM: {path}")
+        channels = 1 if magic == b"P5" else 3
+        if magic not in (b"P5", b"P6"):
+            raise ValueError(f"不支持的PNM格式: {path}")
+        data = bytearray(f.read(width * height * channels))
+    return width, height, channels, data
+
+def write_pnm(path, width, height, channels, data):
+    """写入PGM(P5)/PPM(P6)文件"""
+    magic = b"P5" if channels == 1 else b"P6"
+    with open(path, "wb") as f:
+        f.write(magic + f"\n{width} {height}\n255\n".encode())
+        f.write(bytes(data))
+
+def rgb_to_gray(rgb):
+    """RGB888 转灰度（整数近似 BT.601）"""
+    r = rgb[0::3]
+    g = rgb[1::3]
+    b = rgb[2::3]
+    return bytearray((r[i] * 77 + g[i] * 150 + b[i] * 29) >> 8 for i in range(len(r)))
+
+def load_frames(frames_dir):
+    """预加载目录中的全部帧，避免回放时磁盘IO干扰计时"""
+    del frames[:]
+    names = sorted(n for n in os.listdir(frames_dir) if n.endswith((".pgm", ".ppm")))
+    for name in names:
+        path = os.path.join(frames_dir, name)
+        width, height, channels, data = read_pnm(path)
+        gray = data if channels == 1 else rgb_to_gray(data)
+        rects = None
+        rects_path = os.path.splitext(path)[0] + ".rects.json"
+        if os.path.exists(rects_path):
+            with open(rects_path) as f:
+                rects = json.load(f)
+        frames.append((path, width, height, channels, data, gray, rects))
+    if not frames:
+        raise ValueError(f"帧目录中没有 .pgm/.ppm 文件: {frames_dir}")
+
+def next_frame(chn=0):
+    """取下一帧；回放结束时抛出 KeyboardInterrupt 以正常退出主循环
+
+    同一帧可被不同通道各取一次（模拟多通道同步输出），通道重复取帧时才前进到下一帧
+    """
+    global frame_index, current_frame, heap_used
+    if current_frame is not None and chn not in _taken_channels:
+        _taken_channels.add(chn)
+        return current_frame
+    if not frames:
+        raise RuntimeError("未加载回放帧，请先调用 host_backend.configure(frames_dir=...)")
+    if MAX_FRAMES and frame_index >= MAX_FRAMES:
+        raise KeyboardInterrupt
+    if frame_index >= len(frames) and not LOOP_FRAMES:
+        raise KeyboardInterrupt
+    if SENSOR_FPS > 0:
+        # 按传感器帧率等待下一帧时刻
+        if snapshot_ticks:
+            due = snapshot_ticks[0] + int(frame_index * 1000000 / SENSOR_FPS)
+            wait = due - ticks_us()
+            if wait > 0:
+                time.sleep(wait / 1000000)
+    current_frame = frames[frame_index % len(frames)]
+    frame_index += 1
+    _taken_channels.clear()
+    _taken_channels.add(chn)
+    snapshot_ticks.append(ticks_us())
+    heap_used = min(HEAP_SIZE, heap_used + HEAP_ALLOC_PER_FRAME)
+    return current_frame
+
+def resize_nearest(data, width, height, channels, new_width, new_height):
+    """最近邻缩放（按源缓冲区缓存结果，回放循环中不重复缩放）"""
+    if (width, height) == (new_width, new_height):
+        return data
+    key = (id(data), new_width, new_height)
+    cached = _resize_cache.get(key)
+    if cached is not None:
+        return cached
+    out = bytearray(new_width * new_height * channels)
+    xs = [(x * width // new_width) * channels for x in range(new_width)]
+    for y in range(new_height):
+        src_row = (y * height // new_height) * width * channels
+        dst_row = y * new_width * channels
+        for x in range(new_width):
+            s = src_row + xs[x]
+            d = dst_row + x * channels
+            out[d:d + channels] = data[s:s + channels]
+    _resize_cache[key] = out
+    return out
+
+# ---------------------------------------------------------------------------
+# MicroPython 内置函数替身（time / os / gc）
+# ---------------------------------------------------------------------------
+
+def ticks_us():
+    return int((time.perf_counter() - _T0) * 1000000)
+
+def ticks_ms():
+    return int((time.perf_counter() - _T0) * 1000)
+
+def ticks_diff(a, b):
+    return a - b
+
+def ticks_add(a, b):
+    return a + b
+
+class _Clock:
+    """time.clock() 替身"""
+
+    def __init__(self):
+        self._t0 = ticks_us()
+        self._dt = 0
+
+    def tick(self):
+        self._t0 = ticks_us()
+
+    def fps(self):
+        self._dt = ticks_us() - self._t0
+        return 1000000.0 / self._dt if self._dt > 0 else 0.0
+
+    def avg(self):
+        return self._dt / 1000.0
+
+def _exitpoint(flag=None):
+    return False
+
+def _mem_alloc():
+    return heap_used
+
+def _mem_free():
+    return HEAP_SIZE - heap_used
+
+_gc_collect = gc.collect
+
+def _collect():
+    global heap_used
+    heap_used = 0
+    return _gc_collect()
+
+def install():
+    """把替身模块目录加入 sys.path，并为 time/os/gc 补上 MicroPython 专有接口"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    if here not in sys.path:
+        sys.path.insert(0, here)
+    time.ticks_us = ticks_us
+    time.ticks_ms = ticks_ms
+    time.ticks_diff = ticks_diff
+    time.ticks_add = ticks_add
+    time.sleep_ms = lambda ms: time.sleep(ms / 1000)
+    time.sleep_us = lambda us: time.sleep(us / 1000000)
+    time.clock = _Clock
+    os.exitpoint = _exitpoint
+    os.EXITPOINT_ENABLE = 1
+    os.EXITPOINT_ENABLE_SLEEP = 2
+    if not hasattr(gc, "mem_alloc"):
+        gc.mem_alloc = _mem_alloc
+        gc.mem_free = _mem_free
+        gc.collect = _collect
+
+# ---------------------------------------------------------------------------
+# 合成测试序列
+# ---------------------------------------------------------------------------
+
+def make_synthetic_frames(out_dir, count=60, width=320, height=240, rect_w=90, rect_h=70,
+                          border=6, seed=1, max_angle=20.0):
+    """生成移动空心矩形的PPM序列，并写入 .gt.json 真值（外接框和四个角点）
+
+    前半段为轴对齐矩形；后半段矩形绕中心旋转，角度在 ±max_angle 度之间平滑变化，
+    旋转后的边缘按像素覆盖率抗锯齿绘制
+    """
+    import math, random
+    rnd = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    half = count // 2
+    for i in range(count):
+        # 目标沿椭圆轨迹移动
+        phase = 2 * math.pi * i / max(1, count)
+        cx = width // 2 + int((width // 2 - rect_w) * 0.8 * math.cos(phase))
+        cy = height // 2 + int((height // 2 - rect_h) * 0.8 * math.sin(phase))
+        x0 = cx - rect_w // 2
+        y0 = cy - rect_h // 2
+        angle = 0.0
+        if i >= half and max_angle:
+            angle = max_angle * math.sin(2 * math.pi * (i - half) / max(1, count - half))
+        gray = bytearray(bytes([200]) * (width * height))
+        for y in range(height):
+            for x in range(0, width, 7):
+                gray[y * width + x] = 200 + rnd.randint(-12, 12)
+        if angle == 0.0:
+            for y in range(y0, y0 + rect_h):
+                row = y * width
+                if y < y0 + border or y >= y0 + rect_h - border:
+                    gray[row + x0:row + x0 + rect_w] = bytes([20]) * rect_w
+                else:
+                    gray[row + x0:row + x0 + border] = bytes([20]) * border
+                    gray[row + x0 + rect_w - border:row + x0 + rect_w] = bytes([20]) * border
+            corners = [[x0, y0], [x0 + rect_w, y0], [x0 + rect_w, y0 + rect_h], [x0, y0 + rect_h]]
+        else:
+            corners = _draw_rotated_frame(gray, width, height, x0 + rect_w / 2.0, y0 + rect_h / 2.0,
+                                          rect_w / 2.0, rect_h / 2.0, border, math.radians(angle))
+        rgb = bytearray(width * height * 3)
+        rgb[0::3] = gray
+        rgb[1::3] = gray
+        rgb[2::3] = gray
+        name = os.path.join(out_dir, f"frame_{i:05d}")
+        write_pnm(name + ".ppm", width, height, 3, rgb)
+        xs = [c[0] for c in corners]
+        ys = [c[1] for c in corners]
+        rect = [min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys)]
+        with open(name + ".gt.json", "w") as f:
+            json.dump({"rect": rect, "corners": corners}, f)
+
+def _box_distance(u, v, hw, hh):
+    """点 (u, v) 到中心在原点、半宽高 (hw, hh) 的矩形边界的有符号距离（内部为负）"""
+    dx = abs(u) - hw
+    dy = abs(v) - hh
+    outside = (max(dx, 0.0) ** 2 + max(dy, 0.0) ** 2) ** 0.5
+    return outside + min(max(dx, dy), 0.0)
+
+def _draw_rotated_frame(gray, width, height, cx, cy, hw, hh, border, theta):
+    """绘制绕 (cx, cy) 旋转 theta 弧度的空心矩形，返回四个角点（左上/右上/右下/左下）"""
+    import math
+    c = math.cos(theta)
+    s = math.sin(theta)
+    corners = []
+    for u, v in ((-hw, -hh), (hw, -hh), (hw, hh), (-hw, hh)):
+        corners.append([round(cx + u * c - v * s, 3), round(cy + u * s + v * c, 3)])
+    xs = [p[0] for p in corners]
+    ys = [p[1] for p in corners]
+    for y in range(max(0, int(min(ys)) - 1), min(height, int(max(ys)) + 2)):
+        row = y * width
+        for x in range(max(0, int(min(xs)) - 1), min(width, int(max(xs)) + 2)):
+            # 像素中心转到矩形局部坐标，按到内外边界的距离估算覆盖率
+            px = x + 0.5 - cx
+            py = y + 0.5 - cy
+            u = px * c + py * s
+            v = -px * s + py * c
+            outer = min(1.0, max(0.0, 0.5 - _box_distance(u, v, hw, hh)))
+            if outer <= 0.0:
+                continue
+            inner = min(1.0, max(0.0, 0.5 + _box_distance(u, v, hw - border, hh - border)))
+            cover = outer * inner
+            gray[row + x] = int(gray[row + x] * (1.0 - cover) + 20 * cover + 0.5)
+    return corners
@@ -0,0 +1,401 @@
+# image 模块主机端替身
+# 灰度图按 1 字节/像素存储；彩色图（RGB565/RGB888）在主机端统一按 RGB888 存储
+
+import host_backend
+
+GRAYSCALE = 1
+RGB565 = 2
+RGB888 = 3
+ARGB8888 = 4
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+def _channels(fmt):
+    if fmt == GRAYSCALE:
+        return 1
+    if fmt == ARGB8888:
+        return 4
+    return 3
+
+def _color_value(color, channels):
+    """把 (r, g, b[, a]) 或整数颜色转换为像素字节"""
+    if isinstance(color, int):
+        color = (color, color, color)
+    if channels == 1:
+        r, g, b = color[0], color[1], color[2]
+        return bytes([(r * 77 + g * 150 + b * 29) >> 8])
+    if channels == 4:
+        a = color[3] if len(color) > 3 else 255
+        return bytes([a, color[0], color[1], color[2]])
+    return bytes(color[:3])
+
+class Threshold:
+    def __init__(self, value):
+        self._value = value
+
+    def value(self):
+        return self._value
+
+class Percentile:
+    def __init__(self, value):
+        self._value = value
+
+    def value(self):
+        return self._value
+
+class Histogram:
+    def __init__(self, bins, total):
+        self._bins = bins
+        self._total = total
+
+    def get_percentile(self, percentile):
+        """累计分布达到 percentile 的灰度值"""
+        target = percentile * self._total
+        acc = 0
+        for i in range(256):
+            acc += self._bins[i]
+            if acc >= target:
+                return Percentile(i)
+        return Percentile(255)
+
+    def bins(self):
+        return [c / self._total for c in self._bins] if self._total else list(self._bins)
+
+    def get_threshold(self):
+        """OTSU 阈值（返回上半类的起始灰度，便于直接用作 (value, 255)）"""
+        total = self._total
+        sum_all = 0
+        for i in range(256):
+            sum_all += i * self._bins[i]
+        sum_b = 0
+        w_b = 0
+        best = 0
+        best_var = -1.0
+        for i in range(256):
+            w_b += self._bins[i]
+            if w_b == 0:
+                continue
+            w_f = total - w_b
+            if w_f == 0:
+                break
+            sum_b += i * self._bins[i]
+            m_b = sum_b / w_b
+            m_f = (sum_all - sum_b) / w_f
+            var = w_b * w_f * (m_b - m_f) * (m_b - m_f)
+            if var > best_var:
+                best_var = var
+                best = i
+        return Threshold(min(255, best + 1))
+
+class Statistics:
+    def __init__(self, mean):
+        self._mean = mean
+
+    def mean(self):
+        return self._mean
+
+class NdRef:
+    """无 numpy 时 to_numpy_ref() 的替代：带 shape 的只读视图"""
+
+    def __init__(self, data, shape):
+        self.data = data
+        self.shape = shape
+
+class Image:
+    """image.Image 替身"""
+
+    def __init__(self, width, height=None, fmt=RGB565, data=None, gray=None, **kwargs):
+        if isinstance(width, str):
+            w, h, channels, data = host_backend.read_pnm(width)
+            width, height = w, h
+            fmt = GRAYSCALE if channels == 1 else RGB888
+        self._width = width
+        self._height = height
+        self._format = fmt
+        self._channels = _channels(fmt)
+        if data is None:
+            data = bytearray(width * height * self._channels)
+        self._data = data
+        self._gray = gray  # 彩色帧的灰度缓存（由 sensor 替身在加载时提供）
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+    def format(self):
+        return self._format
+
+    def size(self):
+        return len(self._data)
+
+    def bytearray(self):
+        return self._data
+
+    def copy(self, roi=None, **kwargs):
+        if roi is None:
+            return Image(self._width, self._height, self._format, bytearray(self._data),
+                         None if self._gray is None else bytearray(self._gray))
+        return self.crop(roi)
+
+    def crop(self, roi=None, **kwargs):
+        x, y, w, h = roi if roi else (0, 0, self._width, self._height)
+        c = self._channels
+        out = bytearray(w * h * c)
+        for row in range(h):
+            s = ((y + row) * self._width + x) * c
+            out[row * w * c:(row + 1) * w * c] = self._data[s:s + w * c]
+        return Image(w, h, self._format, out)
+
+    def mean_pooled(self, x_div, y_div, **kwargs):
+        """按 x_div*y_div 块求均值缩小，返回新图像"""
+        c = self._channels
+        w, h = self._width // x_div, self._height // y_div
+        src = self._data
+        stride = self._width * c
+        out = bytearray(w * h * c)
+        area = x_div * y_div
+        if c == 1 and _np is not None:
+            a = _np.frombuffer(src, dtype=_np.uint8).reshape(self._height, self._width)
+            a = a[:h * y_div, :w * x_div].reshape(h, y_div, w, x_div).astype(_np.uint32)
+            out[:] = (a.sum(axis=(1, 3)) // area).astype(_np.uint8).tobytes()
+            return Image(w, h, self._format, out)
+        if c == 1:
+            for y in range(h):
+                acc = [0] * self._width
+                for dy in range(y_div):
+                    base = (y * y_div + dy) * stride
+                    acc = list(map(int.__add__, acc, src[base:base + self._width]))
+                out[y * w:(y + 1) * w] = bytes(sum(acc[x * x_div:(x + 1) * x_div]) // area
+                                               for x in range(w))
+            return Image(w, h, self._format, out)
+        for y in range(h):
+            for x in range(w):
+                for ch in range(c):
+                    total = 0
+                    for dy in range(y_div):
+                        base = (y * y_div + dy) * stride + x * x_div * c + ch
+                        total += sum(src[base:base + x_div * c:c])
+                    out[(y * w + x) * c + ch] = total // area
+        return Image(w, h, self._format, out)
+
+    def clear(self):
+        self._data[:] = bytes(len(self._data))
+        return self
+
+    def to_grayscale(self, copy=True, **kwargs):
+        if self._format == GRAYSCALE:
+            data = bytearray(self._data) if copy else self._data
+        elif self._gray is not None:
+            data = bytearray(self._gray)
+        else:
+            data = host_backend.rgb_to_gray(self._data)
+        return Image(self._width, self._height, GRAYSCALE, data)
+
+    def get_histogram(self, **kwargs):
+        gray = self._data if self._format == GRAYSCALE else self.to_grayscale()._data
+        bins = [0] * 256
+        for value in set(gray):
+            bins[value] = gray.count(value)
+        return Histogram(bins, len(gray))
+
+    def get_statistics(self, roi=None, **kwargs):
+        """像素统计（主机端只提供 mean）"""
+        x, y, w, h = roi if roi else (0, 0, self._width, self._height)
+        c = self._channels
+        total = 0
+        for row in range(y, y + h):
+            s = (row * self._width + x) * c
+            total += sum(self._data[s:s + w * c])
+        return Statistics(total // (w * h * c) if w * h else 0)
+
+    def difference(self, other, **kwargs):
+        """原地求与另一幅同尺寸图像的逐像素差的绝对值"""
+        a = self._data
+        b = other._data
+        if _np is not None:
+            d = _np.abs(_np.frombuffer(a, dtype=_np.uint8).astype(_np.int16)
+                        - _np.frombuffer(b, dtype=_np.uint8).astype(_np.int16))
+            a[:] = d.astype(_np.uint8).tobytes()
+        else:
+            a[:] = bytes(abs(p - q) for p, q in zip(a, b))
+        return self
+
+    def binary(self, thresholds, invert=False, copy=False, **kwargs):
+        """与板端一致：默认原地修改并返回自身，copy=True 时返回新图像"""
+        gray = self._data if self._format == GRAYSCALE else self.to_grayscale()._data
+        lut = bytearray(256)
+        for lo, hi in thresholds:
+            for v in range(max(0, lo), min(255, hi) + 1):
+                lut[v] = 255
+        if invert:
+            lut = bytearray(255 - v for v in lut)
+        return self._replace(bytearray(gray.translate(lut)), copy)
+
+    def _replace(self, gray, copy):
+        if copy:
+            return Image(self._width, self._height, GRAYSCALE, gray)
+        self._format = GRAYSCALE
+        self._channels = 1
+        self._data = gray
+        self._gray = None
+        return self
+
+    def mean(self, size, threshold=False, offset=0, invert=False, **kwargs):
+        """均值滤波；threshold=True 时做自适应二值化（像素 - 邻域均值 >= offset 置 255）"""
+        w, h = self._width, self._height
+        src = self._data if self._format == GRAYSCALE else self.to_grayscale()._data
+        # 积分图
+        integral = [0] * ((w + 1) * (h + 1))
+        for y in range(h):
+            row_sum = 0
+            base = (y + 1) * (w + 1)
+            prev = y * (w + 1)
+            row = y * w
+            for x in range(w):
+                row_sum += src[row + x]
+                integral[base + x + 1] = integral[prev + x + 1] + row_sum
+        out = bytearray(w * h)
+        for y in range(h):
+            y0 = max(0, y - size)
+            y1 = min(h, y + size + 1)
+            for x in range(w):
+                x0 = max(0, x - size)
+                x1 = min(w, x + size + 1)
+                total = (integral[y1 * (w + 1) + x1] - integral[y0 * (w + 1) + x1]
+                         - integral[y1 * (w + 1) + x0] + integral[y0 * (w + 1) + x0])
+                m = total // ((y1 - y0) * (x1 - x0))
+                if threshold:
+                    on = (src[y * w + x] - m >= offset) != bool(invert)
+                    out[y * w + x] = 255 if on else 0
+                else:
+                    out[y * w + x] = m
+        return self._replace(out, False)
+
+    def _morph(self, size, grow):
+        """二值图膨胀/腐蚀：每行打包成大整数，按位移位做 OR/AND"""
+        w, h = self._width, self._height
+        lut = bytearray(256)
+        for v in range(128, 256):
+            lut[v] = 255
+        data = self._data.translate(lut)
+        full = (1 << (8 * w)) - 1
+        rows = [int.from_bytes(data[y * w:(y + 1) * w], "big") for y in range(h)]
+        horiz = []
+        for r in rows:
+            acc = r
+            for k in range(1, size + 1):
+                if grow:
+                    acc |= ((r << (8 * k)) & full) | (r >> (8 * k))
+                else:
+                    acc &= ((r << (8 * k)) & full) & (r >> (8 * k))
+            horiz.append(acc)
+        out = bytearray(w * h)
+        for y in range(h):
+            acc = horiz[y]
+            for yy in range(max(0, y - size), min(h, y + size + 1)):
+                acc = (acc | horiz[yy]) if grow else (acc & horiz[yy])
+            out[y * w:(y + 1) * w] = acc.to_bytes(w, "big")
+        self._data = out
+        self._format = GRAYSCALE
+        self._channels = 1
+        return self
+
+    def dilate(self, size, threshold=None, **kwargs):
+        return self._morph(size, True)
+
+    def erode(self, size, threshold=None, **kwargs):
+        return self._morph(size, False)
+
+    def open(self, size, threshold=None, **kwargs):
+        return self._morph(size, False)._morph(size, True)
+
+    def close(self, size, threshold=None, **kwargs):
+        return self._morph(size, True)._morph(size, False)
+
+    def to_numpy_ref(self):
+        if _np is not None:
+            if self._channels == 1:
+                return _np.frombuffer(self._data, dtype=_np.uint8).reshape(self._height, self._width)
+            return _np.frombuffer(self._data, dtype=_np.uint8).reshape(
+                self._height, self._width, self._channels)
+        if self._channels == 1:
+            return NdRef(self._data, (self._height, self._width))
+        return NdRef(self._data, (self._height, self._width, self._channels))
+
+    # ------------------------------------------------------------------
+    # 绘制（绘制到像素，保存的 Display 输出可以看到叠加层）
+    # ------------------------------------------------------------------
+
+    def set_pixel(self, x, y, color):
+        if 0 <= x < self._width and 0 <= y < self._height:
+            c = self._channels
+            i = (y * self._width + x) * c
+            self._data[i:i + c] = _color_value(color, c)
+        return self
+
+    def draw_line(self, x0, y0, x1, y1, color=(255, 255, 255), thickness=1, **kwargs):
+        steps = max(abs(x1 - x0), abs(y1 - y0), 1)
+        for s in range(steps + 1):
+            self.set_pixel(x0 + (x1 - x0) * s // steps, y0 + (y1 - y0) * s // steps, color)
+        return self
+
+    def draw_rectangle(self, x, y=None, w=None, h=None, color=(255, 255, 255), thickness=1,
+                       fill=False, **kwargs):
+        if y is None:
+            x, y, w, h = x
+        c = self._channels
+        value = _color_value(color, c)
+        for t in range(max(1, thickness)):
+            for yy in (y + t, y + h - 1 - t):
+                if 0 <= yy < self._height:
+                    x0 = max(0, x)
+                    x1 = min(self._width, x + w)
+                    if x1 > x0:
+                        i = (yy * self._width + x0) * c
+                        self._data[i:i + (x1 - x0) * c] = value * (x1 - x0)
+            for yy in range(max(0, y), min(self._height, y + h)):
+                self.set_pixel(x + t, yy, color)
+                self.set_pixel(x + w - 1 - t, yy, color)
+        return self
+
+    def draw_circle(self, x, y, radius=1, color=(255, 255, 255), thickness=1, fill=False, **kwargs):
+        # 整数中点画圆
+        for r in range(radius, max(0, radius - thickness), -1):
+            dx, dy, err = r, 0, 1 - r
+            while dx >= dy:
+                for px, py in ((dx, dy), (dy, dx), (-dy, dx), (-dx, dy),
+                               (-dx, -dy), (-dy, -dx), (dy, -dx), (dx, -dy)):
+                    self.set_pixel(x + px, y + py, color)
+                dy += 1
+                if err < 0:
+                    err += 2 * dy + 1
+                else:
+                    dx -= 1
+                    err += 2 * (dy - dx) + 1
+        return self
+
+    def draw_cross(self, x, y, color=(255, 255, 255), size=5, thickness=1, **kwargs):
+        self.draw_line(x - size, y, x + size, y, color)
+        self.draw_line(x, y - size, x, y + size, color)
+        return self
+
+    def draw_string_advanced(self, x, y, char_size, text, color=(255, 255, 255), **kwargs):
+        # 主机端不渲染字体
+        return self
+
+    draw_string = draw_string_advanced
+
+    def save(self, path, **kwargs):
+        if self._channels == 4:
+            rgb = bytearray(len(self._data) // 4 * 3)
+            rgb[0::3] = self._data[1::4]
+            rgb[1::3] = self._data[2::4]
+            rgb[2::3] = self._data[3::4]
+            host_backend.write_pnm(path, self._width, self._height, 3, rgb)
+        else:
+            host_backend.write_pnm(path, self._width, self._height, self._channels, self._data)
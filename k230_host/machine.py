@@ -0,0 +1,79 @@
+# machine 模块主机端替身：UART 输出写入 pty/文件 或内存缓冲区
+
+import os
+import host_backend
+
+class Pin:
+    IN = 0
+    OUT = 1
+
+    def __init__(self, id, mode=IN, **kwargs):
+        self._id = id
+        self._value = 0
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = v
+
+class FPIOA:
+    UART1_TXD = 0
+    UART1_RXD = 1
+    UART2_TXD = 2
+    UART2_RXD = 3
+
+    def set_function(self, pin, func, **kwargs):
+        pass
+
+class UART:
+    """UART 替身"""
+
+    UART1 = 1
+    UART2 = 2
+    UART3 = 3
+
+    def __init__(self, id, baudrate=115200, **kwargs):
+        self._id = id
+        self.baudrate = baudrate
+        self._rx = bytearray()
+        self._fd = None
+        if host_backend.UART_PATH == "pty":
+            master, slave = os.openpty()
+            self._fd = master
+            # 与板端一致：发送缓冲区满时 write 不阻塞，返回已写入字节数或 None
+            os.set_blocking(master, False)
+            host_backend.uart_pty_name = os.ttyname(slave)
+        elif host_backend.UART_PATH:
+            self._fd = os.open(host_backend.UART_PATH, os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+        host_backend.uart_fd = self._fd
+
+    def write(self, buf):
+        if self._fd is not None:
+            try:
+                return os.write(self._fd, buf)
+            except BlockingIOError:
+                return None
+        host_backend.uart_buffer.extend(buf)
+        return len(buf)
+
+    def feed(self, data):
+        """主机端专用：向接收缓冲区注入数据"""
+        self._rx.extend(data)
+
+    def any(self):
+        return len(self._rx)
+
+    def read(self, nbytes=None):
+        if not self._rx:
+            return None
+        if nbytes is None:
+            nbytes = len(self._rx)
+        data = bytes(self._rx[:nbytes])
+        del self._rx[:nbytes]
+        return data
+
+    def deinit(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+            host_backend.uart_fd = None
@@ -0,0 +1,53 @@
+# media.display 模块主机端替身：丢弃或按间隔保存显示帧
+
+import os
+import host_backend
+
+class Display:
+    """Display 替身"""
+
+    VIRT = 0
+    ST7701 = 1
+    LT9611 = 2
+    HX8377 = 3
+
+    LAYER_VIDEO1 = 1
+    LAYER_VIDEO2 = 2
+    LAYER_OSD0 = 3
+    LAYER_OSD1 = 4
+    LAYER_OSD2 = 5
+    LAYER_OSD3 = 6
+
+    FLAG_ROTATION_0 = 0
+
+    _width = 0
+    _height = 0
+    _bound = {}
+    _osd_num = 1
+
+    @staticmethod
+    def init(type=None, width=None, height=None, fps=None, to_ide=False, osd_num=1, **kwargs):
+        Display._width = width or 0
+        Display._height = height or 0
+        Display._osd_num = osd_num
+        Display._bound = {}
+
+    @staticmethod
+    def bind_layer(src=None, dstlayer=None, rect=None, pix_format=None, alpha=255, flag=0, layer=None,
+                   **kwargs):
+        Display._bound[dstlayer if layer is None else layer] = (src, rect)
+
+    @staticmethod
+    def show_image(img, x=0, y=0, layer=None, alpha=255, flag=0, **kwargs):
+        # 与板上一致：只能显示到 init 时预留的 OSD 层
+        if layer is not None and layer >= Display.LAYER_OSD0 + Display._osd_num:
+            raise RuntimeError(f"OSD layer {layer} not enabled (osd_num={Display._osd_num})")
+        host_backend.display_count += 1
+        save_dir = host_backend.DISPLAY_SAVE_DIR
+        if save_dir and host_backend.display_count % host_backend.DISPLAY_SAVE_EVERY == 0:
+            os.makedirs(save_dir, exist_ok=True)
+            img.save(os.path.join(save_dir, f"display_{host_backend.display_count:06d}.ppm"))
+
+    @staticmethod
+    def deinit():
+        Display._bound = {}
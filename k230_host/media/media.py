@@ -0,0 +1,14 @@
+# media.media 模块主机端替身
+
+class MediaManager:
+    """MediaManager 替身"""
+
+    _initialized = False
+
+    @staticmethod
+    def init():
+        MediaManager._initialized = True
+
+    @staticmethod
+    def deinit():
+        MediaManager._initialized = False
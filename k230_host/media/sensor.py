@@ -0,0 +1,62 @@
+# media.sensor 模块主机端替身：从磁盘回放录制帧
+
+import host_backend
+import image
+
+CAM_CHN_ID_0 = 0
+CAM_CHN_ID_1 = 1
+CAM_CHN_ID_2 = 2
+
+class Sensor:
+    """Sensor 替身，每次 snapshot() 返回回放目录中的下一帧"""
+
+    RGB565 = image.RGB565
+    RGB888 = image.RGB888
+    GRAYSCALE = image.GRAYSCALE
+    YUV420SP = 5
+
+    def __init__(self, id=2, width=1920, height=1080, fps=60, **kwargs):
+        self._channels = {}
+        self._default_size = (width, height)
+        self._running = False
+
+    def reset(self):
+        self._channels = {}
+
+    def set_framesize(self, framesize=None, width=None, height=None, chn=CAM_CHN_ID_0, **kwargs):
+        self._channels.setdefault(chn, {})["size"] = (width, height)
+
+    def set_pixformat(self, pix_format, chn=CAM_CHN_ID_0, **kwargs):
+        self._channels.setdefault(chn, {})["format"] = pix_format
+
+    def set_hmirror(self, enable):
+        pass
+
+    def set_vflip(self, enable):
+        pass
+
+    def bind_info(self, x=0, y=0, chn=CAM_CHN_ID_0):
+        return {"src": chn, "rect": (x, y) + self._channels.get(chn, {}).get("size", self._default_size)}
+
+    def run(self):
+        self._running = True
+
+    def stop(self):
+        self._running = False
+
+    def snapshot(self, chn=CAM_CHN_ID_0, **kwargs):
+        cfg = self._channels.get(chn, {})
+        width, height = cfg.get("size", self._default_size)
+        fmt = cfg.get("format", image.RGB565)
+        path, fw, fh, channels, data, gray, rects = host_backend.next_frame(chn)
+        gray = host_backend.resize_nearest(gray, fw, fh, 1, width, height)
+        if fmt == image.GRAYSCALE:
+            return image.Image(width, height, image.GRAYSCALE, bytearray(gray))
+        if channels == 1:
+            rgb = bytearray(len(gray) * 3)
+            rgb[0::3] = gray
+            rgb[1::3] = gray
+            rgb[2::3] = gray
+        else:
+            rgb = bytearray(host_backend.resize_nearest(data, fw, fh, 3, width, height))
+        return image.Image(width, height, fmt, rgb, gray)
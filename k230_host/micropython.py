@@ -0,0 +1,4 @@
+# micropython 模块主机端替身：const() 原样返回，使 k230_build.py 生成的检测脚本可在主机上运行
+
+def const(value):
+    return value
@@ -0,0 +1,93 @@
+# K230 运动门控
+# 在大幅缩小的灰度图上与上次检测时的参考帧做差，平均差值（全帧和目标窗口内取较大者）
+# 低于阈值时认为场景和目标都没有变化，本帧跳过 cv_lite 检测、沿用上次结果；
+# 连续跳过 max_skip 帧后强制检测一次，保证结果不会过期
+
+import image
+
+class MotionGate:
+    """帧差驱动的检测门控
+
+    width, height: 检测图像尺寸
+    threshold: 平均绝对差（灰度级）达到该值视为有变化
+    max_skip: 最多连续跳过的帧数
+    scale: 缩小倍数
+    margin: 目标窗口外扩边距（占目标宽高的比例）
+    """
+
+    def __init__(self, width, height, threshold=3, max_skip=5, scale=8, margin=0.25):
+        self.width = width // scale
+        self.height = height // scale
+        self.threshold = threshold
+        self.max_skip = max_skip
+        self.scale = scale
+        self.margin = margin
+        # 参考帧和差值图启动时一次分配，每帧只做原地拷贝和原地求差
+        self.ref = image.Image(self.width, self.height, image.GRAYSCALE)  # 上次检测时的缩小图
+        self.scratch = image.Image(self.width, self.height, image.GRAYSCALE)
+        self.ref_buf = self.ref.bytearray()
+        self.scratch_buf = self.scratch.bytearray()
+        self.has_ref = False
+        self.window = None  # 目标窗口（缩小图坐标）
+        self.skip = 0
+        self.last_score = 0
+        self.runs = 0  # 统计：执行检测的帧数
+        self.skipped = 0  # 统计：跳过检测的帧数
+        self.forced = 0  # 统计：因达到 max_skip 强制检测的帧数
+
+    def check(self, img_gray):
+        """返回 True 表示本帧需要检测"""
+        s = self.scale
+        small = img_gray.mean_pooled(s, s).bytearray()
+        if not self.has_ref or self.skip >= self.max_skip:
+            if self.has_ref:
+                self.forced += 1
+            return self._run(small)
+        self.scratch_buf[:] = small
+        diff = self.scratch.difference(self.ref)
+        score = diff.get_statistics().mean()
+        if self.window is not None:
+            # 小目标在全帧均值中会被稀释，单独看目标窗口
+            score = max(score, diff.get_statistics(roi=self.window).mean())
+        self.last_score = score
+        if score >= self.threshold:
+            return self._run(small)
+        self.skip += 1
+        self.skipped += 1
+        return False
+
+    def _run(self, small):
+        self.ref_buf[:] = small
+        self.has_ref = True
+        self.skip = 0
+        self.runs += 1
+        return True
+
+    def track(self, x, y, w, h):
+        """记录当前目标框（全分辨率坐标）"""
+        s = self.scale
+        mx = int(w * self.margin)
+        my = int(h * self.margin)
+        x0 = max(0, int(x - mx) // s)
+        y0 = max(0, int(y - my) // s)
+        x1 = min(self.width, int(x + w + mx) // s + 1)
+        y1 = min(self.height, int(y + h + my) // s + 1)
+        self.window = (x0, y0, x1 - x0, y1 - y0) if x1 > x0 and y1 > y0 else None
+
+    def miss(self):
+        """本帧无目标"""
+        self.window = None
+
+    def reset(self):
+        """参数变化后调用：下一帧必须检测"""
+        self.has_ref = False
+        self.skip = 0
+
+    def stats(self):
+        """检测/跳过计数和最近一次帧差"""
+        return {
+            'runs': self.runs,
+            'skipped': self.skipped,
+            'forced': self.forced,
+            'score': self.last_score,
+        }
@@ -0,0 +1,18 @@
+# K230 配置覆盖
+# 主机端工具（回归测试、部署构建）共用的 --set NAME=VALUE 解析，
+# 值按参数当前类型转换（与 UART SET 命令相同的规则）；检测脚本不导入本模块
+
+from k230_config import DetectionConfig, AdvancedConfig
+from k230_commands import parse_value
+
+def apply_overrides(items):
+    """--set NAME=VALUE：按当前值类型修改 DetectionConfig / AdvancedConfig"""
+    for item in items:
+        name, _, text = item.partition("=")
+        for config in (DetectionConfig, AdvancedConfig):
+            if hasattr(config, name):
+                current = getattr(config, name)
+                setattr(config, name, text if isinstance(current, str) else parse_value(current, text))
+                break
+        else:
+            raise SystemExit(f"未知参数: {name}")
@@ -0,0 +1,129 @@
+# K230 按需执行的帧处理流水线
+# 每帧的处理被描述为一个小型阶段图：每个阶段声明输入和输出数据，
+# 启动时从输出端（UART发送、显示）反向求出真正被消费的阶段，其余阶段不会执行
+
+class Stage:
+    """流水线阶段
+
+    name: 阶段名称
+    func: 处理函数，参数按 inputs 顺序传入，返回值作为 output
+    inputs: 输入数据名称元组
+    output: 输出数据名称（终端阶段可为 None）
+    sink: 终端阶段（无论输出是否被消费都会执行）
+    enabled: 是否启用
+    tm_stage: 遥测阶段编号
+    """
+
+    def __init__(self, name, func, inputs=(), output=None, sink=False, enabled=True, tm_stage=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.output = output
+        self.sink = sink
+        self.enabled = enabled
+        self.tm_stage = tm_stage
+
+class FramePipeline:
+    """由 Stage 列表（按执行顺序）构建的按需流水线"""
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.active = []
+        self.skipped = []
+        self.plan = []
+        self.values = []
+        self.slots = {}
+        self.build()
+
+    def build(self):
+        """从终端阶段反向求出需要执行的阶段，并生成执行计划"""
+        needed = set()
+        active = []
+        for stage in reversed(self.stages):
+            if not stage.enabled:
+                continue
+            if stage.sink or (stage.output is not None and stage.output in needed):
+                active.append(stage)
+                needed.update(stage.inputs)
+        active.reverse()
+
+        # 检查输入都由更早的活动阶段产生，并为每个数据分配槽位
+        slots = {}
+        for stage in active:
+            for name in stage.inputs:
+                if name not in slots:
+                    raise ValueError(f"流水线阶段 {stage.name} 的输入 {name} 没有启用的生产者")
+            if stage.output is not None and stage.output not in slots:
+                slots[stage.output] = len(slots)
+
+        self.active = active
+        self.slots = slots
+        self.skipped = [s for s in self.stages if s not in active]
+        self.values = [None] * max(1, len(slots))
+        self.plan = []
+        for stage in active:
+            ins = tuple(slots[name] for name in stage.inputs)
+            out = slots[stage.output] if stage.output is not None else -1
+            self.plan.append((stage.func, len(ins), ins, out, stage.tm_stage))
+        return self
+
+    def run(self, tm, values=None, start=0, end=None):
+        """执行一帧（或其中 start:end 一段阶段）
+
+        tm 为遥测对象（每个阶段结束后 mark）；values 为本帧数据槽位，
+        默认使用内部槽位，多帧并行处理时每帧使用 new_values() 分配的独立槽位
+        """
+        if values is None:
+            values = self.values
+        plan = self.plan
+        if end is None:
+            end = len(plan)
+        for k in range(start, end):
+            func, n, ins, out, tm_stage = plan[k]
+            if n == 0:
+                result = func()
+            elif n == 1:
+                result = func(values[ins[0]])
+            elif n == 2:
+                result = func(values[ins[0]], values[ins[1]])
+            else:
+                result = func(*[values[i] for i in ins])
+            if out >= 0:
+                values[out] = result
+            if tm_stage is not None:
+                tm.mark(tm_stage)
+
+    def new_values(self):
+        """分配一组独立的数据槽位"""
+        return [None] * len(self.values)
+
+    def index_after(self, names):
+        """返回 names 中最后一个启用阶段之后的执行计划下标（都未启用时为 0）"""
+        index = 0
+        for k in range(len(self.active)):
+            if self.active[k].name in names:
+                index = k + 1
+        return index
+
+    def index_of_first(self, names):
+        """返回 names 中第一个启用阶段的执行计划下标（都未启用时为计划长度）"""
+        for k in range(len(self.active)):
+            if self.active[k].name in names:
+                return k
+        return len(self.active)
+
+    def get(self, name):
+        """读取本帧某个数据（未启用时返回 None）"""
+        slot = self.slots.get(name)
+        return None if slot is None else self.values[slot]
+
+    def clear(self, values=None):
+        """释放本帧数据引用，便于垃圾回收"""
+        if values is None:
+            values = self.values
+        for i in range(len(values)):
+            values[i] = None
+
+    def describe(self):
+        """返回 (启用阶段名列表, 跳过阶段名列表)"""
+        return [s.name for s in self.active], [s.name for s in self.skipped]
@@ -0,0 +1,178 @@
+# K230 UART 帧编码
+# 旧版帧: 0x66 0x66 + 误差(int16) + 0xf6 0xf6
+# v2 帧: 帧头 + 目标列表 + CRC-16，全部用 struct.pack_into 写入预分配缓冲区，发送时不分配内存
+#
+# v2 帧格式（小端序）:
+#   0   2B  同步字 0xA5 0x5A
+#   2   1B  协议版本 (2)
+#   3   1B  消息类型 (0x01 目标列表，0x02 文本)
+#   4   2B  帧序号 uint16（递增、回绕）
+#   6   4B  采集时间戳 uint32（微秒，time.ticks_us）
+#   10  1B  目标数 N
+#   11  N * 27B 目标:
+#       track_id uint16, x_error int16, y_error int16,
+#       角点 4 x (x int16, y int16)（左上、右上、右下、左下），
+#       宽 uint16, 高 uint16, 置信度 uint8 (0-255)
+#   末尾 2B  CRC-16/CCITT-FALSE（多项式 0x1021，初值 0xFFFF），覆盖版本字节到最后一个目标
+# N = 0 表示本帧未检测到目标
+#
+# 文本帧（命令应答、遥测报告）沿用同一帧头，N 为文本字节数，其后是 N 字节 ASCII 和 CRC-16；
+# 旧版协议的线路上也用文本帧发送，下位机靠同步字和CRC就能与 0x66 0x66 控制帧区分开
+
+import struct
+from array import array
+
+PROTOCOL_VERSION = 2
+MSG_TARGETS = 0x01
+MSG_TEXT = 0x02
+SYNC = b'\xa5\x5a'
+HEADER_FMT = '<BBHIB'
+TARGET_FMT = '<HhhhhhhhhhhHHB'
+HEADER_SIZE = 11
+TARGET_SIZE = 27
+CRC_SIZE = 2
+
+def _crc_table():
+    table = array('H', [0] * 256)
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+        table[i] = crc
+    return table
+
+CRC_TABLE = _crc_table()
+
+def crc16(buf, start, end, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE（查表法）"""
+    table = CRC_TABLE
+    for i in range(start, end):
+        crc = ((crc << 8) & 0xFFFF) ^ table[((crc >> 8) ^ buf[i]) & 0xFF]
+    return crc
+
+class LegacyEncoder:
+    """旧版单轴误差帧"""
+
+    def __init__(self):
+        self.buf = bytearray(b'\x66\x66\x00\x00\xf6\xf6')
+
+    def encode(self, x_error):
+        """写入误差并返回帧缓冲区"""
+        struct.pack_into('<h', self.buf, 2, x_error)
+        return self.buf
+
+class FrameEncoderV2:
+    """v2 目标列表帧编码器
+
+    max_targets: 单帧最多批量发送的目标数
+    """
+
+    def __init__(self, max_targets=1):
+        self.max_targets = max_targets
+        self.buf = bytearray(HEADER_SIZE + max_targets * TARGET_SIZE + CRC_SIZE)
+        self.buf[0:2] = SYNC
+        # 按目标数预先切好视图，finish() 不再创建切片对象
+        mv = memoryview(self.buf)
+        self.views = [mv[:HEADER_SIZE + n * TARGET_SIZE + CRC_SIZE] for n in range(max_targets + 1)]
+        self.seq = 0
+        self.count = 0
+        self.timestamp = 0
+
+    def begin(self, timestamp_us):
+        """开始新的一帧"""
+        self.count = 0
+        self.timestamp = timestamp_us & 0xFFFFFFFF
+
+    def add_rect(self, track_id, x_error, y_error, x, y, w, h, confidence):
+        """加入轴对齐矩形目标（角点由矩形推出）；超过容量时返回 False"""
+        if self.count >= self.max_targets:
+            return False
+        struct.pack_into(TARGET_FMT, self.buf, HEADER_SIZE + self.count * TARGET_SIZE,
+                         track_id & 0xFFFF, x_error, y_error,
+                         x, y, x + w, y, x + w, y + h, x, y + h,
+                         w, h, confidence)
+        self.count += 1
+        return True
+
+    def add_quad(self, track_id, x_error, y_error, corners, w, h, confidence):
+        """加入四边形目标，corners 为 4 个 (x, y)（可为亚像素浮点，四舍五入）；超过容量时返回 False"""
+        if self.count >= self.max_targets:
+            return False
+        c0, c1, c2, c3 = corners
+        struct.pack_into(TARGET_FMT, self.buf, HEADER_SIZE + self.count * TARGET_SIZE,
+                         track_id & 0xFFFF, x_error, y_error,
+                         round(c0[0]), round(c0[1]), round(c1[0]), round(c1[1]),
+                         round(c2[0]), round(c2[1]), round(c3[0]), round(c3[1]),
+                         w, h, confidence)
+        self.count += 1
+        return True
+
+    def finish(self):
+        """写入帧头和CRC，返回本帧的 memoryview"""
+        buf = self.buf
+        struct.pack_into(HEADER_FMT, buf, 2, PROTOCOL_VERSION, MSG_TARGETS, self.seq,
+                         self.timestamp, self.count)
+        end = HEADER_SIZE + self.count * TARGET_SIZE
+        struct.pack_into('<H', buf, end, crc16(buf, 2, end))
+        self.seq = (self.seq + 1) & 0xFFFF
+        return self.views[self.count]
+
+class TextEncoderV2:
+    """v2 文本帧编码器（帧序号独立计数）
+
+    max_text: 单帧最多文本字节数（不超过 255，超出部分截断）
+    """
+
+    def __init__(self, max_text=96):
+        self.max_text = min(255, max_text)
+        self.buf = bytearray(HEADER_SIZE + self.max_text + CRC_SIZE)
+        self.buf[0:2] = SYNC
+        self.seq = 0
+
+    def encode(self, text, timestamp_us=0):
+        """编码一行文本，返回本帧的 memoryview"""
+        data = text.encode() if isinstance(text, str) else text
+        n = min(len(data), self.max_text)
+        buf = self.buf
+        struct.pack_into(HEADER_FMT, buf, 2, PROTOCOL_VERSION, MSG_TEXT, self.seq,
+                         timestamp_us & 0xFFFFFFFF, n)
+        buf[HEADER_SIZE:HEADER_SIZE + n] = data[:n]
+        end = HEADER_SIZE + n
+        struct.pack_into('<H', buf, end, crc16(buf, 2, end))
+        self.seq = (self.seq + 1) & 0xFFFF
+        return memoryview(buf)[:end + CRC_SIZE]
+
+def decode_text(frame):
+    """解码 v2 文本帧；返回 (seq, 文本)，不是文本帧或校验失败返回 None"""
+    if len(frame) < HEADER_SIZE + CRC_SIZE or bytes(frame[0:2]) != SYNC:
+        return None
+    version, msg, seq, timestamp, count = struct.unpack_from(HEADER_FMT, frame, 2)
+    end = HEADER_SIZE + count
+    if version != PROTOCOL_VERSION or msg != MSG_TEXT or len(frame) < end + CRC_SIZE:
+        return None
+    if struct.unpack_from('<H', frame, end)[0] != crc16(frame, 2, end):
+        return None
+    return (seq, bytes(frame[HEADER_SIZE:end]).decode())
+
+def decode_v2(frame):
+    """解码 v2 帧（供主机端测试和下位机参考）；返回 (seq, timestamp, targets)，校验失败返回 None
+
+    targets 为 (track_id, x_error, y_error, corners, w, h, confidence) 列表
+    """
+    if len(frame) < HEADER_SIZE + CRC_SIZE or bytes(frame[0:2]) != SYNC:
+        return None
+    version, msg, seq, timestamp, count = struct.unpack_from(HEADER_FMT, frame, 2)
+    end = HEADER_SIZE + count * TARGET_SIZE
+    if version != PROTOCOL_VERSION or msg != MSG_TARGETS or len(frame) < end + CRC_SIZE:
+        return None
+    if struct.unpack_from('<H', frame, end)[0] != crc16(frame, 2, end):
+        return None
+    targets = []
+    for n in range(count):
+        v = struct.unpack_from(TARGET_FMT, frame, HEADER_SIZE + n * TARGET_SIZE)
+        corners = ((v[3], v[4]), (v[5], v[6]), (v[7], v[8]), (v[9], v[10]))
+        targets.append((v[0], v[1], v[2], corners, v[11], v[12], v[13]))
+    return (seq, timestamp, targets)
@@ -1,60 +1,141 @@
 # K230 集成配置版矩形检测系统
 # 使用外部配置文件进行参数管理
 
-import time, os, gc, sys, image
+import time
+BOOT_T0 = time.ticks_us()  # 启动计时起点（其后的模块导入也计入启动耗时）
+import os, sys, image
 from media.sensor import *
 from media.display import *
 from media.media import *
 from machine import UART, Pin, FPIOA
-import cv_lite
-import math
+try:
+    import cv_lite
+except ImportError:
+    # 没有 cv_lite 的平台使用 NumPy 参考实现
+    import k230_cv_ref as cv_lite
+from array import array
+from k230_telemetry import *
+from k230_pipeline import Stage, FramePipeline
+from k230_gc_policy import GCScheduler
+from k230_protocol import LegacyEncoder, FrameEncoderV2, TextEncoderV2, HEADER_SIZE, TARGET_SIZE, CRC_SIZE
+from k230_boot import BootTimer
+# 可选功能的模块（多目标跟踪、发送队列、命令通道、自动调节、自适应 Canny、运动门控、流水线并行、
+# 角点排序/细化、ROI窗口）在启用时才导入，未启用的模块不占用启动时间和内存
 
-# 导入配置
+# 向量化候选筛选（可选）
 try:
-    from k230_config import DetectionConfig, get_detection_params, get_filter_params, get_rectangle_filter_params
-    CONFIG_AVAILABLE = True
+    from ulab import numpy as np
 except ImportError:
-    CONFIG_AVAILABLE = False
-    print("配置文件未找到，使用默认参数")
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+NP_FLOAT = getattr(np, 'float32', None) or getattr(np, 'float', None)
+
+# 导入配置：开发时每次运行都从 k230_config 读取；部署时由 k230_build.py 在此处插入常量块，
+# 并把不会在运行时修改的 DetectionConfig.X / AdvancedConfig.X 替换为编译期常量
+from k230_config import DetectionConfig, AdvancedConfig, PresetConfigs, get_detection_params, get_filter_params
+CONFIG_SOURCE = "k230_config（动态）"
 
 # 全局变量
 sensor = None
 uart1 = None
+uart_tx = None  # 非阻塞发送队列（关闭时直接 uart1.write）
+command_channel = None  # UART 命令通道
 coord_filter = None
-
-# 如果配置文件不可用，使用默认配置
-if not CONFIG_AVAILABLE:
-    class DetectionConfig:
-        DETECT_WIDTH = 320
-        DETECT_HEIGHT = 240
-        DISPLAY_MODE = "LCD"
-        MIN_AREA = 1500
-        MIN_ASPECT_RATIO = 0.6
-        MAX_ASPECT_RATIO = 1.6
-        FILTER_ALPHA = 0.3
-        MIN_FILTER_FRAMES = 2
-        UART_BAUDRATE = 115200
-        UART_TX_PIN = 3
-        UART_RX_PIN = 4
-        MAX_ERROR_RANGE = 100
-        ENABLE_GC_PER_FRAME = True
-        ENABLE_UART_ERROR_PRINT = True
+fixed_tracks = None  # 定点滤波阶段的预分配输出缓冲（环形使用，见 alloc_fixed_tracks）
+fixed_track_index = 0
+telemetry = None
+pipeline = None
+fps_clock = None
+detection_params = None
+canny_adapter = None  # 自适应 Canny 阈值（CANNY_MODE 为 FIXED 时为 None）
+corner_refiner = None  # 角点亚像素细化（未启用时为 None）
+motion_gate = None  # 运动门控（未启用时为 None）
+last_rects = None  # 最近一次 cv_lite 检测结果（运动门控跳过检测时沿用）
+osd_img = None  # 绑定显示模式的标记层图像（按标记区域大小分配，区域变大时才重新分配）
+osd_text_img = None  # 绑定显示模式的文字层图像（帧顶部窄条）
+osd_key = None  # 标记层当前内容的量化摘要（预分配的整数数组）
+osd_scratch = None  # 本帧摘要的写入缓冲，与 osd_key 交替使用
+osd_error = None  # 文字层当前显示的误差（整数像素）
+osd_text_dirty = True  # 文字层需要重绘（帧率刷新时置位）
+osd_fps = 0.0  # OSD 上显示的帧率（按 OSD_FPS_REFRESH_MS 刷新）
+osd_fps_ms = 0
+roi_window = None
+predictive_output = False  # UART 是否发送预测滤波后的误差
+tracker = None
+runner = None
+gc_scheduler = None
+governor = None  # 预设自动调节器
+legacy_encoder = LegacyEncoder()
+text_encoder = TextEncoderV2()  # 命令应答等文本帧
+uart_encoder = None  # V2 协议编码器，旧版协议时为 None
+target_id = 0  # 单目标模式下的目标ID（每次重新捕获目标时递增）
+target_hits = 0  # 单目标模式下连续命中帧数
+display_frame_count = 0
+display_last_ms = 0
+boot_timer = None  # 启动计时
+booting = True  # 首个有效UART帧发出前为 True
+display_deferred = False  # 快速启动：显示阶段尚未加入流水线
 
 # 使用配置参数
 DETECT_WIDTH = DetectionConfig.DETECT_WIDTH
 DETECT_HEIGHT = DetectionConfig.DETECT_HEIGHT
 IMAGE_CENTER_X = DETECT_WIDTH // 2
+IMAGE_CENTER_Y = DETECT_HEIGHT // 2
 DISPLAY_MODE = DetectionConfig.DISPLAY_MODE
+FAST_BOOT = DetectionConfig.FAST_BOOT
+
+# 绑定显示：显示通道直接绑定到视频层，叠加信息画在独立的 OSD 层
+BIND_DISPLAY = DetectionConfig.DISPLAY_PATH == "BIND" and DISPLAY_MODE != "NONE"
+
+# 双通道采集：检测通道直接输出灰度图，显示通道（RGB565）只在需要显示时配置和读取，
+# 两个通道的分辨率相互独立；单通道时显示的就是检测用的彩色帧。绑定显示需要双通道
+DUAL_CHANNEL = DetectionConfig.ENABLE_DUAL_CHANNEL or BIND_DISPLAY
+if DUAL_CHANNEL:
+    DETECT_CHN = CAM_CHN_ID_1
+    FRAME_WIDTH = DetectionConfig.DISPLAY_CHANNEL_WIDTH or DETECT_WIDTH
+    FRAME_HEIGHT = DetectionConfig.DISPLAY_CHANNEL_HEIGHT or DETECT_HEIGHT
+else:
+    DETECT_CHN = CAM_CHN_ID_0
+    FRAME_WIDTH = DETECT_WIDTH
+    FRAME_HEIGHT = DETECT_HEIGHT
+DISPLAY_CHN = CAM_CHN_ID_0
+OVERLAY_SX = FRAME_WIDTH / DETECT_WIDTH  # 检测坐标到显示帧坐标的缩放
+OVERLAY_SY = FRAME_HEIGHT / DETECT_HEIGHT
+OSD_GRID = 32  # 绑定显示标记层的尺寸/位置对齐粒度（显示帧像素）
+OSD_MARGIN = 12  # 标记层区域相对标记外框的余量（线宽、角点圆和ID文字）
+
+# 检测结果格式：每个矩形 [x, y, w, h]，或带角点时 [x, y, w, h, x0, y0, x1, y1, x2, y2, x3, y3]
+QUAD_CORNERS = DetectionConfig.ENABLE_QUAD_CORNERS \
+    and hasattr(cv_lite, 'grayscale_find_rectangles_with_corners')
+RECT_STRIDE = 12 if QUAD_CORNERS else 4
+if QUAD_CORNERS:
+    from k230_corners import CornerRefiner, order_corners
+if AdvancedConfig.ENABLE_ROI or DetectionConfig.ENABLE_PYRAMID:
+    from k230_roi import TrackingWindow, align_window
 
 # 根据显示模式设置分辨率
 if DISPLAY_MODE == "VIRT":
-    DISPLAY_WIDTH = DETECT_WIDTH
-    DISPLAY_HEIGHT = DETECT_HEIGHT
+    DISPLAY_WIDTH = FRAME_WIDTH
+    DISPLAY_HEIGHT = FRAME_HEIGHT
 elif DISPLAY_MODE == "LCD":
     DISPLAY_WIDTH = 640
     DISPLAY_HEIGHT = 480
+elif DISPLAY_MODE == "NONE":
+    # 无显示（部署机），不初始化显示器，不执行叠加绘制和显示
+    DISPLAY_WIDTH = DETECT_WIDTH
+    DISPLAY_HEIGHT = DETECT_HEIGHT
 else:
-    raise ValueError("Unknown DISPLAY_MODE, please select 'VIRT', 'LCD'")
+    raise ValueError("Unknown DISPLAY_MODE, please select 'VIRT', 'LCD', 'NONE'")
+
+# 显示帧在屏幕上的位置（LCD 居中）
+if DISPLAY_MODE == "LCD":
+    DISPLAY_X = (800 - FRAME_WIDTH) // 2
+    DISPLAY_Y = (480 - FRAME_HEIGHT) // 2
+else:
+    DISPLAY_X = 0
+    DISPLAY_Y = 0
 
 class SimpleMovingAverageFilter:
     """简化的移动平均滤波器"""
@@ -134,15 +215,267 @@ class OptimizedCoordinateFilter:
         self.center_filter.reset()
         self.data_count = 0
 
+FP_SHIFT = 8  # 定点数小数位（Q8）
+FP_ONE = 1 << FP_SHIFT
+
+class FixedPointFilterBank:
+    """定点指数移动平均滤波器组
+
+    四个角点和中心点的十个坐标存放在同一个预分配的整数数组中（Q8定点），
+    每帧一次循环完成全部更新，结果写入调用方提供的缓冲区，不产生浮点对象。
+    坐标顺序: x0, y0, x1, y1, x2, y2, x3, y3, cx, cy
+    """
+    
+    SIZE = 10
+    
+    def __init__(self, alpha=None):
+        filter_alpha = alpha if alpha else DetectionConfig.FILTER_ALPHA
+        self.alpha_q = int(filter_alpha * FP_ONE + 0.5)
+        self.state = array('i', [0] * self.SIZE)
+        self.initialized = False
+        
+    def update(self, coords):
+        """用十个整数坐标更新滤波器组"""
+        state = self.state
+        if not self.initialized:
+            for i in range(self.SIZE):
+                state[i] = coords[i] << FP_SHIFT
+            self.initialized = True
+            return
+        a = self.alpha_q
+        for i in range(self.SIZE):
+            s = state[i]
+            state[i] = s + ((a * ((coords[i] << FP_SHIFT) - s)) >> FP_SHIFT)
+    
+    def read(self, out):
+        """把滤波结果（整数像素）写入 out"""
+        state = self.state
+        for i in range(self.SIZE):
+            out[i] = state[i] >> FP_SHIFT
+        return out
+    
+    def reset(self):
+        """重置滤波器组"""
+        self.initialized = False
+
+class FixedPointCoordinateFilter:
+    """基于定点滤波器组的坐标滤波器，接口与 OptimizedCoordinateFilter 相同"""
+    
+    def __init__(self, alpha=None):
+        self.bank = FixedPointFilterBank(alpha)
+        self.coords = array('i', [0] * FixedPointFilterBank.SIZE)
+        self.out = array('i', [0] * FixedPointFilterBank.SIZE)
+        self.data_count = 0
+        self.min_frames = DetectionConfig.MIN_FILTER_FRAMES
+        
+    def add_corners(self, corners):
+        """添加角点坐标（中心点需随后由 add_center 提供；亚像素角点四舍五入到整数像素）"""
+        coords = self.coords
+        for i in range(4):
+            coords[2 * i] = int(corners[i][0] + 0.5)
+            coords[2 * i + 1] = int(corners[i][1] + 0.5)
+    
+    def add_center(self, center):
+        """添加中心点坐标并更新滤波器组"""
+        self.coords[8] = center[0]
+        self.coords[9] = center[1]
+        self.data_count += 1
+        self.bank.update(self.coords)
+    
+    def ready(self):
+        """是否已累计足够帧数输出滤波结果"""
+        return self.data_count >= self.min_frames
+    
+    def read(self, out=None):
+        """把滤波结果写入 out（默认内部缓冲区）并返回"""
+        return self.bank.read(out if out is not None else self.out)
+    
+    def get_filtered_corners(self):
+        """获取滤波后的角点"""
+        if not self.ready():
+            return None
+        out = self.read()
+        return [(out[0], out[1]), (out[2], out[3]), (out[4], out[5]), (out[6], out[7])]
+    
+    def get_filtered_center(self):
+        """获取滤波后的中心点"""
+        if not self.ready():
+            return None
+        out = self.read()
+        return (out[8], out[9])
+    
+    def reset(self):
+        """重置所有滤波器"""
+        self.bank.reset()
+        self.data_count = 0
+
+class AlphaBetaFilter:
+    """匀速模型 alpha-beta 滤波器：同时估计位置和速度（像素/毫秒）"""
+    
+    def __init__(self, alpha=None, beta=None):
+        self.alpha = alpha if alpha else DetectionConfig.FILTER_ALPHA
+        self.beta = beta if beta else DetectionConfig.FILTER_BETA
+        self.initialized = False
+        self.x = 0.0
+        self.y = 0.0
+        self.vx = 0.0
+        self.vy = 0.0
+        
+    def update(self, x, y, dt_ms):
+        """用新的测量值更新；dt_ms 为距上次更新的毫秒数"""
+        if not self.initialized or dt_ms <= 0 or dt_ms > 500:
+            # 首帧或长时间中断：重新初始化，速度清零
+            self.x = float(x)
+            self.y = float(y)
+            self.vx = 0.0
+            self.vy = 0.0
+            self.initialized = True
+            return
+        # 预测
+        px = self.x + self.vx * dt_ms
+        py = self.y + self.vy * dt_ms
+        # 校正
+        rx = x - px
+        ry = y - py
+        self.x = px + self.alpha * rx
+        self.y = py + self.alpha * ry
+        k = self.beta / dt_ms
+        self.vx += k * rx
+        self.vy += k * ry
+    
+    def get_position(self, lead_ms=0):
+        """获取位置，lead_ms > 0 时按速度外推"""
+        if not self.initialized:
+            return None
+        return (int(self.x + self.vx * lead_ms), int(self.y + self.vy * lead_ms))
+    
+    def reset(self):
+        """重置滤波器"""
+        self.initialized = False
+        self.vx = 0.0
+        self.vy = 0.0
+
+class PredictiveCoordinateFilter:
+    """预测型坐标滤波器：alpha-beta 跟踪并按测得的采集到发送延迟外推输出"""
+    
+    def __init__(self, alpha=None, beta=None, latency_comp=True, extra_latency_ms=0):
+        self.corner_filters = [AlphaBetaFilter(alpha, beta) for _ in range(4)]
+        self.center_filter = AlphaBetaFilter(alpha, beta)
+        self.data_count = 0
+        self.min_frames = DetectionConfig.MIN_FILTER_FRAMES
+        self.latency_comp = latency_comp
+        self.extra_latency_ms = extra_latency_ms
+        self.latency_ms = 0.0  # 平滑后的采集到UART发送延迟
+        self.last_ms = None
+        self.dt_ms = 0
+        
+    def add_corners(self, corners):
+        """添加角点坐标（同时记录本帧时间）"""
+        now = time.ticks_ms()
+        self.dt_ms = time.ticks_diff(now, self.last_ms) if self.last_ms is not None else 0
+        self.last_ms = now
+        self.data_count += 1
+        for i, (x, y) in enumerate(corners):
+            self.corner_filters[i].update(x, y, self.dt_ms)
+    
+    def add_center(self, center):
+        """添加中心点坐标"""
+        x, y = center
+        self.center_filter.update(x, y, self.dt_ms)
+    
+    def set_latency(self, latency_ms):
+        """更新测得的采集到发送延迟（指数平滑）"""
+        if self.latency_ms == 0.0:
+            self.latency_ms = float(latency_ms)
+        else:
+            self.latency_ms = 0.8 * self.latency_ms + 0.2 * latency_ms
+    
+    def lead_ms(self):
+        """输出外推时长"""
+        if not self.latency_comp:
+            return 0
+        return self.latency_ms + self.extra_latency_ms
+    
+    def get_filtered_corners(self):
+        """获取滤波（并外推）后的角点"""
+        if self.data_count < self.min_frames:
+            return None
+        lead = self.lead_ms()
+        filtered_corners = []
+        for corner_filter in self.corner_filters:
+            pos = corner_filter.get_position(lead)
+            if pos is None:
+                return None
+            filtered_corners.append(pos)
+        return filtered_corners
+    
+    def get_filtered_center(self):
+        """获取滤波（并外推）后的中心点"""
+        if self.data_count < self.min_frames:
+            return None
+        return self.center_filter.get_position(self.lead_ms())
+    
+    def reset(self):
+        """重置所有滤波器"""
+        for corner_filter in self.corner_filters:
+            corner_filter.reset()
+        self.center_filter.reset()
+        self.data_count = 0
+        self.last_ms = None
+
+def create_coordinate_filter():
+    """根据 get_filter_params() 创建坐标滤波器"""
+    params = get_filter_params()
+    if params['type'] == "ALPHA_BETA":
+        coord = PredictiveCoordinateFilter(params['alpha'], params['beta'],
+                                           params['latency_compensation'], params['extra_latency_ms'])
+    elif params['type'] == "EMA_FIXED":
+        coord = FixedPointCoordinateFilter(params['alpha'])
+    else:
+        coord = OptimizedCoordinateFilter(params['alpha'])
+    coord.min_frames = params['min_frames']
+    return coord
+
+def update_coordinate_filter(coord):
+    """按 get_filter_params() 更新已有坐标滤波器的参数，保留平滑状态（滤波器类型不允许运行时修改）"""
+    params = get_filter_params()
+    if isinstance(coord, FixedPointCoordinateFilter):
+        coord.bank.alpha_q = int(params['alpha'] * FP_ONE + 0.5)
+    else:
+        for f in coord.corner_filters:
+            f.alpha = params['alpha']
+        coord.center_filter.alpha = params['alpha']
+    if isinstance(coord, PredictiveCoordinateFilter):
+        for f in coord.corner_filters:
+            f.beta = params['beta']
+        coord.center_filter.beta = params['beta']
+        coord.latency_comp = params['latency_compensation']
+        coord.extra_latency_ms = params['extra_latency_ms']
+    coord.min_frames = params['min_frames']
+
+def load_detection_params():
+    """从当前配置生成 cv_lite 检测参数"""
+    return get_detection_params()
+
 def uart_init():
     """初始化UART串口"""
-    global uart1
+    global uart1, uart_tx, command_channel
     
     try:
         fpioa = FPIOA()
         fpioa.set_function(DetectionConfig.UART_TX_PIN, FPIOA.UART1_TXD)
         fpioa.set_function(DetectionConfig.UART_RX_PIN, FPIOA.UART1_RXD)
         uart1 = UART(UART.UART1, DetectionConfig.UART_BAUDRATE)
+        if DetectionConfig.ENABLE_UART_TX_QUEUE:
+            max_frame = HEADER_SIZE + max(1, AdvancedConfig.MAX_TARGETS) * TARGET_SIZE + CRC_SIZE
+            from k230_uart_tx import UartTxQueue
+            # 通过串口发送的遥测报告：每个阶段一个文本帧
+            report = DetectionConfig.ENABLE_TELEMETRY and DetectionConfig.TELEMETRY_OUTPUT == "UART"
+            uart_tx = UartTxQueue(uart1, DetectionConfig.UART_BAUDRATE, max_frame,
+                                  max_text=STAGE_COUNT * 48 if report else 0)
+        if DetectionConfig.ENABLE_UART_COMMANDS:
+            from k230_commands import CommandChannel
+            command_channel = CommandChannel(uart1)
         return True
     except Exception as e:
         if DetectionConfig.ENABLE_UART_ERROR_PRINT:
@@ -151,28 +484,81 @@ def uart_init():
 
 def camera_init():
     """初始化摄像头"""
-    global sensor
+    global sensor, display_deferred
     
     try:
-        sensor = Sensor(width=DETECT_WIDTH, height=DETECT_HEIGHT)
+        sensor = Sensor(width=max(DETECT_WIDTH, FRAME_WIDTH), height=max(DETECT_HEIGHT, FRAME_HEIGHT))
         sensor.reset()
+        boot_timer.mark("sensor_reset")
         
-        sensor.set_framesize(width=DETECT_WIDTH, height=DETECT_HEIGHT)
-        sensor.set_pixformat(Sensor.RGB565)
+        if DUAL_CHANNEL:
+            sensor.set_framesize(width=DETECT_WIDTH, height=DETECT_HEIGHT, chn=DETECT_CHN)
+            if DISPLAY_MODE != "NONE":
+                sensor.set_framesize(width=FRAME_WIDTH, height=FRAME_HEIGHT, chn=DISPLAY_CHN)
+            boot_timer.mark("framesize")
+            # 检测通道由ISP直接输出灰度图，省去每帧的颜色转换和灰度缓冲区分配
+            sensor.set_pixformat(Sensor.GRAYSCALE, chn=DETECT_CHN)
+            if DISPLAY_MODE != "NONE":
+                # 绑定显示时视频层直接显示传感器输出，Python 不接触这些像素
+                sensor.set_pixformat(Sensor.YUV420SP if BIND_DISPLAY else Sensor.RGB565, chn=DISPLAY_CHN)
+        else:
+            sensor.set_framesize(width=DETECT_WIDTH, height=DETECT_HEIGHT)
+            boot_timer.mark("framesize")
+            sensor.set_pixformat(Sensor.RGB565)
+        boot_timer.mark("pixformat")
         
-        if DISPLAY_MODE == "VIRT":
-            Display.init(Display.VIRT, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT, fps=100, to_ide=True)
-        elif DISPLAY_MODE == "LCD":
-            Display.init(Display.ST7701, width=800, height=480, to_ide=True)
+        # 显示必须在 MediaManager 之前初始化；快速启动只推迟显示阶段（绘制和 show_image）
+        display_deferred = FAST_BOOT and DISPLAY_MODE != "NONE"
+        display_init()
+        boot_timer.mark("display_init")
         
         MediaManager.init()
+        boot_timer.mark("media_init")
         sensor.run()
+        boot_timer.mark("sensor_run")
         
         return True
     except Exception as e:
         print(f"摄像头初始化失败: {e}")
         return False
 
+def display_init():
+    """初始化显示（含IDE图像传输）；需在 MediaManager.init() 之前调用"""
+    if BIND_DISPLAY:
+        Display.bind_layer(**sensor.bind_info(x=DISPLAY_X, y=DISPLAY_Y, chn=DISPLAY_CHN),
+                           layer=Display.LAYER_VIDEO1)
+    # 绑定显示时叠加画在 OSD0（标记）和 OSD1（文字）两层，须预留两个 OSD 层
+    osd_num = 2 if BIND_DISPLAY else 1
+    if DISPLAY_MODE == "VIRT":
+        Display.init(Display.VIRT, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT, fps=100, to_ide=True,
+                     osd_num=osd_num)
+    elif DISPLAY_MODE == "LCD":
+        Display.init(Display.ST7701, width=800, height=480, to_ide=True, osd_num=osd_num)
+
+def display_late_init():
+    """快速启动：检测输出开始后再启用显示
+
+    显示在 camera_init 中已经初始化（必须早于 MediaManager），这里只分配 OSD 并重建流水线，
+    加入之前推迟的绘制和显示阶段；传感器和媒体管线不重启，UART 输出不中断
+    """
+    global display_deferred, pipeline
+    display_deferred = False
+    if BIND_DISPLAY and DetectionConfig.ENABLE_OVERLAY:
+        osd_alloc()
+    pipeline = build_pipeline()
+    boot_timer.mark("display_late")
+
+def boot_frame_end():
+    """启动阶段的帧尾：首个有效UART帧发出（或等待超时）后启用延后的显示阶段，并输出启动报告"""
+    global booting
+    if display_deferred and (boot_timer.complete
+                             or boot_timer.elapsed_ms() >= DetectionConfig.FAST_BOOT_DISPLAY_TIMEOUT_MS):
+        display_late_init()
+    if boot_timer.complete:
+        booting = False
+        if DetectionConfig.BOOT_REPORT:
+            boot_timer.print_report()
+
 def uart_deinit():
     """释放UART串口资源"""
     global uart1
@@ -189,7 +575,8 @@ def camera_deinit():
     try:
         if sensor:
             sensor.stop()
-        Display.deinit()
+        if DISPLAY_MODE != "NONE":
+            Display.deinit()
         os.exitpoint(os.EXITPOINT_ENABLE_SLEEP)
         time.sleep_ms(100)
         MediaManager.deinit()
@@ -197,13 +584,13 @@ def camera_deinit():
         pass
 
 def calculate_center_fast(corners):
-    """快速计算矩形中心点"""
+    """快速计算矩形中心点（四舍五入，亚像素角点在整数边界附近不会来回跳变）"""
     if len(corners) != 4:
         return None
     
     cx = sum(corner[0] for corner in corners) / 4
     cy = sum(corner[1] for corner in corners) / 4
-    return (int(cx), int(cy))
+    return (int(cx + 0.5), int(cy + 0.5))
 
 def send_uart_data(x_error):
     """发送UART数据"""
@@ -211,37 +598,113 @@ def send_uart_data(x_error):
         return False
     
     try:
-        error_int = max(-DetectionConfig.MAX_ERROR_RANGE, 
-                       min(DetectionConfig.MAX_ERROR_RANGE, int(x_error)))
-        
-        if error_int < 0:
-            error_bytes = (error_int + 65536).to_bytes(2, 'little')
+        uart_write(legacy_encoder.encode(clamp_error(x_error)))
+        if booting:
+            boot_timer.output()
+        return True
+    except Exception as e:
+        if DetectionConfig.ENABLE_UART_ERROR_PRINT:
+            print(f"UART发送失败: {e}")
+        return False
+
+def uart_write(frame):
+    """经发送队列（启用时）写出一帧"""
+    if uart_tx is not None:
+        uart_tx.submit(frame)
+    else:
+        uart1.write(frame)
+
+def uart_text(text):
+    """以 v2 文本帧发送一行文本（启用发送队列时排在控制帧之前，不被合并）"""
+    frame = text_encoder.encode(text, time.ticks_us())
+    if uart_tx is not None:
+        uart_tx.submit_reply(frame)
+    else:
+        uart1.write(frame)
+
+def uart_report(text):
+    """以 v2 文本帧发送一行遥测报告（启用发送队列时只在没有待发控制帧时发送，不打断控制帧）"""
+    frame = text_encoder.encode(text, time.ticks_us())
+    if uart_tx is not None:
+        uart_tx.submit_text(frame)
+    else:
+        uart1.write(frame)
+
+def clamp_error(value):
+    """误差限幅到 +/-MAX_ERROR_RANGE"""
+    return max(-DetectionConfig.MAX_ERROR_RANGE, min(DetectionConfig.MAX_ERROR_RANGE, int(value)))
+
+def target_confidence(hits):
+    """连续命中帧数映射为 0-255 置信度"""
+    full = DetectionConfig.UART_CONFIDENCE_FRAMES
+    return 255 if hits >= full else hits * 255 // full
+
+def send_uart_v2(rect, center, capture_us, corners=None):
+    """发送 V2 目标帧；rect/center/corners 为主目标，None 表示本帧无目标"""
+    if not uart1:
+        return False
+    
+    enc = uart_encoder
+    enc.begin(capture_us)
+    if rect is not None:
+        if tracker is not None:
+            tid = tracker.ids[tracker.primary]
+            conf = target_confidence(tracker.hits[tracker.primary])
         else:
-            error_bytes = error_int.to_bytes(2, 'little')
-        
-        frame_data = bytes([0x66, 0x66]) + error_bytes + bytes([0xf6, 0xf6])
-        uart1.write(frame_data)
+            tid = target_id
+            conf = target_confidence(target_hits)
+        x_error = clamp_error(center[0] - IMAGE_CENTER_X)
+        y_error = clamp_error(center[1] - IMAGE_CENTER_Y)
+        if corners is None:
+            enc.add_rect(tid, x_error, y_error, int(rect[0]), int(rect[1]), int(rect[2]), int(rect[3]), conf)
+        else:
+            enc.add_quad(tid, x_error, y_error, corners, int(rect[2]), int(rect[3]), conf)
+    if tracker is not None and DetectionConfig.UART_BATCH_TARGETS:
+        for t in range(tracker.max_targets):
+            if t == tracker.primary or not tracker.is_reported(t):
+                continue
+            x = int(tracker.x[t])
+            y = int(tracker.y[t])
+            w = int(tracker.w[t])
+            h = int(tracker.h[t])
+            enc.add_rect(tracker.ids[t], clamp_error(x + w // 2 - IMAGE_CENTER_X),
+                         clamp_error(y + h // 2 - IMAGE_CENTER_Y), x, y, w, h,
+                         target_confidence(tracker.hits[t]))
+    
+    try:
+        uart_write(enc.finish())
+        if booting and rect is not None:
+            boot_timer.output()
         return True
     except Exception as e:
         if DetectionConfig.ENABLE_UART_ERROR_PRINT:
             print(f"UART发送失败: {e}")
         return False
 
+ASPECT_SLACK = 1e-3  # 向量化预筛选的宽高比放宽量（远大于 float32 舍入误差）
+
 def process_rectangles(rects_data):
-    """处理矩形检测结果"""
+    """处理矩形检测结果：一次遍历筛选并取面积最大者，返回 (x, y, w, h, area, 下标) 或 None"""
     if not rects_data or len(rects_data) < 4:
         return None
     
-    filtered_rects = []
+    stride = RECT_STRIDE
+    count = len(rects_data) // stride
+    if np is not None and count >= DetectionConfig.VECTORIZE_MIN_CANDIDATES:
+        return process_rectangles_vectorized(rects_data, count)
     
-    for i in range(0, len(rects_data), 4):
-        if i + 3 >= len(rects_data):
-            break
-            
-        x, y, w, h = rects_data[i:i+4]
+    min_area = DetectionConfig.MIN_AREA
+    min_ratio = DetectionConfig.MIN_ASPECT_RATIO
+    max_ratio = DetectionConfig.MAX_ASPECT_RATIO
+    best_i = -1
+    best_area = 0
+    
+    for i in range(0, count * stride, stride):
+        w = rects_data[i + 2]
+        h = rects_data[i + 3]
         
         area = w * h
-        if area < DetectionConfig.MIN_AREA:
+        if area < min_area or area <= best_area:
             continue
             
         if h == 0:
@@ -249,143 +712,915 @@ def process_rectangles(rects_data):
             
         aspect_ratio = w / h
         
-        if DetectionConfig.MIN_ASPECT_RATIO <= aspect_ratio <= DetectionConfig.MAX_ASPECT_RATIO:
-            rect_info = {
-                'x': x, 'y': y, 'w': w, 'h': h,
-                'area': area, 'aspect_ratio': aspect_ratio
-            }
-            filtered_rects.append(rect_info)
-    
-    if filtered_rects:
-        return max(filtered_rects, key=lambda r: r['area'])
+        if min_ratio <= aspect_ratio <= max_ratio:
+            best_i = i
+            best_area = area
+    
+    if best_i < 0:
+        return None
+    return (rects_data[best_i], rects_data[best_i + 1], rects_data[best_i + 2],
+            rects_data[best_i + 3], best_area, best_i)
+
+def process_rectangles_vectorized(rects_data, count):
+    """候选很多时使用 ulab/numpy 向量化筛选，结果与 process_rectangles 相同
+
+    向量化部分只做放宽了 ASPECT_SLACK 的预筛选（float32 乘法在比例边界上与标量除法的舍入不同），
+    再按面积从大到小用与 process_rectangles 完全相同的标量判据确认，边界上的取舍与候选数无关
+    """
+    stride = RECT_STRIDE
+    data = np.array(rects_data[:count * stride], dtype=NP_FLOAT)
+    w = data[2::stride]
+    h = data[3::stride]
+    area = w * h
+    min_area = DetectionConfig.MIN_AREA
+    min_ratio = DetectionConfig.MIN_ASPECT_RATIO
+    max_ratio = DetectionConfig.MAX_ASPECT_RATIO
+    # h > 0 时 min_ratio <= w/h <= max_ratio 等价于 min_ratio*h <= w <= max_ratio*h
+    loose = (area >= min_area - 0.5) * (h > 0) \
+        * (w >= (min_ratio - ASPECT_SLACK) * h) * (w <= (max_ratio + ASPECT_SLACK) * h)
+    scores = area * loose
+    for _ in range(count):
+        # argmax 返回最大值的第一个下标，与标量路径"面积严格更大才替换"的取舍一致
+        k = int(np.argmax(scores))
+        if scores[k] <= 0:
+            return None
+        i = k * stride
+        rw = rects_data[i + 2]
+        rh = rects_data[i + 3]
+        if rw * rh >= min_area and rh != 0 and min_ratio <= rw / rh <= max_ratio:
+            return (rects_data[i], rects_data[i + 1], rw, rh, rw * rh, i)
+        scores[k] = 0
     return None
 
-def draw_detection_info(img, max_rect, center, x_error, fps_val):
-    """绘制检测信息"""
+def quad_corners(rects_data, i):
+    """带角点格式中下标 i 处矩形的四个顶点，按 左上、右上、右下、左下 排列"""
+    q = order_corners(rects_data[i + 4:i + 12], array('f', [0.0] * 8))
+    return [(q[0], q[1]), (q[2], q[3]), (q[4], q[5]), (q[6], q[7])]
+
+def draw_markers(img, max_rect, center, roi=None, corners=None, ox=0, oy=0):
+    """绘制ROI、目标轮廓、角点和中心（有四边形角点时按顶点绘制轮廓）
+
+    坐标按检测图像给出，缩放到显示帧；(ox, oy) 为 img 左上角在显示帧中的位置
+    """
+    sx = OVERLAY_SX
+    sy = OVERLAY_SY
+    if roi:
+        img.draw_rectangle([int(roi[0] * sx) - ox, int(roi[1] * sy) - oy, int(roi[2] * sx), int(roi[3] * sy)],
+                           color=(255, 255, 0), thickness=1)
+    
     if max_rect:
-        x, y, w, h = max_rect['x'], max_rect['y'], max_rect['w'], max_rect['h']
-        img.draw_rectangle([x, y, w, h], color=(0, 255, 0), thickness=2)
-        
-        corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+        x, y, w, h = int(max_rect[0] * sx) - ox, int(max_rect[1] * sy) - oy, int(max_rect[2] * sx), int(max_rect[3] * sy)
+        if corners is None:
+            img.draw_rectangle([x, y, w, h], color=(0, 255, 0), thickness=2)
+            corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+        else:
+            corners = [(int(c[0] * sx) - ox, int(c[1] * sy) - oy) for c in corners]
+            for k in range(4):
+                a = corners[k]
+                b = corners[(k + 1) & 3]
+                img.draw_line(a[0], a[1], b[0], b[1], color=(0, 255, 0), thickness=2)
         for corner in corners:
             img.draw_circle(corner[0], corner[1], 5, color=(255, 0, 0), thickness=2)
         
         if center:
-            img.draw_circle(center[0], center[1], 8, color=(0, 0, 255), thickness=2)
+            img.draw_circle(int(center[0] * sx) - ox, int(center[1] * sy) - oy, 8, color=(0, 0, 255), thickness=2)
     
-    img.draw_circle(IMAGE_CENTER_X, DETECT_HEIGHT // 2, 3, color=(255, 255, 0), thickness=2)
-    
-    img.draw_string_advanced(5, 5, 16, f"FPS: {fps_val:.1f}", color=(255, 255, 255, 0))
-    img.draw_string_advanced(5, 25, 16, f"Mode: {DISPLAY_MODE}", color=(255, 255, 255, 0))
+    img.draw_circle(FRAME_WIDTH // 2 - ox, FRAME_HEIGHT // 2 - oy, 3, color=(255, 255, 0), thickness=2)
+
+def draw_info_text(img, fps_val, x_error):
+    """绘制帧率、显示模式和误差文字（帧顶部 OSD_TEXT_HEIGHT 像素内）"""
+    img.draw_string_advanced(5, 5, 16, f"FPS: {fps_val:.1f}", color=(255, 255, 255))
+    img.draw_string_advanced(5, 25, 16, f"Mode: {DISPLAY_MODE}", color=(255, 255, 255))
     
     if x_error is not None:
-        img.draw_string_advanced(DETECT_WIDTH - 150, 5, 16, f"Error: {x_error:.1f}", color=(0, 255, 255, 0))
+        img.draw_string_advanced(FRAME_WIDTH - 150, 5, 16, f"Error: {x_error:.1f}", color=(0, 255, 255))
+
+def draw_detection_info(img, max_rect, center, x_error, fps_val, roi=None, corners=None):
+    """绘制检测信息（标记和文字画在同一图像上）"""
+    draw_markers(img, max_rect, center, roi, corners)
+    draw_info_text(img, fps_val, x_error)
+
+# ---------------------------------------------------------------------------
+# 流水线阶段
+# ---------------------------------------------------------------------------
+
+def stage_snapshot():
+    """采集一帧"""
+    return sensor.snapshot()
+
+def stage_snapshot_gray():
+    """双通道：采集检测通道的灰度帧"""
+    return sensor.snapshot(chn=DETECT_CHN)
+
+def stage_snapshot_display():
+    """双通道：采集显示通道的彩色帧（只在显示阶段需要时执行）"""
+    return sensor.snapshot(chn=DISPLAY_CHN)
+
+def stage_capture_time(img):
+    """记录本帧采集完成时间（微秒）"""
+    return time.ticks_us()
+
+def stage_grayscale(img):
+    """转换为灰度图"""
+    return img.to_grayscale()
+
+def stage_otsu_threshold(img_gray):
+    """计算全局OTSU阈值"""
+    hist = img_gray.get_histogram()
+    return hist.get_threshold().value()
+
+def stage_otsu_binary(img_gray, threshold):
+    """按OTSU阈值二值化（原地）"""
+    return img_gray.binary([(threshold, 255)])
+
+def stage_adaptive_binary(img_gray):
+    """局部自适应阈值二值化（原地）；THRESHOLD_C 与 OpenCV 的 C 含义相同"""
+    return img_gray.mean(AdvancedConfig.THRESHOLD_BLOCK_SIZE // 2, threshold=True,
+                         offset=-AdvancedConfig.THRESHOLD_C)
+
+def stage_morphology(img_binary):
+    """闭运算，填补背景中的暗色噪点，减少伪轮廓"""
+    return img_binary.close(AdvancedConfig.MORPH_KERNEL_SIZE // 2)
+
+def stage_motion(img_gray):
+    """与上次检测时的参考帧比较；返回本帧是否需要检测"""
+    return motion_gate.check(img_gray)
+
+def stage_canny_adapt(img_gray):
+    """由直方图更新 Canny 阈值（漂移超过容差时才改写检测参数）"""
+    if canny_adapter.update(img_gray):
+        canny_adapter.apply(detection_params)
+
+def find_rects(img, width, height, area_min_ratio, blur_size):
+    """对整幅图像调用 cv_lite 矩形检测（QUAD_CORNERS 时同时返回多边形顶点）"""
+    find = cv_lite.grayscale_find_rectangles_with_corners if QUAD_CORNERS \
+        else cv_lite.grayscale_find_rectangles
+    return find(
+        [height, width], img.to_numpy_ref(),
+        detection_params['canny_thresh1'],
+        detection_params['canny_thresh2'],
+        detection_params['approx_epsilon'],
+        area_min_ratio,
+        detection_params['max_angle_cos'],
+        blur_size
+    )
+
+def find_rects_in_window(img_src, roi):
+    """只在窗口 roi 内检测，结果换算回全帧坐标"""
+    rx, ry, rw, rh = roi
+    img_roi = img_src.copy(roi=roi)
+    # 按面积换算最小面积比例，保持与全帧搜索相同的绝对面积下限
+    area_min_ratio = min(0.5, detection_params['area_min_ratio'] * DETECT_WIDTH * DETECT_HEIGHT / (rw * rh))
+    rects_data = find_rects(img_roi, rw, rh, area_min_ratio, detection_params['gaussian_blur_size'])
+    stride = RECT_STRIDE
+    for i in range(0, len(rects_data) - stride + 1, stride):
+        rects_data[i] += rx
+        rects_data[i + 1] += ry
+        for k in range(i + 4, i + stride, 2):
+            rects_data[k] += rx
+            rects_data[k + 1] += ry
+    return rects_data
+
+def find_rects_pyramid(img_src):
+    """由粗到精：缩小图上找候选，再在全分辨率的候选窗口内精检"""
+    scale = DetectionConfig.PYRAMID_SCALE
+    img_small = img_src.mean_pooled(scale, scale)
+    coarse = find_rects(img_small, DETECT_WIDTH // scale, DETECT_HEIGHT // scale,
+                        detection_params['area_min_ratio'], DetectionConfig.PYRAMID_COARSE_BLUR_SIZE)
+    for i in range(len(coarse)):
+        coarse[i] *= scale
+    if not DetectionConfig.PYRAMID_REFINE:
+        return coarse
+    
+    best = process_rectangles(coarse)
+    if not best:
+        return coarse
+    x, y, w, h = best[0], best[1], best[2], best[3]
+    mx = max(2 * scale, int(w * DetectionConfig.PYRAMID_REFINE_MARGIN))
+    my = max(2 * scale, int(h * DetectionConfig.PYRAMID_REFINE_MARGIN))
+    roi = align_window(x - mx, y - my, w + 2 * mx, h + 2 * my, DETECT_WIDTH, DETECT_HEIGHT)
+    fine = find_rects_in_window(img_src, roi)
+    # 精检失败时退回粗检测结果（精度较低但不丢帧）
+    return fine if fine else coarse
+
+def stage_find_rects(img_src):
+    """cv_lite 矩形检测；启用ROI时只搜索窗口内，启用金字塔时由粗到精"""
+    roi = roi_window.window() if roi_window else None
+    if roi is not None:
+        return find_rects_in_window(img_src, roi)
+    if DetectionConfig.ENABLE_PYRAMID:
+        return find_rects_pyramid(img_src)
+    return find_rects(img_src, DETECT_WIDTH, DETECT_HEIGHT, detection_params['area_min_ratio'],
+                      detection_params['gaussian_blur_size'])
+
+def stage_find_rects_gated(img_src, run):
+    """运动门控：场景无变化时沿用上次的检测结果（下游阶段照常执行）"""
+    global last_rects
+    if run or last_rects is None:
+        last_rects = stage_find_rects(img_src)
+    return last_rects
+
+def stage_process(rects_data):
+    """筛选最大矩形，计算角点、中心和误差；返回 (max_rect, corners, center, x_error) 或 None"""
+    global target_id, target_hits
+    max_rect = process_rectangles(rects_data)
+    if not max_rect:
+        target_hits = 0
+        if roi_window:
+            roi_window.miss()
+        if motion_gate:
+            motion_gate.miss()
+        return None
+    if target_hits == 0:
+        target_id = (target_id + 1) & 0xFFFF
+    target_hits += 1
+    x, y, w, h = max_rect[0], max_rect[1], max_rect[2], max_rect[3]
+    if roi_window:
+        roi_window.update(x, y, w, h)
+    if motion_gate:
+        motion_gate.track(x, y, w, h)
+    if QUAD_CORNERS:
+        corners = quad_corners(rects_data, max_rect[5])
+    else:
+        corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+    center = calculate_center_fast(corners)
+    
+    x_error = center[0] - IMAGE_CENTER_X
+    x_error = max(-DetectionConfig.MAX_ERROR_RANGE, 
+                 min(DetectionConfig.MAX_ERROR_RANGE, x_error))
+    return (max_rect, corners, center, x_error)
+
+def stage_track_targets(rects_data):
+    """多目标跟踪：更新所有轨迹，返回主目标 (rect, corners, center, x_error) 或 None"""
+    p = tracker.update(rects_data)
+    if roi_window or motion_gate:
+        bounds = tracker.bounds()
+        if roi_window:
+            if bounds:
+                roi_window.update(*bounds)
+            else:
+                roi_window.miss()
+        if motion_gate:
+            if bounds:
+                motion_gate.track(*bounds)
+            else:
+                motion_gate.miss()
+    if p < 0:
+        return None
+    x, y, w, h = tracker.rect(p)
+    if QUAD_CORNERS:
+        # 本帧关联到的原始顶点平移到轨迹平滑后的位置
+        i = tracker.source[p]
+        dx = x - rects_data[i]
+        dy = y - rects_data[i + 1]
+        corners = [(cx + dx, cy + dy) for cx, cy in quad_corners(rects_data, i)]
+    else:
+        corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+    center = calculate_center_fast(corners)
+    
+    x_error = center[0] - IMAGE_CENTER_X
+    x_error = max(-DetectionConfig.MAX_ERROR_RANGE, 
+                 min(DetectionConfig.MAX_ERROR_RANGE, x_error))
+    return ((x, y, w, h), corners, center, x_error)
+
+def stage_refine_corners(target, img):
+    """在每个顶点周围的小窗口内做亚像素细化，并由细化后的角点重算中心和误差"""
+    if target is None:
+        return None
+    max_rect, corners, center, x_error = target
+    coords = array('f', [0.0] * 8)
+    for k in range(4):
+        coords[2 * k] = corners[k][0]
+        coords[2 * k + 1] = corners[k][1]
+    corner_refiner.refine(img.to_numpy_ref(), coords)
+    corners = [(coords[0], coords[1]), (coords[2], coords[3]), (coords[4], coords[5]), (coords[6], coords[7])]
+    center = calculate_center_fast(corners)
+    x_error = center[0] - IMAGE_CENTER_X
+    x_error = max(-DetectionConfig.MAX_ERROR_RANGE, 
+                 min(DetectionConfig.MAX_ERROR_RANGE, x_error))
+    return (max_rect, corners, center, x_error)
+
+def stage_filter(target):
+    """更新坐标滤波器；返回用于显示的 (display_rect, display_center, x_error, corners) 或 None"""
+    if target is None:
+        coord_filter.reset()
+        return None
+    max_rect, corners, center, x_error = target
+    coord_filter.add_corners(corners)
+    coord_filter.add_center(center)
+    
+    filtered_corners = coord_filter.get_filtered_corners()
+    filtered_center = coord_filter.get_filtered_center()
+    
+    display_rect = max_rect
+    display_center = filtered_center if filtered_center else center
+    
+    if predictive_output and filtered_center:
+        # 预测模式下误差取外推后的中心，反映目标当前位置
+        x_error = filtered_center[0] - IMAGE_CENTER_X
+        x_error = max(-DetectionConfig.MAX_ERROR_RANGE, 
+                     min(DetectionConfig.MAX_ERROR_RANGE, x_error))
+    
+    if filtered_corners:
+        min_x = min(corner[0] for corner in filtered_corners)
+        max_x = max(corner[0] for corner in filtered_corners)
+        min_y = min(corner[1] for corner in filtered_corners)
+        max_y = max(corner[1] for corner in filtered_corners)
+        
+        display_rect = (min_x, min_y, max_x - min_x, max_y - min_y)
+    return (display_rect, display_center, x_error, filtered_corners or corners)
+
+def alloc_fixed_tracks(count):
+    """定点滤波阶段的输出缓冲：每项为 [框, 中心, 误差, 角点]，框/中心/角点都是整数数组
+
+    流水线模式下显示线程可能还在读上一帧的结果，因此按 count 项轮流使用
+    """
+    return [[array('i', [0] * 4), array('i', [0] * 2), 0.0, [array('i', [0, 0]) for _ in range(4)]]
+            for _ in range(count)]
+
+def stage_filter_fixed(target):
+    """定点滤波器组：一次更新十个坐标，结果写入预分配的输出缓冲（每帧不构造元组和列表）"""
+    global fixed_track_index
+    if target is None:
+        coord_filter.reset()
+        return None
+    corners = target[1]
+    coord_filter.add_corners(corners)
+    coord_filter.add_center(target[2])
+    # 滤波器累计帧数不足时输出本帧（取整后的）原始坐标
+    out = coord_filter.read() if coord_filter.ready() else coord_filter.coords
+    fixed_track_index += 1
+    if fixed_track_index >= len(fixed_tracks):
+        fixed_track_index = 0
+    track = fixed_tracks[fixed_track_index]
+    rect = track[0]
+    quad = track[3]
+    for k in range(4):
+        quad[k][0] = out[2 * k]
+        quad[k][1] = out[2 * k + 1]
+    rect[0] = min(out[0], out[2], out[4], out[6])
+    rect[1] = min(out[1], out[3], out[5], out[7])
+    rect[2] = max(out[0], out[2], out[4], out[6]) - rect[0]
+    rect[3] = max(out[1], out[3], out[5], out[7]) - rect[1]
+    track[1][0] = out[8]
+    track[1][1] = out[9]
+    track[2] = target[3]
+    return track
+
+def stage_unfiltered(target):
+    """滤波关闭时直接使用原始检测结果显示"""
+    if target is None:
+        return None
+    max_rect, corners, center, x_error = target
+    return (max_rect, center, x_error, corners)
+
+def stage_output(target):
+    """发送UART数据"""
+    if target is not None:
+        send_uart_data(target[3])
+
+def stage_output_v2(target, capture_us):
+    """发送 V2 目标帧（无目标时也发送，N = 0）"""
+    if target is None:
+        send_uart_v2(None, None, capture_us)
+    else:
+        send_uart_v2(target[0], target[2], capture_us, target[1])
+
+def stage_output_predicted(track, capture_us):
+    """发送预测滤波后的误差，并测量采集到发送的延迟供下一帧外推"""
+    if uart_encoder is not None:
+        if track is None:
+            send_uart_v2(None, None, capture_us)
+        else:
+            send_uart_v2(track[0], track[1], capture_us, track[3])
+    elif track is not None:
+        send_uart_data(track[2])
+    if track is not None:
+        coord_filter.set_latency(time.ticks_diff(time.ticks_us(), capture_us) / 1000)
+
+def stage_uart_text():
+    """发送排队的文本帧"""
+    uart_tx.pump()
+
+def stage_observe(target):
+    """把本帧检测结果交给预设调节器"""
+    governor.observe(None if target is None else target[2])
+
+def stage_display_gate(img):
+    """显示抽帧：按 DISPLAY_EVERY_N 和 DISPLAY_MAX_FPS 决定本帧是否显示，不显示时返回 None"""
+    global display_frame_count, display_last_ms
+    display_frame_count += 1
+    if display_frame_count % DetectionConfig.DISPLAY_EVERY_N:
+        return None
+    if DetectionConfig.DISPLAY_MAX_FPS > 0:
+        now = time.ticks_ms()
+        if time.ticks_diff(now, display_last_ms) < 1000 // DetectionConfig.DISPLAY_MAX_FPS:
+            return None
+        display_last_ms = now
+    return img
+
+def draw_overlay(img, track, fps_val):
+    """绘制轨迹和主目标信息"""
+    roi = roi_window.roi if roi_window else None
+    if tracker:
+        draw_tracks(img, tracker)
+    if track is None:
+        draw_detection_info(img, None, None, None, fps_val, roi)
+    else:
+        draw_detection_info(img, track[0], track[1], track[2], fps_val, roi, track[3])
+
+def stage_overlay(img, track):
+    """绘制检测信息"""
+    if img is None:
+        return None
+    draw_overlay(img, track, fps_clock.fps())
+    return img
+
+def osd_alloc():
+    """绑定显示：分配文字层和摘要缓冲；标记层在首次重绘时按标记区域分配"""
+    global osd_img, osd_text_img, osd_key, osd_scratch, osd_error, osd_text_dirty
+    osd_text_img = image.Image(FRAME_WIDTH, DetectionConfig.OSD_TEXT_HEIGHT, image.ARGB8888)
+    osd_img = None
+    n = 20 + 6 * (tracker.max_targets if tracker else 0)
+    osd_key = array('i', [-1] * n)
+    osd_scratch = array('i', [0] * n)
+    osd_error = None
+    osd_text_dirty = True
+
+def overlay_key(key, track):
+    """把标记层内容按 OSD_QUANT_PX 量化写入预分配的摘要数组（只写整数，不构造元组）
+
+    布局：[0:4] ROI，[4] 有无主目标，[5:9] 主目标框，[9:11] 中心，[11:19] 角点，
+    [19] 主轨迹槽位，之后每条轨迹 6 项（是否输出、ID、x、y、w、h）
+    """
+    q = DetectionConfig.OSD_QUANT_PX
+    roi = roi_window.roi if roi_window else None
+    if roi:
+        for i in range(4):
+            key[i] = roi[i] // q
+    else:
+        for i in range(4):
+            key[i] = -1
+    if track is None:
+        for i in range(4, 19):
+            key[i] = -1
+    else:
+        rect = track[0]
+        center = track[1]
+        corners = track[3]
+        key[4] = 1
+        for i in range(4):
+            key[5 + i] = int(rect[i]) // q
+        key[9] = int(center[0]) // q
+        key[10] = int(center[1]) // q
+        for k in range(4):
+            if corners:
+                key[11 + 2 * k] = int(corners[k][0]) // q
+                key[12 + 2 * k] = int(corners[k][1]) // q
+            else:
+                key[11 + 2 * k] = key[12 + 2 * k] = -1
+    if tracker:
+        key[19] = tracker.primary
+        i = 20
+        for t in range(tracker.max_targets):
+            if tracker.is_reported(t):
+                key[i] = 1
+                key[i + 1] = tracker.ids[t]
+                key[i + 2] = int(tracker.x[t]) // q
+                key[i + 3] = int(tracker.y[t]) // q
+                key[i + 4] = int(tracker.w[t]) // q
+                key[i + 5] = int(tracker.h[t]) // q
+            else:
+                key[i] = 0
+            i += 6
+
+def overlay_region(track):
+    """标记层需要覆盖的显示帧区域 (x0, y0, x1, y1)，按 OSD_GRID 对齐"""
+    sx = OVERLAY_SX
+    sy = OVERLAY_SY
+    # 画面中心标记始终绘制
+    x0 = x1 = FRAME_WIDTH // 2
+    y0 = y1 = FRAME_HEIGHT // 2
+    boxes = []
+    roi = roi_window.roi if roi_window else None
+    if roi:
+        boxes.append(roi)
+    if track is not None:
+        boxes.append(track[0])
+        if track[3]:
+            for c in track[3]:
+                boxes.append((c[0], c[1], 0, 0))
+    if tracker:
+        for t in range(tracker.max_targets):
+            if tracker.is_reported(t):
+                boxes.append(tracker.rect(t))
+    for b in boxes:
+        bx = int(b[0] * sx)
+        by = int(b[1] * sy)
+        x0 = min(x0, bx)
+        y0 = min(y0, by - 18)  # 轨迹ID文字画在框上方
+        x1 = max(x1, bx + int(b[2] * sx), bx + 40)
+        y1 = max(y1, by + int(b[3] * sy))
+    x0 = max(0, x0 - OSD_MARGIN) // OSD_GRID * OSD_GRID
+    y0 = max(0, y0 - OSD_MARGIN) // OSD_GRID * OSD_GRID
+    x1 = min(FRAME_WIDTH, x1 + OSD_MARGIN)
+    y1 = min(FRAME_HEIGHT, y1 + OSD_MARGIN)
+    return x0, y0, x1, y1
+
+def stage_osd(track):
+    """绑定显示模式：量化后的显示内容变化时才重绘 OSD
+
+    文字画在帧顶部的窄条层（LAYER_OSD1），标记画在只覆盖标记区域的图像上（LAYER_OSD0），
+    该图像按需要的最大区域分配，区域移动时只改变显示位置
+    """
+    global osd_img, osd_key, osd_scratch, osd_fps, osd_fps_ms, osd_error, osd_text_dirty
+    now = time.ticks_ms()
+    if time.ticks_diff(now, osd_fps_ms) >= DetectionConfig.OSD_FPS_REFRESH_MS:
+        osd_fps = fps_clock.fps()
+        osd_fps_ms = now
+        osd_text_dirty = True
+    error = None if track is None else int(track[2])
+    if osd_text_dirty or error != osd_error:
+        osd_text_dirty = False
+        osd_error = error
+        osd_text_img.clear()
+        draw_info_text(osd_text_img, osd_fps, None if track is None else track[2])
+        Display.show_image(osd_text_img, x=DISPLAY_X, y=DISPLAY_Y, layer=Display.LAYER_OSD1)
+
+    overlay_key(osd_scratch, track)
+    if osd_scratch == osd_key:
+        return
+    osd_key, osd_scratch = osd_scratch, osd_key
+    x0, y0, x1, y1 = overlay_region(track)
+    if osd_img is None or osd_img.width() < x1 - x0 or osd_img.height() < y1 - y0:
+        # 区域变大时重新分配（尺寸向上取整到 OSD_GRID，不超过整帧）
+        w = min(FRAME_WIDTH, (x1 - x0 + OSD_GRID - 1) // OSD_GRID * OSD_GRID)
+        h = min(FRAME_HEIGHT, (y1 - y0 + OSD_GRID - 1) // OSD_GRID * OSD_GRID)
+        if osd_img is not None:
+            w = max(w, osd_img.width())
+            h = max(h, osd_img.height())
+        osd_img = None
+        osd_img = image.Image(w, h, image.ARGB8888)
+    ox = min(x0, FRAME_WIDTH - osd_img.width())
+    oy = min(y0, FRAME_HEIGHT - osd_img.height())
+    osd_img.clear()
+    roi = roi_window.roi if roi_window else None
+    if tracker:
+        draw_tracks(osd_img, tracker, ox, oy)
+    if track is None:
+        draw_markers(osd_img, None, None, roi, None, ox, oy)
+    else:
+        draw_markers(osd_img, track[0], track[1], roi, track[3], ox, oy)
+    Display.show_image(osd_img, x=DISPLAY_X + ox, y=DISPLAY_Y + oy, layer=Display.LAYER_OSD0)
+
+def stage_show(img):
+    """显示图像"""
+    if img is None:
+        return
+    Display.show_image(img, x=DISPLAY_X, y=DISPLAY_Y)
+
+def build_pipeline():
+    """根据配置构建帧处理阶段图"""
+    use_binary = DetectionConfig.DETECT_SOURCE == "BINARY"
+    adaptive = AdvancedConfig.ADAPTIVE_THRESHOLD
+    morphology = AdvancedConfig.ENABLE_MORPHOLOGY
+    # 绑定显示时摄像头画面不经过 Python，只有 OSD 阶段；快速启动时显示初始化前没有显示阶段
+    show = DISPLAY_MODE != "NONE" and not BIND_DISPLAY and not display_deferred
+    overlay = DetectionConfig.ENABLE_OVERLAY and show
+    osd = osd_text_img is not None
+    gate = show and (DetectionConfig.DISPLAY_EVERY_N > 1 or DetectionConfig.DISPLAY_MAX_FPS > 0)
+    display_input = "display_frame" if gate else "frame"
+    multi = AdvancedConfig.ENABLE_MULTI_TARGET
+    # 多目标模式下每条轨迹自带平滑，不再使用单目标滤波器
+    use_filter = DetectionConfig.ENABLE_FILTER and not multi
+    fixed_filter = isinstance(coord_filter, FixedPointCoordinateFilter)
+    v2 = uart_encoder is not None
+    gated = motion_gate is not None
+    uart_text_queued = uart_tx is not None and len(uart_tx.text) > 0
+    dual = DUAL_CHANNEL
+    
+    if not use_binary:
+        detect_input = "gray"
+    elif morphology:
+        detect_input = "binary_clean"
+    else:
+        detect_input = "binary"
+    
+    stages = [
+        Stage("snapshot", stage_snapshot, (), "frame", enabled=not dual, tm_stage=STAGE_SNAPSHOT),
+        Stage("snapshot_gray", stage_snapshot_gray, (), "gray", enabled=dual, tm_stage=STAGE_SNAPSHOT),
+        Stage("snapshot_display", stage_snapshot_display, (), "frame", enabled=dual, tm_stage=STAGE_SNAPSHOT),
+        Stage("capture_time", stage_capture_time, ("gray",) if dual else ("frame",), "capture_us",
+              tm_stage=STAGE_SNAPSHOT),
+        Stage("grayscale", stage_grayscale, ("frame",), "gray", enabled=not dual, tm_stage=STAGE_GRAYSCALE),
+        # 采集等待期间线路已空闲：发送排队的低优先级文本帧（遥测报告）。放在采集段之后，流水线模式下也在检测线程执行
+        Stage("uart_text", stage_uart_text, (), sink=True, enabled=uart_text_queued, tm_stage=STAGE_UART),
+        # 帧差和 Canny 阈值的直方图都要在二值化（原地改写灰度图）之前取
+        Stage("motion", stage_motion, ("gray",), "motion", enabled=gated, tm_stage=STAGE_MOTION),
+        Stage("canny_adapt", stage_canny_adapt, ("gray",), sink=True,
+              enabled=canny_adapter is not None, tm_stage=STAGE_THRESHOLD),
+        Stage("threshold", stage_otsu_threshold, ("gray",), "threshold",
+              enabled=not adaptive, tm_stage=STAGE_THRESHOLD),
+        Stage("binary", stage_otsu_binary, ("gray", "threshold"), "binary",
+              enabled=not adaptive, tm_stage=STAGE_BINARY),
+        Stage("adaptive_binary", stage_adaptive_binary, ("gray",), "binary",
+              enabled=adaptive, tm_stage=STAGE_BINARY),
+        Stage("morphology", stage_morphology, ("binary",), "binary_clean",
+              enabled=morphology, tm_stage=STAGE_MORPHOLOGY),
+        Stage("find_rects", stage_find_rects_gated if gated else stage_find_rects,
+              (detect_input, "motion") if gated else (detect_input,), "rects", tm_stage=STAGE_FIND_RECTS),
+        Stage("process", stage_process, ("rects",), "target",
+              enabled=not multi, tm_stage=STAGE_PROCESS),
+        Stage("track_targets", stage_track_targets, ("rects",), "target",
+              enabled=multi, tm_stage=STAGE_PROCESS),
+        # 原地改写 target：下游阶段拿到的是细化后的角点
+        Stage("refine_corners", stage_refine_corners, ("target", detect_input), "target",
+              enabled=corner_refiner is not None and not multi, tm_stage=STAGE_CORNERS),
+        Stage("output", stage_output_v2 if v2 else stage_output,
+              ("target", "capture_us") if v2 else ("target",), sink=True,
+              enabled=DetectionConfig.ENABLE_UART_OUTPUT and not predictive_output, tm_stage=STAGE_UART),
+        Stage("filter", stage_filter_fixed if fixed_filter else stage_filter, ("target",), "track",
+              enabled=use_filter, tm_stage=STAGE_FILTER),
+        Stage("unfiltered", stage_unfiltered, ("target",), "track",
+              enabled=not use_filter, tm_stage=STAGE_FILTER),
+        # 预测模式：UART 在滤波之后发送外推后的误差
+        Stage("output_predicted", stage_output_predicted, ("track", "capture_us"), sink=True,
+              enabled=DetectionConfig.ENABLE_UART_OUTPUT and predictive_output, tm_stage=STAGE_UART),
+        Stage("observe", stage_observe, ("target",), sink=True,
+              enabled=governor is not None, tm_stage=STAGE_PROCESS),
+        # 显示相关阶段都在控制输出之后，UART 发送不等待绘制
+        Stage("display_gate", stage_display_gate, ("frame",), "display_frame",
+              enabled=gate, tm_stage=STAGE_SHOW),
+        Stage("overlay", stage_overlay, (display_input, "track"), "overlay",
+              enabled=overlay, tm_stage=STAGE_DRAW),
+        Stage("show", stage_show, ("overlay" if overlay else display_input,), sink=True,
+              enabled=show, tm_stage=STAGE_SHOW),
+        Stage("osd", stage_osd, ("track",), sink=True, enabled=osd, tm_stage=STAGE_DRAW),
+    ]
+    return FramePipeline(stages)
+
+def draw_tracks(img, tracker, ox=0, oy=0):
+    """绘制所有已确认轨迹及其ID（主目标由 draw_markers 绘制）；(ox, oy) 为 img 左上角在显示帧中的位置"""
+    for t in range(tracker.max_targets):
+        if t == tracker.primary or not tracker.is_reported(t):
+            continue
+        x, y, w, h = tracker.rect(t)
+        x = int(x * OVERLAY_SX) - ox
+        y = int(y * OVERLAY_SY) - oy
+        img.draw_rectangle([x, y, int(w * OVERLAY_SX), int(h * OVERLAY_SY)], color=(255, 0, 255), thickness=2)
+        img.draw_string_advanced(x, max(0, y - 18), 16, f"ID{tracker.ids[t]}", color=(255, 0, 255))
+    if tracker.primary >= 0:
+        x, y, w, h = tracker.rect(tracker.primary)
+        x = int(x * OVERLAY_SX) - ox
+        y = int(y * OVERLAY_SY) - oy
+        img.draw_string_advanced(x, max(0, y - 18), 16, f"ID{tracker.ids[tracker.primary]}",
+                                 color=(0, 255, 0))
 
 def capture_picture():
     """主要的图像捕获和处理函数"""
-    global coord_filter
+    global coord_filter, fixed_tracks, telemetry, pipeline, fps_clock, detection_params, roi_window, tracker
+    global predictive_output, gc_scheduler, uart_encoder, governor, canny_adapter, corner_refiner
+    global motion_gate, last_rects, osd_text_img
+    
+    # 预设自动调节（只在启动时启用才创建；SET ENABLE_GOVERNOR 在运行时暂停/恢复）。
+    # 先套用调节器的起始预设，使后面创建的滤波器、跟踪器和检测参数与调节器记录的级别一致
+    if DetectionConfig.ENABLE_GOVERNOR:
+        from k230_governor import PresetGovernor, LEVELS
+        governor = PresetGovernor(
+            DetectionConfig.GOVERNOR_TARGET_FPS, DetectionConfig.GOVERNOR_WINDOW,
+            DetectionConfig.GOVERNOR_HYSTERESIS, DetectionConfig.GOVERNOR_MIN_HIT_RATE,
+            DetectionConfig.GOVERNOR_MAX_JITTER, DetectionConfig.GOVERNOR_CONFIRM
+        )
+        getattr(PresetConfigs, LEVELS[governor.level])()
+    else:
+        governor = None
+    
+    coord_filter = create_coordinate_filter()
+    if isinstance(coord_filter, FixedPointCoordinateFilter):
+        # 流水线模式下：显示队列中一项、显示线程正在绘制一项、检测线程正在写一项
+        fixed_tracks = alloc_fixed_tracks(3 if DetectionConfig.ENABLE_PIPELINING else 1)
+    predictive_output = isinstance(coord_filter, PredictiveCoordinateFilter) \
+        and DetectionConfig.ENABLE_FILTER and not AdvancedConfig.ENABLE_MULTI_TARGET
     
-    coord_filter = OptimizedCoordinateFilter()
-    fps = time.clock()
+    # 多目标跟踪
+    if AdvancedConfig.ENABLE_MULTI_TARGET:
+        from k230_tracker import MultiTargetTracker
+        tracker = MultiTargetTracker(
+            AdvancedConfig.MAX_TARGETS, DetectionConfig.FILTER_ALPHA, AdvancedConfig.TRACK_MATCH_IOU,
+            AdvancedConfig.TRACK_MAX_AGE, AdvancedConfig.TRACK_MIN_HITS,
+            AdvancedConfig.TRACK_MAX_CANDIDATES,
+            (DetectionConfig.MIN_AREA, DetectionConfig.MIN_ASPECT_RATIO, DetectionConfig.MAX_ASPECT_RATIO),
+            RECT_STRIDE
+        )
+    else:
+        tracker = None
+    
+    # 跟踪窗口ROI
+    if AdvancedConfig.ENABLE_ROI:
+        roi_window = TrackingWindow(
+            DETECT_WIDTH, DETECT_HEIGHT, AdvancedConfig.ROI_MODE, AdvancedConfig.ROI_MARGIN,
+            AdvancedConfig.ROI_LOST_FRAMES,
+            (AdvancedConfig.ROI_X, AdvancedConfig.ROI_Y, AdvancedConfig.ROI_WIDTH, AdvancedConfig.ROI_HEIGHT)
+        )
+    else:
+        roi_window = None
+    fps_clock = time.clock()
+    
+    # UART 协议
+    if DetectionConfig.UART_PROTOCOL == "V2":
+        batch = AdvancedConfig.MAX_TARGETS if tracker and DetectionConfig.UART_BATCH_TARGETS else 1
+        uart_encoder = FrameEncoderV2(batch)
+    else:
+        uart_encoder = None
+    gc_scheduler = GCScheduler(DetectionConfig.GC_POLICY, DetectionConfig.GC_HIGH_WATER,
+                               DetectionConfig.GC_LOW_WATER, DetectionConfig.GC_FRAME_BUDGET_MS,
+                               DetectionConfig.GC_MAX_INTERVAL)
+    
+    # 分阶段遥测（关闭时为空实现）
+    if DetectionConfig.ENABLE_TELEMETRY:
+        telemetry = StageTelemetry(DetectionConfig.TELEMETRY_WINDOW,
+                                   DetectionConfig.TELEMETRY_REPORT_EVERY)
+    else:
+        telemetry = NullTelemetry()
+    tm = telemetry
     
     # 获取检测参数
-    if CONFIG_AVAILABLE:
-        detection_params = get_detection_params()
+    detection_params = load_detection_params()
+    if DetectionConfig.CANNY_MODE != "FIXED":
+        from k230_canny import AdaptiveCanny
+        canny_adapter = AdaptiveCanny(
+            DetectionConfig.CANNY_MODE, DetectionConfig.CANNY_SIGMA, DetectionConfig.CANNY_LOW_RATIO,
+            DetectionConfig.CANNY_ADAPT_ALPHA, DetectionConfig.CANNY_ADAPT_DRIFT,
+            DetectionConfig.CANNY_ADAPT_EVERY,
+            detection_params['canny_thresh1'], detection_params['canny_thresh2']
+        )
+    else:
+        canny_adapter = None
+    
+    # 角点亚像素细化（需要 ulab/numpy；多目标模式下顶点跟随轨迹平滑，不做细化）
+    if QUAD_CORNERS and DetectionConfig.CORNER_REFINE and np is not None:
+        corner_refiner = CornerRefiner(DetectionConfig.CORNER_REFINE_WINDOW // 2,
+                                       DetectionConfig.CORNER_REFINE_ITERS)
+    else:
+        corner_refiner = None
+    
+    # 运动门控
+    if DetectionConfig.ENABLE_MOTION_GATE:
+        from k230_motion import MotionGate
+        motion_gate = MotionGate(DETECT_WIDTH, DETECT_HEIGHT, DetectionConfig.MOTION_THRESHOLD,
+                                 DetectionConfig.MOTION_MAX_SKIP, DetectionConfig.MOTION_SCALE)
     else:
-        detection_params = {
-            'canny_thresh1': 50,
-            'canny_thresh2': 150,
-            'approx_epsilon': 0.04,
-            'area_min_ratio': 0.01,
-            'max_angle_cos': 0.3,
-            'gaussian_blur_size': 5
-        }
-    
-    print(f"使用检测参数: {detection_params}")
-    
-    while True:
-        fps.tick()
+        motion_gate = None
+    last_rects = None
+    
+    # 绑定显示的 OSD 叠加层（快速启动时在显示初始化后分配）
+    if BIND_DISPLAY and DetectionConfig.ENABLE_OVERLAY and not display_deferred:
+        osd_alloc()
+    else:
+        osd_text_img = None
+    
+    pipeline = build_pipeline()
+    if not FAST_BOOT:
+        print(f"使用检测参数: {detection_params}")
+        active, skipped = pipeline.describe()
+        print(f"流水线阶段: {' -> '.join(active)}")
+        if skipped:
+            print(f"跳过阶段: {', '.join(skipped)}")
+    boot_timer.mark("pipeline_init")
+    
+    if DetectionConfig.ENABLE_PIPELINING:
+        # 延后的显示初始化会重建流水线，在此之前按顺序逐帧执行，之后再启动流水线线程
+        if run_sequential(tm, True):
+            run_pipelined(tm)
+        return
+    run_sequential(tm, False)
+
+def run_sequential(tm, until_display):
+    """逐帧顺序执行流水线；until_display 时在延后的显示初始化完成后返回
+
+    返回 False 表示用户停止
+    """
+    while not (until_display and not display_deferred):
+        fps_clock.tick()
         
         try:
             os.exitpoint()
+            tm.frame_start()
+            gc_scheduler.frame_start()
             
-            img = sensor.snapshot()
-            img_gray = img.to_grayscale()
-            
-            hist = img_gray.get_histogram()
-            otsu_threshold_obj = hist.get_threshold()
-            threshold_value = (otsu_threshold_obj.value(), 255)
-            img_binary = img_gray.binary([threshold_value])
-            
-            image_shape = [DETECT_HEIGHT, DETECT_WIDTH]
-            img_gray_np = img_gray.to_numpy_ref()
-            
-            rects_data = cv_lite.grayscale_find_rectangles(
-                image_shape, img_gray_np,
-                detection_params['canny_thresh1'],
-                detection_params['canny_thresh2'],
-                detection_params['approx_epsilon'],
-                detection_params['area_min_ratio'],
-                detection_params['max_angle_cos'],
-                detection_params['gaussian_blur_size']
-            )
-            
-            max_rect = process_rectangles(rects_data)
-            
-            if max_rect:
-                x, y, w, h = max_rect['x'], max_rect['y'], max_rect['w'], max_rect['h']
-                corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
-                center = calculate_center_fast(corners)
-                
-                x_error = center[0] - IMAGE_CENTER_X
-                x_error = max(-DetectionConfig.MAX_ERROR_RANGE, 
-                             min(DetectionConfig.MAX_ERROR_RANGE, x_error))
-                
-                coord_filter.add_corners(corners)
-                coord_filter.add_center(center)
-                
-                send_uart_data(x_error)
-                
-                filtered_corners = coord_filter.get_filtered_corners()
-                filtered_center = coord_filter.get_filtered_center()
-                
-                display_rect = max_rect
-                display_center = filtered_center if filtered_center else center
-                
-                if filtered_corners:
-                    min_x = min(corner[0] for corner in filtered_corners)
-                    max_x = max(corner[0] for corner in filtered_corners)
-                    min_y = min(corner[1] for corner in filtered_corners)
-                    max_y = max(corner[1] for corner in filtered_corners)
-                    
-                    display_rect = {
-                        'x': min_x, 'y': min_y, 
-                        'w': max_x - min_x, 'h': max_y - min_y
-                    }
-                
-                draw_detection_info(img, display_rect, display_center, x_error, fps.fps())
-                
-            else:
-                coord_filter.reset()
-                draw_detection_info(img, None, None, None, fps.fps())
-            
-            if DISPLAY_MODE == "LCD":
-                x = int((800 - DETECT_WIDTH) // 2)
-                y = int((480 - DETECT_HEIGHT) // 2)
-                Display.show_image(img, x=x, y=y)
-            else:
-                Display.show_image(img)
-            
-            if DetectionConfig.ENABLE_GC_PER_FRAME:
-                img = None
-                gc.collect()
+            pipeline.run(tm)
+            pipeline.clear()
+            finish_frame(tm)
             
         except KeyboardInterrupt:
             print("用户停止")
-            break
+            return False
         except Exception as e:
             print(f"处理异常: {e}")
             continue
+    return True
+
+def finish_frame(tm):
+    """帧尾处理：命令、垃圾回收和遥测报告"""
+    if booting:
+        boot_frame_end()
+    poll_commands()
+    if governor is not None and not DetectionConfig.ENABLE_GOVERNOR:
+        governor.suspend()
+    elif governor is not None:
+        governor.target_fps = DetectionConfig.GOVERNOR_TARGET_FPS
+        preset = governor.frame_end()
+        if preset:
+            getattr(PresetConfigs, preset)()
+            reconfigure()
+            s = governor.stats()
+            print(f"自动调节: 切换到 {preset} (FPS {s['fps']:.1f}, 命中率 {s['hit_rate']:.2f}, "
+                  f"抖动 {s['jitter']:.1f})")
+    if uart_tx is not None:
+        uart_tx.pump()
+    gc_scheduler.end_of_frame(tm)
+    
+    if tm.frame_end():
+        if DetectionConfig.TELEMETRY_OUTPUT == "UART":
+            if uart1:
+                tm.send_report(uart_report)
+        else:
+            tm.print_report()
+        if runner:
+            runner.print_stats()
+        s = gc_scheduler.stats()
+        print(f"GC: 回收 {s['collections']} 次(强制 {s['forced']}), 停顿 {s['pause_us_avg']}us, "
+              f"每帧分配 {s['alloc_per_frame']}B, 剩余 {s['mem_free']}B")
+        if uart_tx is not None:
+            s = uart_tx.stats()
+            print(f"UART: 发送 {s['sent']} 帧, 合并 {s['coalesced']}, 丢弃 {s['dropped']}, {s['bytes']}B")
+        if motion_gate is not None:
+            s = motion_gate.stats()
+            print(f"运动门控: 检测 {s['runs']} 帧, 跳过 {s['skipped']} 帧(强制 {s['forced']})")
+
+def poll_commands():
+    """轮询UART命令；本帧收到的命令在帧间一次性应用"""
+    if command_channel is None or not command_channel.poll():
+        return
+    from k230_commands import apply_command
+    changed = False
+    for parts in command_channel.take():
+        ok, reply = apply_command(parts, DetectionConfig, PresetConfigs)
+        if ok and governor is None and DetectionConfig.ENABLE_GOVERNOR:
+            # 启动时未启用自动调节，没有调节器可恢复
+            DetectionConfig.ENABLE_GOVERNOR = False
+            ok, reply = False, "ERR governor not enabled at boot"
+        changed = changed or ok
+        if ok and parts[1].upper() not in ('ENABLE_GOVERNOR', 'GOVERNOR_TARGET_FPS'):
+            # 手动调参后停用自动调节，避免被下一次切换覆盖
+            DetectionConfig.ENABLE_GOVERNOR = False
+            if governor is not None and parts[0].upper() == 'PRESET':
+                governor.set_preset(parts[1].lower())
+        print(f"UART命令: {' '.join(parts)} -> {reply}")
+        if DetectionConfig.COMMAND_REPLY:
+            uart_text(reply)
+    if changed:
+        reconfigure()
+
+def reconfigure():
+    """配置修改后刷新运行时状态：cv_lite 参数、跟踪器筛选条件和坐标滤波器参数"""
+    global detection_params
+    detection_params = load_detection_params()
+    if motion_gate is not None:
+        # 参数变化后的第一帧必须重新检测
+        motion_gate.reset()
+    if canny_adapter is not None:
+        # 自适应模式下 Canny 阈值由直方图决定，预设中的固定阈值不生效
+        canny_adapter.apply(detection_params)
+    if tracker:
+        tracker.alpha = DetectionConfig.FILTER_ALPHA
+        tracker.min_area = DetectionConfig.MIN_AREA
+        tracker.min_aspect = DetectionConfig.MIN_ASPECT_RATIO
+        tracker.max_aspect = DetectionConfig.MAX_ASPECT_RATIO
+    # 原地更新参数：重建滤波器会丢掉平滑状态，输出坐标跳变
+    update_coordinate_filter(coord_filter)
+
+def run_pipelined(tm):
+    """多线程流水线模式：采集（含灰度转换）、检测、叠加显示分别在三个线程中重叠执行"""
+    global runner
+    from k230_threaded import PipelinedRunner
+    
+    capture_end = pipeline.index_after(("snapshot", "snapshot_gray", "snapshot_display", "capture_time",
+                                        "grayscale"))
+    display_start = pipeline.index_of_first(("display_gate", "overlay", "show", "osd"))
+    runner = PipelinedRunner(pipeline, capture_end, display_start,
+                             DetectionConfig.PIPELINE_QUEUE_SIZE, DetectionConfig.PIPELINE_DROP_POLICY)
+    
+    def on_frame_end():
+        fps_clock.tick()
+        os.exitpoint()
+        finish_frame(tm)
+    
+    try:
+        runner.run(tm, on_frame_end, gc_scheduler.frame_start)
+    except KeyboardInterrupt:
+        print("用户停止")
+    runner.print_stats()
 
 def print_config_info():
     """打印配置信息"""
@@ -398,30 +1633,40 @@ def print_config_info():
     print(f"宽高比范围: {DetectionConfig.MIN_ASPECT_RATIO}-{DetectionConfig.MAX_ASPECT_RATIO}")
     print(f"滤波系数: {DetectionConfig.FILTER_ALPHA}")
     print(f"UART波特率: {DetectionConfig.UART_BAUDRATE}")
-    print(f"配置文件: {'已加载' if CONFIG_AVAILABLE else '未找到，使用默认'}")
+    print(f"配置来源: {CONFIG_SOURCE}")
     print("=" * 50)
 
 def main():
     """主函数"""
+    global boot_timer, booting
     os.exitpoint(os.EXITPOINT_ENABLE)
     camera_is_init = False
     uart_is_init = False
+    boot_timer = BootTimer(BOOT_T0)
+    booting = True
+    boot_timer.mark("import")
     
-    print_config_info()
+    if not FAST_BOOT:
+        print_config_info()
+        boot_timer.mark("config_info")
     
     try:
-        print("初始化UART...")
+        if not FAST_BOOT:
+            print("初始化UART...")
         uart_is_init = uart_init()
+        boot_timer.mark("uart_init")
         if not uart_is_init:
             print("UART初始化失败，继续运行...")
         
-        print("初始化摄像头...")
+        if not FAST_BOOT:
+            print("初始化摄像头...")
         camera_is_init = camera_init()
         if not camera_is_init:
             print("摄像头初始化失败")
             return
         
-        print("开始矩形检测...")
+        if not FAST_BOOT:
+            print("开始矩形检测...")
         capture_picture()
         
     except Exception as e:
@@ -0,0 +1,349 @@
+# K230 录制数据集回归测试
+# 在主机上回放带真值（.gt.json）的帧目录，统计吞吐量、分阶段耗时、命中率、角点误差、
+# 中心抖动和UART误差信号平滑度，并与基线JSON比较，出现回退时以非零状态退出；
+# 同时检查定点滤波器组与浮点EMA的偏差不超过 FILTER_BANK_MAX_ERROR_PX，
+# 以及向量化候选筛选在宽高比/面积边界上与标量路径结果一致
+#
+# 真值文件与帧同名: frame_00001.ppm -> frame_00001.gt.json
+#   {"rect": [x, y, w, h], "corners": [[x, y], ...]}，无目标的帧 "rect": null
+#
+# 用法:
+#   python k230_regression.py --synthetic 60                                  # 与默认基线比较
+#   python k230_regression.py --frames recorded/ --baseline recorded/baseline.json
+#   python k230_regression.py --frames recorded/ --baseline b.json --update-baseline
+#   python k230_regression.py --synthetic 60 --set MIN_AREA=2000 --set FILTER_ALPHA=0.2
+#
+# 检测结果从UART取得：回放期间强制使用V2协议并关闭发送合并，每帧恰好一帧V2数据
+
+import os, sys, json, argparse, tempfile, contextlib, io
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(ROOT, "k230_host"))
+
+import host_backend
+import k230_bench
+from k230_overrides import apply_overrides
+
+DEFAULT_BASELINE = os.path.join(ROOT, "k230_regression_baseline.json")
+
+# 指标方向和默认容差: (越大越好, 容差, 容差类型 "abs"/"rel")
+METRICS = {
+    "hit_rate": (True, 0.02, "abs"),
+    "false_positive_rate": (False, 0.02, "abs"),
+    "corner_error_px": (False, 0.5, "abs"),
+    "center_jitter_px": (False, 0.1, "abs"),
+    "error_smoothness": (False, 0.5, "abs"),
+}
+# 定点滤波器组（FILTER_TYPE = "EMA_FIXED"）与浮点EMA的最大允许偏差（像素，与基线无关）
+FILTER_BANK_MAX_ERROR_PX = 1
+FILTER_BANK_TRIALS = 40  # 每个 alpha 的随机轨迹数
+TIMING_METRICS = {
+    "fps": (True, 0.25, "rel"),
+    "frame_ms_p95": (False, 0.25, "rel"),
+}
+STAGE_TOLERANCE = 0.5  # 分阶段耗时（p50）的相对容差
+STAGE_MIN_US = 200  # 低于该耗时的阶段不参与比较（计时噪声占主导）
+MATCH_IOU = 0.5  # 检测与真值的IoU不低于该值视为命中
+
+def load_ground_truth():
+    """按回放顺序读取每帧真值；缺少真值文件的帧为 False"""
+    truth = []
+    for frame in host_backend.frames:
+        path = os.path.splitext(frame[0])[0] + ".gt.json"
+        if not os.path.exists(path):
+            truth.append(False)
+            continue
+        with open(path) as f:
+            truth.append(json.load(f))
+    return truth
+
+def decode_uart(buf):
+    """把UART输出拆成V2帧并解码"""
+    from k230_protocol import decode_v2, HEADER_SIZE, TARGET_SIZE, CRC_SIZE, SYNC
+    frames = []
+    i = 0
+    while True:
+        i = buf.find(SYNC, i)
+        if i < 0 or i + HEADER_SIZE > len(buf):
+            break
+        end = i + HEADER_SIZE + buf[i + 10] * TARGET_SIZE + CRC_SIZE
+        decoded = decode_v2(buf[i:end])
+        if decoded is None:
+            i += 1
+            continue
+        frames.append(decoded)
+        i = end
+    return frames
+
+def iou(a, b):
+    iw = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    ih = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / (a[2] * a[3] + b[2] * b[3] - inter)
+
+def corner_error(corners, truth):
+    """每个真值角点到最近检测角点的平均距离"""
+    total = 0.0
+    for tx, ty in truth:
+        total += min(((x - tx) ** 2 + (y - ty) ** 2) ** 0.5 for x, y in corners)
+    return total / len(truth)
+
+def second_difference(series):
+    """连续命中段上二阶差分绝对值的均值（匀速运动为 0）"""
+    total = 0.0
+    n = 0
+    for i in range(2, len(series)):
+        a, b, c = series[i - 2], series[i - 1], series[i]
+        if a is None or b is None or c is None:
+            continue
+        total += abs(c - 2 * b + a)
+        n += 1
+    return total / n if n else 0.0
+
+def evaluate(outputs, truth):
+    """逐帧比较检测结果与真值"""
+    hits = misses = false_pos = 0
+    errors = []
+    cx = []
+    cy = []
+    x_err = []
+    for k, out in enumerate(outputs):
+        gt = truth[k] if k < len(truth) else False
+        target = out[2][0] if out[2] else None  # 主目标
+        if target is None:
+            cx.append(None)
+            cy.append(None)
+            x_err.append(None)
+        else:
+            corners = target[3]
+            cx.append(sum(c[0] for c in corners) / 4.0)
+            cy.append(sum(c[1] for c in corners) / 4.0)
+            x_err.append(target[1])
+        if gt is False:
+            continue
+        rect = gt.get("rect")
+        if rect is None:
+            if target is not None:
+                false_pos += 1
+            continue
+        if target is None:
+            misses += 1
+            continue
+        corners = target[3]
+        xs = [c[0] for c in corners]
+        ys = [c[1] for c in corners]
+        box = (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+        if iou(box, rect) >= MATCH_IOU:
+            hits += 1
+            gt_corners = gt.get("corners") or [[rect[0], rect[1]], [rect[0] + rect[2], rect[1]],
+                                               [rect[0] + rect[2], rect[1] + rect[3]],
+                                               [rect[0], rect[1] + rect[3]]]
+            errors.append(corner_error(corners, gt_corners))
+        else:
+            misses += 1
+            false_pos += 1
+    positives = hits + misses
+    scored = sum(1 for t in truth[:len(outputs)] if t is not False)
+    return {
+        "scored_frames": scored,
+        "hit_rate": round(hits / positives, 4) if positives else 1.0,
+        "false_positive_rate": round(false_pos / scored, 4) if scored else 0.0,
+        "corner_error_px": round(sum(errors) / len(errors), 3) if errors else 0.0,
+        "center_jitter_px": round(second_difference(cx) + second_difference(cy), 3),
+        "error_smoothness": round(second_difference(x_err), 3),
+    }
+
+def run(frames_dir, overrides=(), cv_lite_mode="auto"):
+    """回放数据集并返回指标"""
+    host_backend.install()
+    host_backend.reset()
+    host_backend.configure(frames_dir=frames_dir, cv_lite_mode=cv_lite_mode)
+    from k230_config import DetectionConfig
+    apply_overrides(overrides)
+    # 每帧一帧V2输出，便于逐帧对齐
+    DetectionConfig.UART_PROTOCOL = "V2"
+    DetectionConfig.ENABLE_UART_TX_QUEUE = False
+    DetectionConfig.ENABLE_PIPELINING = False
+    DetectionConfig.ENABLE_TELEMETRY = True
+    DetectionConfig.TELEMETRY_REPORT_EVERY = 0
+    truth = load_ground_truth()
+    with contextlib.redirect_stdout(io.StringIO()):
+        module = k230_bench.run_detector("config")
+    summary = k230_bench.summarize()
+    outputs = decode_uart(bytes(host_backend.uart_buffer))
+    metrics = evaluate(outputs, truth)
+    metrics["frames"] = summary["frames"]
+    metrics["output_frames"] = len(outputs)
+    metrics["fps"] = summary["fps"]
+    metrics["frame_ms_p95"] = summary["frame_ms_p95"]
+    metrics["stages"] = {name: s["p50_us"] for name, s in module.telemetry.as_dict().items()}
+    metrics["filter_bank_max_error_px"] = verify_filter_bank(module)
+    metrics["rect_filter_mismatches"] = verify_rect_filter(module)
+    return metrics
+
+def verify_filter_bank(detector, trials=FILTER_BANK_TRIALS, frames=200, seed=1):
+    """随机轨迹下比较检测模块的定点滤波器组与浮点EMA滤波器，返回最大像素偏差"""
+    import random
+    rnd = random.Random(seed)
+    worst = 0
+    for alpha in (0.1, 0.2, 0.3, 0.5, 0.7, 0.9):
+        for _ in range(trials):
+            reference = detector.OptimizedCoordinateFilter(alpha)
+            fixed = detector.FixedPointCoordinateFilter(alpha)
+            x, y = rnd.randint(0, 300), rnd.randint(0, 200)
+            for _ in range(frames):
+                x = max(0, min(600, x + rnd.randint(-15, 15)))
+                y = max(0, min(440, y + rnd.randint(-15, 15)))
+                w, h = rnd.randint(30, 60), rnd.randint(30, 60)
+                corners = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+                center = detector.calculate_center_fast(corners)
+                for f in (reference, fixed):
+                    f.add_corners(corners)
+                    f.add_center(center)
+                expected = reference.get_filtered_corners()
+                if expected is None:
+                    continue
+                expected.append(reference.get_filtered_center())
+                actual = fixed.get_filtered_corners() + [fixed.get_filtered_center()]
+                for p, q in zip(expected, actual):
+                    worst = max(worst, abs(p[0] - q[0]), abs(p[1] - q[1]))
+    return worst
+
+def boundary_rects(detector):
+    """宽高比恰好等于（及相差 1 像素于）上下限、面积恰好等于（及相差 1 于）MIN_AREA 的候选 (w, h)"""
+    config = detector.DetectionConfig
+    sizes = set()
+    for h in range(10, 200):
+        for ratio in (config.MIN_ASPECT_RATIO, config.MAX_ASPECT_RATIO):
+            w = int(ratio * h + 0.5)
+            sizes.update(((w - 1, h), (w, h), (w + 1, h)))
+    for w in range(10, 200):
+        h = config.MIN_AREA // w
+        sizes.update(((w, h - 1), (w, h), (w, h + 1)))
+    return sorted((w, h) for w, h in sizes if w > 0 and h >= 0)
+
+def verify_rect_filter(detector, trials=FILTER_BANK_TRIALS, seed=1):
+    """比较向量化与标量候选筛选在边界候选上的结果，返回不一致的次数（检测模块无 numpy 时为 0）"""
+    import random
+    if detector.np is None:
+        return 0
+    config = detector.DetectionConfig
+    stride = detector.RECT_STRIDE
+    count = max(config.VECTORIZE_MIN_CANDIDATES, 2)
+    rnd = random.Random(seed)
+
+    def pack(sizes):
+        data = []
+        for k, (w, h) in enumerate(sizes):
+            data += [k * 3, k * 2, w, h] + [0] * (stride - 4)
+        return data
+
+    def scalar(data):
+        saved = config.VECTORIZE_MIN_CANDIDATES
+        config.VECTORIZE_MIN_CANDIDATES = len(data) + 1
+        try:
+            return detector.process_rectangles(data)
+        finally:
+            config.VECTORIZE_MIN_CANDIDATES = saved
+
+    sizes = boundary_rects(detector)
+    cases = []
+    # 单个边界候选加不合格的小框：检验取舍本身
+    for size in sizes:
+        cases.append([size] + [(2, 2)] * (count - 1))
+    # 边界候选与随机候选混合（含面积相同者）：检验取最大者和并列时的下标
+    for _ in range(trials * 10):
+        mixed = [rnd.choice(sizes) for _ in range(count)]
+        mixed[rnd.randrange(count)] = mixed[rnd.randrange(count)]
+        cases.append(mixed)
+    mismatches = 0
+    for case in cases:
+        data = pack(case)
+        if detector.process_rectangles_vectorized(data, len(case)) != scalar(data):
+            mismatches += 1
+    return mismatches
+
+def compare(metrics, baseline, check_timing=False):
+    """与基线比较，返回回退项列表"""
+    failures = []
+    tolerance = baseline.get("tolerance", {})
+    rules = dict(METRICS)
+    if check_timing:
+        rules.update(TIMING_METRICS)
+    for name, (higher_better, tol, kind) in rules.items():
+        if name not in baseline.get("metrics", {}):
+            continue
+        ref = baseline["metrics"][name]
+        tol = tolerance.get(name, tol)
+        margin = tol * abs(ref) if kind == "rel" else tol
+        value = metrics[name]
+        if (higher_better and value < ref - margin) or (not higher_better and value > ref + margin):
+            failures.append(f"{name}: {value} (基线 {ref}, 容差 {margin:.3f})")
+    if check_timing:
+        for stage, ref in baseline.get("metrics", {}).get("stages", {}).items():
+            value = metrics["stages"].get(stage)
+            if value is None or ref < STAGE_MIN_US:
+                continue
+            if value > ref * (1 + tolerance.get("stages", STAGE_TOLERANCE)):
+                failures.append(f"stage {stage}: {value}us (基线 {ref}us)")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="K230 矩形检测录制数据集回归测试")
+    parser.add_argument("--frames", help="带 .gt.json 真值的录制帧目录")
+    parser.add_argument("--synthetic", type=int, default=0, help="生成N帧合成序列（含真值）")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="基线JSON路径")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线")
+    parser.add_argument("--check-timing", action="store_true",
+                        help="同时比较FPS和分阶段耗时（仅在与生成基线相同的机器上有意义）")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="回放前修改配置参数，可重复")
+    parser.add_argument("--cv-lite", choices=["auto", "recorded", "numpy", "approx"], default="auto")
+    parser.add_argument("--json", default=None, help="把结果写入JSON文件")
+    args = parser.parse_args(argv)
+
+    frames_dir = args.frames
+    if args.synthetic:
+        frames_dir = frames_dir or tempfile.mkdtemp(prefix="k230_regression_")
+        host_backend.make_synthetic_frames(frames_dir, count=args.synthetic)
+    if not frames_dir:
+        parser.error("需要 --frames 或 --synthetic")
+
+    metrics = run(frames_dir, args.set, args.cv_lite)
+    result = {"metrics": metrics}
+    # 定点滤波器组偏差与基线无关，始终检查
+    failures = []
+    worst = metrics["filter_bank_max_error_px"]
+    if worst > FILTER_BANK_MAX_ERROR_PX:
+        failures.append(f"filter_bank_max_error_px: {worst} (上限 {FILTER_BANK_MAX_ERROR_PX})")
+    if metrics["rect_filter_mismatches"]:
+        failures.append(f"rect_filter_mismatches: {metrics['rect_filter_mismatches']}（向量化与标量候选筛选不一致）")
+    result["failures"] = failures
+    if args.update_baseline:
+        if failures:
+            print(f"定点滤波器组偏差超限，未写入基线: {args.baseline}")
+        else:
+            with open(args.baseline, "w") as f:
+                json.dump({"metrics": metrics}, f, indent=2, ensure_ascii=False)
+            print(f"基线已写入: {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures.extend(compare(metrics, baseline, args.check_timing))
+    else:
+        print(f"基线不存在: {args.baseline}（使用 --update-baseline 生成）")
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+    if result.get("failures"):
+        print("回归失败:")
+        for line in result["failures"]:
+            print(f"  {line}")
+        sys.exit(1)
+    return result
+
+if __name__ == "__main__":
+    main()
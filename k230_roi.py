@@ -0,0 +1,70 @@
+# K230 跟踪窗口ROI
+# 锁定目标后，下一帧只在上一次检测结果外扩一定边距的窗口内搜索；
+# 连续丢失K帧后回退到全帧搜索
+
+ROI_ALIGN = 16  # 窗口宽度对齐（与检测宽度的对齐要求一致）
+
+def align_window(x, y, w, h, frame_w, frame_h, min_w=32, min_h=32):
+    """把窗口裁剪到画面内，宽度对齐到 ROI_ALIGN，返回 (x, y, w, h)"""
+    w = max(min_w, w)
+    h = max(min_h, h)
+    w = min(frame_w, (w + ROI_ALIGN - 1) // ROI_ALIGN * ROI_ALIGN)
+    h = min(frame_h, h)
+    x = max(0, min(x, frame_w - w))
+    y = max(0, min(y, frame_h - h))
+    x &= ~1
+    return (x, y, w, h)
+
+class TrackingWindow:
+    """跟踪窗口状态
+
+    mode: "TRACK" 跟随目标，"STATIC" 固定窗口（static_roi）
+    margin: 外扩边距，占目标宽高的比例
+    lost_frames: 连续丢失多少帧后回退到全帧搜索
+    """
+
+    def __init__(self, frame_w, frame_h, mode="TRACK", margin=0.5, lost_frames=3,
+                 static_roi=None, min_size=48):
+        self.frame_w = frame_w
+        self.frame_h = frame_h
+        self.mode = mode
+        self.margin = margin
+        self.lost_frames = lost_frames
+        self.min_size = min_size
+        self.static_roi = None
+        if static_roi:
+            self.static_roi = align_window(static_roi[0], static_roi[1], static_roi[2], static_roi[3],
+                                           frame_w, frame_h, min_size, min_size)
+        self.roi = None
+        self.miss_count = 0
+        self.roi_frames = 0  # 统计：使用窗口搜索的帧数
+        self.full_frames = 0  # 统计：全帧搜索的帧数
+
+    def window(self):
+        """返回本帧搜索窗口 (x, y, w, h)；None 表示全帧搜索"""
+        roi = self.static_roi if self.mode == "STATIC" else self.roi
+        if roi is None:
+            self.full_frames += 1
+        else:
+            self.roi_frames += 1
+        return roi
+
+    def update(self, x, y, w, h):
+        """命中目标：以目标框外扩边距作为下一帧窗口"""
+        self.miss_count = 0
+        if self.mode != "TRACK":
+            return
+        mx = int(w * self.margin)
+        my = int(h * self.margin)
+        self.roi = align_window(x - mx, y - my, w + 2 * mx, h + 2 * my,
+                                self.frame_w, self.frame_h, self.min_size, self.min_size)
+
+    def miss(self):
+        """未命中目标：连续丢失 lost_frames 帧后回退到全帧搜索"""
+        self.miss_count += 1
+        if self.miss_count >= self.lost_frames:
+            self.roi = None
+
+    def reset(self):
+        self.roi = None
+        self.miss_count = 0
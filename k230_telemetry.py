@@ -0,0 +1,147 @@
+# K230 分阶段延迟遥测
+# 为 capture_picture() 的每个阶段记录耗时，使用预分配的环形缓冲区统计 p50/p95/max
+
+import time
+from array import array
+
+# 阶段编号（顺序即报告顺序）
+STAGE_SNAPSHOT = 0
+STAGE_GRAYSCALE = 1
+STAGE_THRESHOLD = 2
+STAGE_BINARY = 3
+STAGE_FIND_RECTS = 4
+STAGE_PROCESS = 5
+STAGE_FILTER = 6
+STAGE_UART = 7
+STAGE_DRAW = 8
+STAGE_SHOW = 9
+STAGE_GC = 10
+STAGE_MORPHOLOGY = 11
+STAGE_FRAME = 12  # 整帧耗时
+STAGE_LATENCY_OUTPUT = 13  # 流水线模式：采集到UART发送的延迟
+STAGE_LATENCY_DISPLAY = 14  # 流水线模式：采集到显示完成的延迟
+STAGE_CORNERS = 15
+STAGE_MOTION = 16
+STAGE_COUNT = 17
+
+STAGE_NAMES = (
+    "snapshot", "grayscale", "threshold", "binary", "find_rects", "process",
+    "filter", "uart", "draw", "show", "gc", "morphology", "frame",
+    "lat_output", "lat_display", "corners", "motion",
+)
+
+class StageTelemetry:
+    """分阶段计时器
+
+    frame_start() 开始一帧，之后每个阶段结束时调用 mark(stage)，
+    记录自上一次 mark 以来的微秒数；frame_end() 记录整帧耗时。
+    所有样本写入预分配的 array，运行中不产生堆分配。
+    """
+
+    def __init__(self, window=64, report_every=100):
+        self.window = window
+        self.report_every = report_every
+        self.samples = array('L', [0] * (STAGE_COUNT * window))
+        self.counts = array('L', [0] * STAGE_COUNT)
+        self.pending = array('L', [0] * STAGE_COUNT)  # 本帧累计（同一阶段可多次 mark）
+        self.touched = array('B', [0] * STAGE_COUNT)
+        self.frame_count = 0
+        self._frame_t0 = 0
+        self._t = 0
+
+    def frame_start(self):
+        """开始一帧计时"""
+        t = time.ticks_us()
+        self._frame_t0 = t
+        self._t = t
+
+    def mark(self, stage):
+        """结束一个阶段，累计自上次 mark 以来的耗时"""
+        t = time.ticks_us()
+        self.pending[stage] += time.ticks_diff(t, self._t)
+        self.touched[stage] = 1
+        self._t = t
+
+    def skip(self):
+        """跳过未计时的间隔（例如不属于任何阶段的代码）"""
+        self._t = time.ticks_us()
+
+    def record(self, stage, us):
+        """直接记录一个样本（用于在主循环外测得的耗时）"""
+        n = self.counts[stage]
+        self.samples[stage * self.window + n % self.window] = us
+        self.counts[stage] = n + 1
+
+    def frame_end(self):
+        """提交本帧各阶段样本；返回是否到达报告间隔"""
+        self.pending[STAGE_FRAME] = time.ticks_diff(time.ticks_us(), self._frame_t0)
+        self.touched[STAGE_FRAME] = 1
+        for stage in range(STAGE_COUNT):
+            if self.touched[stage]:
+                self.record(stage, self.pending[stage])
+                self.pending[stage] = 0
+                self.touched[stage] = 0
+        self.frame_count += 1
+        return self.report_every > 0 and self.frame_count % self.report_every == 0
+
+    def stats(self, stage):
+        """返回 (p50, p95, max) 微秒；无样本时返回 None"""
+        n = min(self.counts[stage], self.window)
+        if n == 0:
+            return None
+        base = stage * self.window
+        ordered = sorted(self.samples[base:base + n])
+        return (ordered[(n - 1) // 2], ordered[min(n - 1, (n * 95 + 99) // 100 - 1)], ordered[-1])
+
+    def report_lines(self):
+        """生成文本报告，每个有样本的阶段一行"""
+        lines = []
+        for stage in range(STAGE_COUNT):
+            s = self.stats(stage)
+            if s is not None:
+                lines.append(f"TM,{STAGE_NAMES[stage]},{s[0]},{s[1]},{s[2]}")
+        return lines
+
+    def print_report(self):
+        """打印各阶段 p50/p95/max（微秒）"""
+        print(f"--- 阶段耗时(us) 第{self.frame_count}帧 p50/p95/max ---")
+        for line in self.report_lines():
+            print(line)
+
+    def send_report(self, send_line):
+        """逐行交给 send_line 发送（每行 TM,阶段,p50,p95,max；由调用方负责编码成帧和排队）"""
+        for line in self.report_lines():
+            send_line(line)
+
+    def as_dict(self):
+        """以字典形式导出统计结果（主机端基准测试使用）"""
+        result = {}
+        for stage in range(STAGE_COUNT):
+            s = self.stats(stage)
+            if s is not None:
+                result[STAGE_NAMES[stage]] = {"p50_us": s[0], "p95_us": s[1], "max_us": s[2],
+                                              "samples": self.counts[stage]}
+        return result
+
+class NullTelemetry:
+    """关闭遥测时使用的空实现，每个阶段只剩一次空方法调用"""
+
+    frame_count = 0
+
+    def frame_start(self):
+        pass
+
+    def mark(self, stage):
+        pass
+
+    def skip(self):
+        pass
+
+    def record(self, stage, us):
+        pass
+
+    def frame_end(self):
+        return False
+
+    def as_dict(self):
+        return {}
@@ -0,0 +1,221 @@
+# K230 流水线并行运行器
+# 采集线程、检测（主）线程、显示线程通过有界队列衔接：
+# 采集第 N+1 帧与处理第 N 帧重叠，叠加绘制/显示与下一帧检测重叠
+
+import time
+import _thread
+from k230_telemetry import NullTelemetry, STAGE_LATENCY_OUTPUT, STAGE_LATENCY_DISPLAY
+
+DROP_OLDEST = "DROP_OLDEST"  # 队列满时丢弃最旧的帧（保证处理的总是最新帧）
+DROP_NEWEST = "DROP_NEWEST"  # 队列满时丢弃新帧
+BLOCK = "BLOCK"  # 队列满时生产者等待
+
+class BoundedQueue:
+    """固定容量的线程安全环形队列（非阻塞 get）"""
+
+    def __init__(self, capacity, policy=DROP_OLDEST):
+        self.capacity = capacity
+        self.policy = policy
+        self.items = [None] * capacity
+        self.head = 0
+        self.count = 0
+        self.dropped = 0
+        self.lock = _thread.allocate_lock()
+
+    def put(self, item, running=None):
+        """放入一项；返回被丢弃的项（没有丢弃时为 None）
+
+        BLOCK 策略下队列满时等待，running() 返回 False 时放弃并返回 item
+        """
+        while True:
+            self.lock.acquire()
+            if self.count < self.capacity:
+                self.items[(self.head + self.count) % self.capacity] = item
+                self.count += 1
+                self.lock.release()
+                return None
+            if self.policy == DROP_OLDEST:
+                old = self.items[self.head]
+                self.items[self.head] = item
+                self.head = (self.head + 1) % self.capacity
+                self.dropped += 1
+                self.lock.release()
+                return old
+            if self.policy == DROP_NEWEST:
+                self.dropped += 1
+                self.lock.release()
+                return item
+            self.lock.release()
+            if running is not None and not running():
+                return item
+            time.sleep_ms(1)
+
+    def get(self):
+        """取出最旧的一项；队列为空时返回 None"""
+        self.lock.acquire()
+        if self.count == 0:
+            self.lock.release()
+            return None
+        item = self.items[self.head]
+        self.items[self.head] = None
+        self.head = (self.head + 1) % self.capacity
+        self.count -= 1
+        self.lock.release()
+        return item
+
+    def __len__(self):
+        return self.count
+
+class PipelinedRunner:
+    """把 FramePipeline 拆成 采集 / 检测 / 显示 三段并行运行
+
+    pipeline: 已构建的 FramePipeline
+    capture_end: 采集段结束的执行计划下标（采集线程执行 [0, capture_end)）
+    display_start: 显示段开始的执行计划下标（显示线程执行 [display_start, end)）
+    queue_size: 采集队列容量
+    policy: 采集队列满时的策略（DROP_OLDEST / DROP_NEWEST / BLOCK）
+    """
+
+    def __init__(self, pipeline, capture_end, display_start, queue_size=2, policy=DROP_OLDEST):
+        self.pipeline = pipeline
+        self.capture_end = capture_end
+        self.display_start = display_start
+        self.has_display = display_start < len(pipeline.plan)
+        self.capture_queue = BoundedQueue(queue_size, policy)
+        # 显示是尽力而为的：只保留最新一帧
+        self.display_queue = BoundedQueue(1, DROP_OLDEST)
+        # 显示线程测得的延迟交给检测线程写入遥测（遥测数组只在检测线程中修改）
+        self.display_latency = BoundedQueue(4, DROP_OLDEST)
+        # 每帧数据槽位池：队列中、以及三个线程各自处理中的帧
+        self.pool = BoundedQueue(queue_size + 4, DROP_NEWEST)
+        for _ in range(queue_size + 4):
+            self.pool.put(pipeline.new_values())
+        self.running = False
+        self.capture_done = False
+        self.display_done = True
+        self.null_tm = NullTelemetry()
+        # 采集时间戳槽位（capture_time 阶段在出帧后打点，与串行模式同一起点）
+        self.capture_slot = pipeline.slots.get("capture_us")
+        self.captured = 0
+        self.processed = 0
+        self.displayed = 0
+        self.t_start = 0
+        self.t_end = 0
+
+    def _is_running(self):
+        return self.running
+
+    def _recycle(self, item):
+        if item is not None:
+            values = item[0]
+            self.pipeline.clear(values)
+            self.pool.put(values)
+
+    def _capture_loop(self):
+        """采集线程：执行采集段并放入队列"""
+        seq = 0
+        try:
+            while self.running:
+                values = self.pool.get()
+                if values is None:
+                    time.sleep_ms(1)
+                    continue
+                try:
+                    self.pipeline.run(self.null_tm, values, 0, self.capture_end)
+                except KeyboardInterrupt:
+                    self.pool.put(values)
+                    break
+                except Exception as e:
+                    print(f"采集异常: {e}")
+                    self.pool.put(values)
+                    continue
+                # 延迟从出帧时刻计（不含等待传感器的时间）
+                t0 = values[self.capture_slot] if self.capture_slot is not None else None
+                if t0 is None:
+                    t0 = time.ticks_us()
+                seq += 1
+                self.captured += 1
+                self._recycle(self.capture_queue.put((values, seq, t0), self._is_running))
+        finally:
+            self.capture_done = True
+
+    def _display_loop(self):
+        """显示线程：执行叠加绘制和显示段"""
+        try:
+            while self.running or len(self.display_queue):
+                item = self.display_queue.get()
+                if item is None:
+                    time.sleep_ms(1)
+                    continue
+                try:
+                    self.pipeline.run(self.null_tm, item[0], self.display_start)
+                    self.displayed += 1
+                    self.display_latency.put(time.ticks_diff(time.ticks_us(), item[2]))
+                except Exception as e:
+                    print(f"显示异常: {e}")
+                self._recycle(item)
+        finally:
+            self.display_done = True
+
+    def run(self, tm, on_frame_end=None, on_frame_start=None):
+        """在当前线程运行检测段，直到采集结束或 KeyboardInterrupt；tm 只在本线程中写入"""
+        self.running = True
+        self.capture_done = False
+        self.t_start = time.ticks_us()
+        _thread.start_new_thread(self._capture_loop, ())
+        if self.has_display:
+            self.display_done = False
+            _thread.start_new_thread(self._display_loop, ())
+        try:
+            while True:
+                item = self.capture_queue.get()
+                if item is None:
+                    if self.capture_done:
+                        break
+                    time.sleep_ms(1)
+                    continue
+                tm.frame_start()
+                if on_frame_start:
+                    on_frame_start()
+                try:
+                    self.pipeline.run(tm, item[0], self.capture_end, self.display_start)
+                except Exception as e:
+                    print(f"处理异常: {e}")
+                    self._recycle(item)
+                    continue
+                tm.record(STAGE_LATENCY_OUTPUT, time.ticks_diff(time.ticks_us(), item[2]))
+                us = self.display_latency.get()
+                while us is not None:
+                    tm.record(STAGE_LATENCY_DISPLAY, us)
+                    us = self.display_latency.get()
+                self.processed += 1
+                if self.has_display:
+                    self._recycle(self.display_queue.put(item))
+                else:
+                    self._recycle(item)
+                if on_frame_end:
+                    on_frame_end()
+        finally:
+            self.t_end = time.ticks_us()
+            self.running = False
+            while not (self.capture_done and self.display_done):
+                time.sleep_ms(1)
+
+    def stats(self):
+        """吞吐量与丢帧统计"""
+        elapsed = time.ticks_diff(self.t_end or time.ticks_us(), self.t_start) / 1000000
+        return {
+            'captured': self.captured,
+            'processed': self.processed,
+            'displayed': self.displayed,
+            'dropped_capture': self.capture_queue.dropped,
+            'dropped_display': self.display_queue.dropped,
+            'throughput_fps': self.processed / elapsed if elapsed > 0 else 0.0,
+        }
+
+    def print_stats(self):
+        """打印吞吐量和丢帧统计（延迟见遥测 lat_output / lat_display）"""
+        s = self.stats()
+        print(f"流水线: 处理 {s['throughput_fps']:.1f} FPS, 采集 {s['captured']} 帧, "
+              f"处理 {s['processed']} 帧, 显示段 {s['displayed']} 帧, "
+              f"丢弃 {s['dropped_capture']}(采集) / {s['dropped_display']}(显示)")
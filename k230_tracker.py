@@ -0,0 +1,217 @@
+# K230 多目标跟踪器
+# 跨帧保持最多 MAX_TARGETS 个目标轨迹：贪心IoU关联、稳定ID、丢失老化。
+# 所有状态保存在预分配的 array 中，每帧不创建字典和列表
+
+from array import array
+
+class MultiTargetTracker:
+    """固定容量的多目标跟踪器
+
+    max_targets: 最大轨迹数
+    alpha: 每条轨迹的指数平滑系数
+    match_iou: 关联所需的最小IoU
+    max_age: 连续丢失多少帧后删除轨迹
+    min_hits: 命中多少帧后轨迹被确认（确认后才参与输出）
+    max_candidates: 每帧最多考虑的候选矩形数
+    rect_filter: (min_area, min_aspect_ratio, max_aspect_ratio) 候选筛选条件
+    stride: 检测结果中每个矩形占的元素数（4，或带角点时 12）
+    """
+
+    def __init__(self, max_targets=3, alpha=0.3, match_iou=0.3, max_age=5, min_hits=2,
+                 max_candidates=32, rect_filter=(1500, 0.6, 1.6), stride=4):
+        self.max_targets = max_targets
+        self.alpha = alpha
+        self.match_iou = match_iou
+        self.max_age = max_age
+        self.min_hits = min_hits
+        self.max_candidates = max_candidates
+        self.min_area, self.min_aspect, self.max_aspect = rect_filter
+        self.stride = stride
+
+        # 轨迹状态（按槽位索引）
+        self.active = array('B', [0] * max_targets)
+        self.ids = array('L', [0] * max_targets)
+        self.x = array('f', [0.0] * max_targets)
+        self.y = array('f', [0.0] * max_targets)
+        self.w = array('f', [0.0] * max_targets)
+        self.h = array('f', [0.0] * max_targets)
+        self.hits = array('L', [0] * max_targets)
+        self.misses = array('L', [0] * max_targets)
+        self.matched = array('B', [0] * max_targets)
+        self.source = array('L', [0] * max_targets)  # 本帧关联到的检测结果下标
+
+        # 每帧候选（扁平数据中的起始下标）
+        self.cand = array('L', [0] * max_candidates)
+        self.cand_used = array('B', [0] * max_candidates)
+        self.n_cand = 0
+
+        self.next_id = 1
+        self.primary = -1  # 主目标槽位
+
+    def _collect(self, rects_data):
+        """一次遍历筛选候选，只记录下标"""
+        n = 0
+        limit = self.max_candidates
+        length = len(rects_data) - 3
+        for i in range(0, length, self.stride):
+            w = rects_data[i + 2]
+            h = rects_data[i + 3]
+            if h == 0 or w * h < self.min_area:
+                continue
+            ratio = w / h
+            if ratio < self.min_aspect or ratio > self.max_aspect:
+                continue
+            self.cand[n] = i
+            self.cand_used[n] = 0
+            n += 1
+            if n >= limit:
+                break
+        self.n_cand = n
+
+    def _iou(self, t, rects_data, i):
+        x1 = rects_data[i]
+        y1 = rects_data[i + 1]
+        x2 = x1 + rects_data[i + 2]
+        y2 = y1 + rects_data[i + 3]
+        tx1 = self.x[t]
+        ty1 = self.y[t]
+        tx2 = tx1 + self.w[t]
+        ty2 = ty1 + self.h[t]
+        iw = min(x2, tx2) - max(x1, tx1)
+        ih = min(y2, ty2) - max(y1, ty1)
+        if iw <= 0 or ih <= 0:
+            return 0.0
+        inter = iw * ih
+        return inter / (rects_data[i + 2] * rects_data[i + 3] + self.w[t] * self.h[t] - inter)
+
+    def update(self, rects_data):
+        """用本帧检测结果更新所有轨迹；返回主目标槽位（无则 -1）"""
+        if rects_data:
+            self._collect(rects_data)
+        else:
+            self.n_cand = 0
+        n_cand = self.n_cand
+        max_targets = self.max_targets
+        for t in range(max_targets):
+            self.matched[t] = 0
+
+        # 贪心关联：每轮取剩余 (轨迹, 候选) 中IoU最大的一对
+        while True:
+            best = self.match_iou
+            best_t = -1
+            best_c = -1
+            for t in range(max_targets):
+                if not self.active[t] or self.matched[t]:
+                    continue
+                for c in range(n_cand):
+                    if self.cand_used[c]:
+                        continue
+                    iou = self._iou(t, rects_data, self.cand[c])
+                    if iou >= best:
+                        best = iou
+                        best_t = t
+                        best_c = c
+            if best_t < 0:
+                break
+            self._correct(best_t, rects_data, self.cand[best_c])
+            self.matched[best_t] = 1
+            self.cand_used[best_c] = 1
+
+        # 未关联的轨迹老化
+        for t in range(max_targets):
+            if self.active[t] and not self.matched[t]:
+                self.misses[t] += 1
+                if self.misses[t] > self.max_age:
+                    self.active[t] = 0
+
+        # 未关联的候选按面积从大到小占用空闲槽位
+        while True:
+            slot = -1
+            for t in range(max_targets):
+                if not self.active[t]:
+                    slot = t
+                    break
+            if slot < 0:
+                break
+            best_c = -1
+            best_area = 0
+            for c in range(n_cand):
+                if self.cand_used[c]:
+                    continue
+                i = self.cand[c]
+                area = rects_data[i + 2] * rects_data[i + 3]
+                if area > best_area:
+                    best_area = area
+                    best_c = c
+            if best_c < 0:
+                break
+            self._spawn(slot, rects_data, self.cand[best_c])
+            self.cand_used[best_c] = 1
+
+        self._select_primary()
+        return self.primary
+
+    def _correct(self, t, rects_data, i):
+        a = self.alpha
+        b = 1.0 - a
+        self.x[t] = a * rects_data[i] + b * self.x[t]
+        self.y[t] = a * rects_data[i + 1] + b * self.y[t]
+        self.w[t] = a * rects_data[i + 2] + b * self.w[t]
+        self.h[t] = a * rects_data[i + 3] + b * self.h[t]
+        self.source[t] = i
+        self.hits[t] += 1
+        self.misses[t] = 0
+
+    def _spawn(self, t, rects_data, i):
+        self.active[t] = 1
+        self.matched[t] = 1
+        self.ids[t] = self.next_id
+        self.next_id += 1
+        self.x[t] = rects_data[i]
+        self.y[t] = rects_data[i + 1]
+        self.w[t] = rects_data[i + 2]
+        self.h[t] = rects_data[i + 3]
+        self.source[t] = i
+        self.hits[t] = 1
+        self.misses[t] = 0
+
+    def _select_primary(self):
+        """主目标：保持上一帧的主目标，否则取面积最大的已确认轨迹"""
+        p = self.primary
+        if p >= 0 and self.active[p] and self.matched[p] and self.hits[p] >= self.min_hits:
+            return
+        self.primary = -1
+        best_area = 0.0
+        for t in range(self.max_targets):
+            if self.active[t] and self.matched[t] and self.hits[t] >= self.min_hits:
+                area = self.w[t] * self.h[t]
+                if area > best_area:
+                    best_area = area
+                    self.primary = t
+
+    def is_reported(self, t):
+        """轨迹本帧是否输出（活动、已确认且本帧被关联）"""
+        return self.active[t] and self.matched[t] and self.hits[t] >= self.min_hits
+
+    def rect(self, t):
+        """返回轨迹平滑后的整数框 (x, y, w, h)"""
+        return (int(self.x[t]), int(self.y[t]), int(self.w[t]), int(self.h[t]))
+
+    def bounds(self):
+        """所有活动轨迹的外接框；无轨迹时返回 None"""
+        x0 = y0 = 1 << 30
+        x1 = y1 = -1
+        for t in range(self.max_targets):
+            if self.active[t]:
+                x0 = min(x0, self.x[t])
+                y0 = min(y0, self.y[t])
+                x1 = max(x1, self.x[t] + self.w[t])
+                y1 = max(y1, self.y[t] + self.h[t])
+        if x1 < 0:
+            return None
+        return (int(x0), int(y0), int(x1 - x0), int(y1 - y0))
+
+    def reset(self):
+        for t in range(self.max_targets):
+            self.active[t] = 0
+        self.primary = -1
@@ -0,0 +1,145 @@
+# K230 UART 非阻塞发送
+# 只保留最新一帧待发送数据：链路忙时新帧覆盖尚未开始发送的旧帧（控制量只需要最新值），
+# 按波特率估算线路占用时间，线路空闲时才写入，视觉主循环不会被串口阻塞。
+# 发送优先级: 命令应答 > 控制帧 > 文本帧（遥测报告，只在没有待发控制帧时按整帧发送，不与控制帧交错）
+
+import time
+
+class UartTxQueue:
+    """最新值合并的UART发送队列
+
+    uart: machine.UART 对象
+    baudrate: 波特率（用于估算每帧的线路占用时间）
+    max_frame: 最大帧长（字节），预分配两块缓冲区
+    max_reply: 命令应答缓冲区大小（应答不参与合并，按顺序发送）
+    max_text: 低优先级文本帧缓冲区大小，0 表示不启用；单个文本帧不超过 255 字节
+    """
+
+    def __init__(self, uart, baudrate=115200, max_frame=64, max_reply=128, max_text=0):
+        self.uart = uart
+        # 每字节 10 位（8N1）；线路占用按整次写入计算，避免逐字节取整在高波特率下低估
+        self.baudrate = baudrate
+        self.max_frame = max_frame
+        # 文本帧整帧放入发送缓冲区，两块缓冲区会交换，需按较大者分配
+        size = max(max_frame, 255) if max_text else max_frame
+        self.pending = bytearray(size)  # 等待发送的最新帧
+        self.pending_len = 0
+        self.inflight = bytearray(size)  # 正在发送的帧
+        self.inflight_len = 0
+        self.inflight_off = 0
+        self.reply = bytearray(max_reply)  # 待发送的命令应答
+        self.reply_len = 0
+        self.text = bytearray(max_text)  # 待发送的文本帧，每帧前加 1 字节长度
+        self.text_len = 0
+        self.busy_until = time.ticks_us()
+        self.sent = 0  # 完整发出的帧数（含应答）
+        self.coalesced = 0  # 未发送即被新帧覆盖的帧数
+        self.dropped = 0  # 因过长或写入失败丢弃的帧数
+        self.bytes_sent = 0
+
+    def submit(self, frame):
+        """提交一帧（复制到内部缓冲区，调用方可立即复用 frame）并尝试发送"""
+        n = len(frame)
+        if n > self.max_frame:
+            self.dropped += 1
+            return False
+        if self.pending_len:
+            self.coalesced += 1
+        self.pending[:n] = frame
+        self.pending_len = n
+        self.pump()
+        return True
+
+    def submit_reply(self, data):
+        """追加命令应答（不会被控制帧覆盖）；缓冲区不足时丢弃"""
+        n = len(data)
+        if self.reply_len + n > len(self.reply):
+            self.dropped += 1
+            return False
+        self.reply[self.reply_len:self.reply_len + n] = data
+        self.reply_len += n
+        self.pump()
+        return True
+
+    def submit_text(self, frame):
+        """追加一个低优先级文本帧（整帧发送）；缓冲区不足或帧过长时丢弃"""
+        n = len(frame)
+        if n > 255 or self.text_len + n + 1 > len(self.text):
+            self.dropped += 1
+            return False
+        self.text[self.text_len] = n
+        self.text[self.text_len + 1:self.text_len + 1 + n] = frame
+        self.text_len += n + 1
+        self.pump()
+        return True
+
+    def idle(self):
+        """按估算，上一次写入的数据是否已经发完"""
+        return time.ticks_diff(time.ticks_us(), self.busy_until) >= 0
+
+    def pump(self):
+        """线路空闲时写出数据；不等待"""
+        if not self.idle():
+            return
+        if self.inflight_off >= self.inflight_len:
+            if self.reply_len:
+                # 应答优先发送：整块复制到发送缓冲区（超出部分下次发送）
+                n = min(self.reply_len, self.max_frame)
+                self.inflight[:n] = self.reply[:n]
+                self.reply[:self.reply_len - n] = self.reply[n:self.reply_len]
+                self.reply_len -= n
+                self.inflight_len = n
+                self.inflight_off = 0
+                self._write()
+                return
+            if not self.pending_len:
+                if self.text_len:
+                    self._take_text()
+                return
+            # 交换缓冲区：最新帧变为发送中
+            self.pending, self.inflight = self.inflight, self.pending
+            self.inflight_len = self.pending_len
+            self.inflight_off = 0
+            self.pending_len = 0
+        self._write()
+
+    def _take_text(self):
+        # 取出一个完整文本帧；写入不完时下次 pump 先把它发完，控制帧不会插到文本帧中间
+        n = self.text[0]
+        self.inflight[:n] = self.text[1:1 + n]
+        rest = self.text_len - n - 1
+        self.text[:rest] = self.text[n + 1:self.text_len]
+        self.text_len = rest
+        self.inflight_len = n
+        self.inflight_off = 0
+        self._write()
+
+    def _write(self):
+        off = self.inflight_off
+        end = self.inflight_len
+        try:
+            written = self.uart.write(memoryview(self.inflight)[off:end])
+        except Exception:
+            written = None
+        if written is None:
+            # 写入失败：放弃这一帧，后续帧不受影响
+            self.inflight_off = end
+            self.dropped += 1
+            return
+        self.inflight_off = off + written
+        self.bytes_sent += written
+        wire_us = (written * 10000000 + self.baudrate - 1) // self.baudrate
+        self.busy_until = time.ticks_add(time.ticks_us(), wire_us)
+        if self.inflight_off >= end:
+            self.sent += 1
+
+    def stats(self):
+        """发送统计"""
+        return {
+            'sent': self.sent,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'bytes': self.bytes_sent,
+            'pending': self.pending_len > 0,
+            'text_pending': self.text_len,
+        }